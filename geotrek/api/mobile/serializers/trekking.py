@@ -38,20 +38,19 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
 
         def get_cities(self, obj):
             qs = City.objects.filter(published=True)
-            cities = qs.filter(geom__intersects=(obj.geom, 0))
+            cities = qs.intersecting_geom(obj.geom)
             return cities.values_list('code', flat=True)
 
         def get_departure_city(self, obj):
-            qs = City.objects.filter(published=True)
-            if obj.start_point:
-                city = qs.filter(geom__covers=(obj.start_point, 0)).first()
-                if city:
-                    return city.code
-            return None
+            city = obj.departure_city
+            if city and not city.published:
+                # Stored departure city is the first covering one, published or not: first published one
+                city = City.objects.filter(published=True).filter(geom__covers=(obj.start_point, 0)).first()
+            return city.code if city else None
 
         def get_districts(self, obj):
             qs = District.objects.filter(published=True)
-            districts = qs.filter(geom__intersects=(obj.geom, 0))
+            districts = qs.intersecting_geom(obj.geom)
             return [district.pk for district in districts]
 
         class Meta:
@@ -89,8 +88,9 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
             return obj.serializable_pictures_mobile(root_pk)
 
         def get_children(self, obj):
-            children = obj.children.all().annotate(start_point=Transform(StartPoint('geom'), settings.API_SRID),
-                                                   end_point=Transform(EndPoint('geom'), settings.API_SRID))
+            children = obj.children.all().select_related('departure_city') \
+                .annotate(start_point=Transform(StartPoint('geom'), settings.API_SRID),
+                          end_point=Transform(EndPoint('geom'), settings.API_SRID))
             serializer_children = TrekListSerializer(children, many=True, context={'root_pk': obj.pk})
             return serializer_children.data
 
@@ -105,12 +105,7 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
             return obj.parking_location.transform(settings.API_SRID, clone=True).coords
 
         def get_arrival_city(self, obj):
-            qs = City.objects.all()
-            if obj.end_point:
-                city = qs.filter(geom__covers=(obj.end_point, 0)).first()
-                if city:
-                    return city.code
-            return None
+            return obj.arrival_city_id
 
         def get_information_desks(self, obj):
             return [
@@ -21,7 +21,7 @@ class TrekViewSet(DetailSerializerMixin, viewsets.ReadOnlyModelViewSet):
     def get_queryset(self, *args, **kwargs):
         lang = self.request.LANGUAGE_CODE
         queryset = trekking_models.Trek.objects.existing()\
-            .select_related('topo_object') \
+            .select_related('topo_object', 'departure_city') \
             .prefetch_related('topo_object__aggregations', 'attachments') \
             .order_by('pk')
         if self.action != 'list':
@@ -170,6 +170,15 @@ class APIAccessTestCase(BaseApiTest):
         self.assertEqual(json_response['properties']['departure_city'], self.city.code)
         self.assertEqual(json_response['properties']['arrival_city'], self.city.code)
 
+    def test_trek_detail_departure_city_is_published(self):
+        trek = trek_factory.TrekFactory(published_fr=True)
+        extent = trek.geom.buffer(10).extent
+        zoning_factory.CityFactory(name="A unpublished city", geom=MultiPolygon(Polygon.from_bbox(extent)),
+                                   published=False)
+        city = zoning_factory.CityFactory(name="B published city", geom=MultiPolygon(Polygon.from_bbox(extent)))
+        response = self.get_treks_detail(trek.pk, 'fr')
+        self.assertEqual(response.json()['properties']['departure_city'], city.code)
+
     def test_trek_detail_no_parking_location(self):
         trek_no_parking = trek_factory.TrekFactory(name_fr='no_parking', parking_location=None, published_fr=True)
         response = self.get_treks_detail(trek_no_parking.pk, 'fr')
@@ -1,27 +1,39 @@
 import datetime
 import json
+from tempfile import NamedTemporaryFile
 from unittest import skipIf
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.gis.geos import (LineString, MultiLineString, MultiPoint,
-                                     Point, Polygon)
+from django.contrib.gis.gdal import GDAL_VERSION, DataSource
+from django.contrib.gis.geos import (GEOSGeometry, LineString, MultiLineString, MultiPoint,
+                                     MultiPolygon, Point, Polygon)
 from django.contrib.gis.geos.collections import GeometryCollection
-from django.db import connection
+from django.core.cache import caches
+from django.db import connection, transaction
 from django.test.testcases import TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from freezegun.api import freeze_time
 from mapentity.tests.factories import SuperUserFactory
-from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory, APITestCase
 
 from geotrek import __version__
+from geotrek.api.v2 import warming
+from geotrek.api.v2.pagination import StandardResultsSetPagination
+from geotrek.api.v2.renderers import FlatGeobufRenderer
+from geotrek.api.v2.serializers import TrekSerializer
+from geotrek.api.v2.utils import get_translation_or_dict, rich_text_template
+from geotrek.api.v2.views.trekking import TrekViewSet
 from geotrek.authent import models as authent_models
 from geotrek.authent.tests import factories as authent_factory
 from geotrek.common import models as common_models
 from geotrek.common.tests import factories as common_factory
+from geotrek.common.utils.cache import get_hits, object_version_key
 from geotrek.common.utils.testdata import (get_dummy_uploaded_document,
                                            get_dummy_uploaded_file,
                                            get_dummy_uploaded_image)
@@ -4501,12 +4513,12 @@ class AltimetryCacheTests(BaseApiTest):
     @skipIf(not settings.TREKKING_TOPOLOGY_ENABLED, 'Test with dynamic segmentation only')
     def test_cache_is_used_when_getting_trek_DEM(self):
         # There are 9 queries to get trek DEM
-        with self.assertNumQueries(10):
+        with self.assertNumQueries(9):
             response = self.client.get(reverse('apiv2:trek-dem', args=(self.trek.pk,)))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/json')
-        # When cache is used there is single query to get trek DEM
-        with self.assertNumQueries(1):
+        # When cache is used there is no query to get trek DEM
+        with self.assertNumQueries(0):
             response = self.client.get(reverse('apiv2:trek-dem', args=(self.trek.pk,)))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/json')
@@ -4515,38 +4527,38 @@ class AltimetryCacheTests(BaseApiTest):
     def test_cache_is_used_when_getting_trek_DEM_nds(self):
         trek = trek_factory.TrekFactory.create(geom=LineString((1, 101), (81, 101), (81, 99)))
         # There are 9 queries to get trek DEM
-        with self.assertNumQueries(10):
+        with self.assertNumQueries(9):
             response = self.client.get(reverse('apiv2:trek-dem', args=(trek.pk,)))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/json')
-        # When cache is used there is single query to get trek DEM
-        with self.assertNumQueries(1):
+        # When cache is used there is no query to get trek DEM
+        with self.assertNumQueries(0):
             response = self.client.get(reverse('apiv2:trek-dem', args=(trek.pk,)))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/json')
 
     def test_cache_is_used_when_getting_trek_profile(self):
-        # There are 8 queries to get trek profile
-        with self.assertNumQueries(10):
+        # There are 9 queries to get trek profile
+        with self.assertNumQueries(9):
             response = self.client.get(reverse('apiv2:trek-profile', args=(self.trek.pk,)))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/json')
         self.assertIn("profile", response.json().keys())
-        # When cache is used there is single query to get trek profile
-        with self.assertNumQueries(1):
+        # When cache is used there is no query to get trek profile
+        with self.assertNumQueries(0):
             response = self.client.get(reverse('apiv2:trek-profile', args=(self.trek.pk,)))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/json')
         self.assertIn("profile", response.json().keys())
 
     def test_cache_is_used_when_getting_trek_profile_svg(self):
-        # There are 8 queries to get trek profile svg
-        with self.assertNumQueries(10):
+        # There are 9 queries to get trek profile svg
+        with self.assertNumQueries(9):
             response = self.client.get(reverse('apiv2:trek-profile', args=(self.trek.pk,)), {"format": "svg"})
         self.assertEqual(response.status_code, 200)
         self.assertIn('image/svg+xml', response['Content-Type'])
-        # When cache is used there is single query to get trek profile
-        with self.assertNumQueries(1):
+        # When cache is used there is no query to get trek profile
+        with self.assertNumQueries(0):
             response = self.client.get(reverse('apiv2:trek-profile', args=(self.trek.pk,)), {"format": "svg"})
         self.assertEqual(response.status_code, 200)
         self.assertIn('image/svg+xml', response['Content-Type'])
@@ -4558,33 +4570,737 @@ class GenericCacheTestCase(APITestCase):
         cls.practice = PracticeFactory.create()
 
     def test_cache_invalidates_along_x_forwarded_proto_header(self):
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             response = self.client.get(reverse('apiv2:practice-detail', args=(self.practice.pk,)))
         data = response.json()
         self.assertTrue(data['pictogram'].startswith('http://'))
 
-        # after cache hit, query number is 1
-        with self.assertNumQueries(1):
+        # after cache hit, database is not queried
+        with self.assertNumQueries(0):
             response = self.client.get(reverse('apiv2:practice-detail', args=(self.practice.pk,)))
         data = response.json()
         self.assertTrue(data['pictogram'].startswith('http://'))
 
         # we used custom header, cache is invalidate and url is now https
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             response = self.client.get(reverse('apiv2:practice-detail', args=(self.practice.pk,)),
                                        HTTP_X_FORWARDED_PROTO='https')
         data = response.json()
         self.assertTrue(data['pictogram'].startswith('https://'))
 
         # cache is hit
-        with self.assertNumQueries(1):
+        with self.assertNumQueries(0):
             response = self.client.get(reverse('apiv2:practice-detail', args=(self.practice.pk,)),
                                        HTTP_X_FORWARDED_PROTO='https')
         data = response.json()
         self.assertTrue(data['pictogram'].startswith('https://'))
 
         # first request is always cached
-        with self.assertNumQueries(1):
+        with self.assertNumQueries(0):
             response = self.client.get(reverse('apiv2:practice-detail', args=(self.practice.pk,)))
         data = response.json()
         self.assertTrue(data['pictogram'].startswith('http://'))
+
+
+class PublishedZoningTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.path = core_factory.PathFactory.create(geom=LineString((0, 0), (10, 0)))
+        cls.city_end = zoning_factory.CityFactory(code='01000', name='A', geom='SRID=2154;MULTIPOLYGON(((5 -1, 5 1, 11 1, 11 -1, 5 -1)))')
+        cls.city_start = zoning_factory.CityFactory(code='02000', name='B', geom='SRID=2154;MULTIPOLYGON(((-1 -1, -1 1, 5 1, 5 -1, -1 -1)))')
+        zoning_factory.CityFactory(code='03000', published=False, geom='SRID=2154;MULTIPOLYGON(((-1 -1, -1 1, 11 1, 11 -1, -1 -1)))')
+        cls.district = zoning_factory.DistrictFactory(geom='SRID=2154;MULTIPOLYGON(((-1 -1, -1 1, 11 1, 11 -1, -1 -1)))')
+
+    def create_treks(self, count):
+        if settings.TREKKING_TOPOLOGY_ENABLED:
+            return trek_factory.TrekFactory.create_batch(count, paths=[(self.path, 0, 1)])
+        return trek_factory.TrekFactory.create_batch(count, geom=self.path.geom)
+
+    def test_zoning_is_same_in_list_and_detail(self):
+        trek = self.create_treks(1)[0]
+        response = self.client.get(reverse('apiv2:trek-list'))
+        data = response.json()['results'][0]
+        self.assertEqual(data['cities'], [self.city_start.code, self.city_end.code])
+        self.assertEqual(data['districts'], [self.district.pk])
+        response = self.client.get(reverse('apiv2:trek-detail', args=(trek.pk,)))
+        self.assertEqual(response.json()['cities'], data['cities'])
+        self.assertEqual(response.json()['districts'], data['districts'])
+
+    def test_zoning_number_of_queries_does_not_depend_on_page_size(self):
+        self.create_treks(2)
+        with CaptureQueriesContext(connection) as queries_small_page:
+            self.client.get(reverse('apiv2:trek-list'), {'fields': 'cities,districts'})
+        self.create_treks(8)
+        with CaptureQueriesContext(connection) as queries_big_page:
+            response = self.client.get(reverse('apiv2:trek-list'), {'fields': 'cities,districts'})
+        self.assertEqual(response.json()['count'], 10)
+        self.assertEqual(len(queries_small_page), len(queries_big_page))
+
+
+class ListCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trek = trek_factory.TrekFactory.create()
+        cls.theme = common_factory.ThemeFactory.create()
+        cls.trek.themes.add(cls.theme)
+
+    def test_list_is_cached(self):
+        response = self.client.get(reverse('apiv2:trek-list'))
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(reverse('apiv2:trek-list'))
+        self.assertEqual(response.json(), cached_response.json())
+
+    def test_list_cache_is_invalidated_by_model_change(self):
+        self.client.get(reverse('apiv2:trek-list'))
+        self.trek.name = 'Updated name'
+        self.trek.save()
+        response = self.client.get(reverse('apiv2:trek-list'))
+        self.assertEqual(response.json()['results'][0]['name']['en'], 'Updated name')
+
+    def test_list_cache_is_invalidated_by_related_model_change(self):
+        response = self.client.get(reverse('apiv2:trek-list'))
+        self.assertEqual(response.json()['results'][0]['themes'], [self.theme.pk])
+        self.trek.themes.remove(self.theme)
+        response = self.client.get(reverse('apiv2:trek-list'))
+        self.assertEqual(response.json()['results'][0]['themes'], [])
+
+    def test_list_cache_is_invalidated_by_attachment(self):
+        self.client.get(reverse('apiv2:trek-list'))
+        common_factory.AttachmentFactory.create(content_object=self.trek, attachment_file=get_dummy_uploaded_image())
+        response = self.client.get(reverse('apiv2:trek-list'))
+        self.assertEqual(len(response.json()['results'][0]['attachments']), 1)
+
+    def test_list_cache_is_invalidated_by_zoning_change(self):
+        self.client.get(reverse('apiv2:trek-list'))
+        city = zoning_factory.CityFactory.create(geom=MultiPolygon(self.trek.geom.buffer(10)))
+        response = self.client.get(reverse('apiv2:trek-list'))
+        self.assertEqual(response.json()['results'][0]['cities'], [city.code])
+
+    def test_list_cache_is_invalidated_by_near_filter_target_change(self):
+        content = tourism_factory.TouristicContentFactory.create(
+            geom=Point(*self.trek.geom.coords[0], srid=settings.SRID))
+        response = self.client.get(reverse('apiv2:trek-list'), {'near_touristiccontent': content.pk})
+        self.assertEqual(response.json()['count'], 1)
+        content.geom = Point(content.geom.x + 100000, content.geom.y, srid=settings.SRID)
+        content.save()
+        response = self.client.get(reverse('apiv2:trek-list'), {'near_touristiccontent': content.pk})
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_list_cache_is_kept_on_unrelated_model_change(self):
+        self.client.get(reverse('apiv2:trek-list'))
+        flatpages_factory.FlatPageFactory.create()
+        with self.assertNumQueries(0):
+            self.client.get(reverse('apiv2:trek-list'))
+
+
+class ObjectCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trek = trek_factory.TrekFactory.create()
+
+    def test_detail_cache_hit_does_not_query_database(self):
+        self.client.get(reverse('apiv2:trek-detail', args=(self.trek.pk,)))
+        hits = get_hits('api_v2_object_key_db_free')['api_v2_object_key_db_free']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('apiv2:trek-detail', args=(self.trek.pk,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_hits('api_v2_object_key_db_free')['api_v2_object_key_db_free'], hits + 1)
+
+    def test_detail_cache_is_invalidated_by_object_change(self):
+        self.client.get(reverse('apiv2:trek-detail', args=(self.trek.pk,)))
+        self.trek.name = 'Updated name'
+        self.trek.save()
+        response = self.client.get(reverse('apiv2:trek-detail', args=(self.trek.pk,)))
+        self.assertEqual(response.json()['name']['en'], 'Updated name')
+
+    def test_detail_cached_before_commit_is_invalidated_on_commit(self):
+        url = reverse('apiv2:trek-detail', args=(self.trek.pk,))
+        key = object_version_key(trek_models.Trek, self.trek.pk)
+        self.client.get(url)
+        previous_version = caches['default'].get(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.trek.name = 'Updated name'
+                self.trek.save()
+                # New version is not published before commit
+                self.assertIsNone(caches['default'].get(key))
+                # A concurrent request reads previous version of row, and caches previous data under it
+                with patch('geotrek.api.v2.viewsets.register_object_version', return_value=previous_version):
+                    self.client.get(url)
+        self.assertEqual(caches['default'].get(key), self.trek.date_update.isoformat())
+        response = self.client.get(url)
+        self.assertEqual(response.json()['name']['en'], 'Updated name')
+
+    def test_unknown_object_version_is_read_from_database(self):
+        caches['default'].delete(object_version_key(trek_models.Trek, self.trek.pk))
+        hits = get_hits('api_v2_object_key_db')['api_v2_object_key_db']
+        response = self.client.get(reverse('apiv2:trek-detail', args=(self.trek.pk,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_hits('api_v2_object_key_db')['api_v2_object_key_db'], hits + 1)
+        self.assertIsNotNone(caches['default'].get(object_version_key(trek_models.Trek, self.trek.pk)))
+
+    def test_deleted_object_is_not_found(self):
+        trek = trek_factory.TrekFactory.create()
+        self.client.get(reverse('apiv2:trek-detail', args=(trek.pk,)))
+        trek.delete(force=True)
+        response = self.client.get(reverse('apiv2:trek-detail', args=(trek.pk,)))
+        self.assertEqual(response.status_code, 404)
+
+
+class StreamingListTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.treks = trek_factory.TrekFactory.create_batch(3)
+        for trek in cls.treks:
+            common_factory.AttachmentFactory.create(content_object=trek, attachment_file=get_dummy_uploaded_image())
+
+    def get_list(self, params):
+        response = self.client.get(reverse('apiv2:trek-list'), params)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content))
+        return response.json()
+
+    def test_streamed_list_is_same_as_list(self):
+        for params in ({'page_size': 2}, {'page_size': 2, 'page': 2}, {'page_size': 2, 'format': 'geojson'}):
+            with self.subTest(params=params):
+                expected = self.get_list(params)
+                with override_settings(API_STREAMING_PAGE_SIZE=2):
+                    streamed = self.get_list(params)
+                self.assertEqual(streamed, expected)
+
+    @override_settings(API_STREAMING_PAGE_SIZE=2)
+    def test_small_pages_are_not_streamed(self):
+        response = self.client.get(reverse('apiv2:trek-list'), {'page_size': 1})
+        self.assertFalse(response.streaming)
+
+    @override_settings(API_STREAMING_PAGE_SIZE=2)
+    def test_streamed_list_prefetches_related_objects_by_chunk(self):
+        with CaptureQueriesContext(connection) as queries_small_chunks:
+            with patch.object(TrekViewSet, 'streaming_chunk_size', 1):
+                response = self.client.get(reverse('apiv2:trek-list'), {'page_size': 3})
+                b''.join(response.streaming_content)
+        with CaptureQueriesContext(connection) as queries_big_chunk:
+            response = self.client.get(reverse('apiv2:trek-list'), {'page_size': 3})
+            b''.join(response.streaming_content)
+        self.assertLess(len(queries_big_chunk), len(queries_small_chunks))
+
+
+class CursorPaginationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        trek_factory.TrekFactory.create_batch(3, name='Same name')
+        trek_factory.TrekFactory.create_batch(2)
+
+    def walk(self, params):
+        pks = []
+        response = self.client.get(reverse('apiv2:trek-list'), params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertIsNone(data['previous'])
+            pks += [trek['id'] for trek in data['results']]
+            if not data['next']:
+                return data, pks
+            response = self.client.get(data['next'])
+
+    def test_cursor_pagination_walks_all_objects_in_order(self):
+        expected = [trek['id'] for trek in self.client.get(reverse('apiv2:trek-list')).json()['results']]
+        data, pks = self.walk({'cursor': '', 'page_size': 2})
+        self.assertEqual(pks, expected)
+        self.assertEqual(data['count'], 5)
+
+    def test_cursor_pagination_without_count(self):
+        data, pks = self.walk({'cursor': '', 'page_size': 2, 'count': 'false'})
+        self.assertEqual(len(pks), 5)
+        self.assertIsNone(data['count'])
+
+    def test_cursor_pagination_is_stable_across_edits(self):
+        response = self.client.get(reverse('apiv2:trek-list'), {'cursor': '', 'page_size': 2})
+        first_page = [trek['id'] for trek in response.json()['results']]
+        trek_models.Trek.objects.filter(pk=first_page[0]).update(name='ZZZ')
+        cursor = parse_qs(urlparse(response.json()['next']).query)['cursor'][0]
+        data, pks = self.walk({'cursor': cursor, 'page_size': 2})
+        self.assertEqual(len(set(first_page) | set(pks)), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('apiv2:trek-list'), {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_invalid_values(self):
+        pagination = StandardResultsSetPagination()
+        for values in (['Name', 'not an id'], ['Name', [1]], ['Name', 10 ** 30]):
+            response = self.client.get(reverse('apiv2:trek-list'), {'cursor': pagination.encode_cursor(values)})
+            self.assertEqual(response.status_code, 404)
+
+    def test_keyset_of_foreign_key_ordering_compares_ids(self):
+        keyset = StandardResultsSetPagination().get_keyset_ordering(trek_models.Trek.objects.order_by('-difficulty'))
+        self.assertEqual([name for name, field in keyset], ['-difficulty_id', 'pk'])
+
+
+class TranslatedFieldTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trek = trek_factory.TrekFactory(
+            name_fr='Nom', name_en='Name', published_fr=True, published_en=False,
+            description_fr='<p><img src="/media/image.png"></p>', description_en='Description',
+            accessibility_infrastructure_fr='Infrastructure',
+        )
+
+    def test_translated_fields_match_translation_or_dict(self):
+        trek = trek_models.Trek.objects.get(pk=self.trek.pk)
+        for language in ('all', 'fr', 'en'):
+            request = APIRequestFactory().get('/', {'language': language})
+            serializer = TrekSerializer(trek, context={'request': request})
+            data = serializer.data
+            for field_name, model_field_name in (('name', 'name'), ('published', 'published'), ('gear', 'gear'),
+                                                 ('disabled_infrastructure', 'accessibility_infrastructure')):
+                with self.subTest(language=language, field=field_name):
+                    self.assertEqual(data[field_name], get_translation_or_dict(model_field_name, serializer, trek))
+            with self.subTest(language=language, field='description'):
+                expected = serializer._replace_image_paths_with_urls(
+                    get_translation_or_dict('description', serializer, trek))
+                self.assertEqual(data['description'], expected)
+
+    def test_translated_fields_follow_languages_setting(self):
+        trek = trek_models.Trek.objects.get(pk=self.trek.pk)
+        with override_settings(MODELTRANSLATION_LANGUAGES=('fr', )):
+            data = TrekSerializer(trek, context={'request': APIRequestFactory().get('/')}).data
+        self.assertEqual(data['name'], {'fr': 'Nom'})
+        data = TrekSerializer(trek, context={'request': APIRequestFactory().get('/')}).data
+        self.assertEqual(list(data['name'].keys()), list(settings.MODELTRANSLATION_LANGUAGES))
+
+    def test_translated_fields_in_all_languages(self):
+        response = self.client.get(reverse('apiv2:trek-detail', args=(self.trek.pk,)))
+        data = response.json()
+        self.assertEqual(list(data['name'].keys()), list(settings.MODELTRANSLATION_LANGUAGES))
+        self.assertEqual((data['name']['fr'], data['name']['en']), ('Nom', 'Name'))
+        self.assertEqual((data['published']['fr'], data['published']['en']), (True, False))
+        self.assertEqual(data['description']['fr'], '<p><img src="http://testserver/media/image.png"/></p>')
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_rich_text_is_parsed_once_per_content(self):
+        trek = trek_models.Trek.objects.get(pk=self.trek.pk)
+        caches['default'].clear()
+        parsed = []
+        with patch('geotrek.api.v2.utils.rich_text_template', wraps=rich_text_template) as mocked_parse:
+            for host in ('first.example.com', 'second.example.com'):
+                request = APIRequestFactory().get('/', {'language': 'fr'}, HTTP_HOST=host)
+                data = TrekSerializer(trek, context={'request': request}).data
+                self.assertEqual(data['description'], f'<p><img src="http://{host}/media/image.png"/></p>')
+                parsed.append(mocked_parse.call_count)
+        self.assertEqual(parsed[0], parsed[1])
+
+    def test_rich_texts_of_list_are_read_at_once(self):
+        trek_factory.TrekFactory(description_fr='<p><img src="/media/other.png"></p>', published_fr=True)
+        caches['default'].clear()
+        self.client.get(reverse('apiv2:trek-list'), {'language': 'fr'})
+        caches['api_v2'].clear()
+        with patch('geotrek.api.v2.utils.rich_text_template') as mocked_parse, \
+                patch.object(caches['default'], 'get_many', wraps=caches['default'].get_many) as mocked_get_many:
+            response = self.client.get(reverse('apiv2:trek-list'), {'language': 'fr'})
+        mocked_parse.assert_not_called()
+        self.assertEqual(len([call for call in mocked_get_many.call_args_list
+                              if any(key.startswith('rich_text:') for key in call.args[0])]), 1)
+        self.assertEqual(response.json()['results'][0]['description'][:len('<p><img src="http://testserver/media/')],
+                         '<p><img src="http://testserver/media/')
+
+
+class FullTextSearchTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trek_name = trek_factory.TrekFactory(name='Grande randonnée des Écrins', description='<p>Lacs</p>')
+        cls.trek_both = trek_factory.TrekFactory(name='Tour du lac', description='<p>Randonnée autour des lacs</p>')
+        cls.trek_ambiance = trek_factory.TrekFactory(name='Boucle', description='', ambiance='<p>Ambiance <b>randonnée</b></p>')
+        cls.trek_other = trek_factory.TrekFactory(name='100% Vélo', description='<p>Piste</p>')
+
+    def search(self, q):
+        response = self.client.get(reverse('apiv2:trek-list'), {'q': q, 'language': 'en'})
+        self.assertEqual(response.status_code, 200)
+        return [trek['id'] for trek in response.json()['results']]
+
+    def test_search_is_accent_and_case_insensitive(self):
+        self.assertCountEqual(self.search('RANDONNEE'), [self.trek_name.pk, self.trek_both.pk, self.trek_ambiance.pk])
+        self.assertEqual(self.search('ecrins'), [self.trek_name.pk])
+
+    def test_search_matches_substrings_of_names_and_prefixes_of_words(self):
+        self.assertEqual(self.search('onnée des'), [self.trek_name.pk])
+        self.assertEqual(self.search('pist'), [self.trek_other.pk])
+        self.assertEqual(self.search('iste'), [])
+
+    def test_search_escapes_like_patterns(self):
+        self.assertEqual(self.search('100%'), [self.trek_other.pk])
+        self.assertEqual(self.search('_'), [])
+
+    def test_search_requires_all_words(self):
+        self.assertEqual(self.search('randonnée piste'), [])
+
+    def test_search_is_ranked(self):
+        self.assertEqual(self.search('lac')[0], self.trek_both.pk)
+
+
+class SimplifyGeometryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        zigzag = LineString([(x, 0.01 * (x % 2)) for x in range(101)])
+        cls.path = core_factory.PathFactory.create(geom=zigzag)
+        cls.trek = trek_factory.TrekFactory.create(paths=[(cls.path, 0, 1)])
+
+    def get_coordinates(self, params):
+        response = self.client.get(reverse('apiv2:trek-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results'][0]['geometry']['coordinates']
+
+    def test_geometries_are_simplified_for_zoom(self):
+        self.assertEqual(len(self.get_coordinates({'zoom': 10})), 2)
+
+    def test_geometries_are_simplified_with_tolerance(self):
+        self.assertEqual(len(self.get_coordinates({'tolerance': 1})), 2)
+        self.assertEqual(len(self.get_coordinates({'tolerance': 0.001})), 101)
+        self.assertEqual(len(self.get_coordinates({'tolerance': 0})), 101)
+
+    @override_settings(API_SIMPLIFY_MAX_ZOOM=8)
+    def test_geometries_are_not_simplified_for_high_zooms_or_invalid_parameters(self):
+        self.assertEqual(len(self.get_coordinates({})), 101)
+        self.assertEqual(len(self.get_coordinates({'zoom': 10})), 101)
+        self.assertEqual(len(self.get_coordinates({'zoom': 'invalid'})), 101)
+
+    def test_invalid_tolerance_is_rejected(self):
+        for tolerance in ('nan', 'inf', '-inf', 'abc', '-1'):
+            response = self.client.get(reverse('apiv2:trek-list'), {'tolerance': tolerance})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('tolerance', response.json())
+
+    def test_simplified_geometries_keep_extremities(self):
+        full = self.get_coordinates({})
+        simplified = self.get_coordinates({'zoom': 10})
+        self.assertEqual((simplified[0], simplified[-1]), (full[0], full[-1]))
+
+
+class VectorTileTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trek = trek_factory.TrekFactory.create(name='Published trek', published=True)
+        cls.unpublished_trek = trek_factory.TrekFactory.create(name='Unpublished trek', published=False)
+
+    def get_tile_url(self, z, shift=0):
+        point = self.trek.geom.centroid.transform(3857, clone=True)
+        world_size = TrekViewSet.world_size
+        tile_size = world_size / 2 ** z
+        x = int((point.x + world_size / 2) // tile_size) + shift
+        y = int((world_size / 2 - point.y) // tile_size)
+        return reverse('apiv2:trek-tile', kwargs={'z': z, 'x': x, 'y': y})
+
+    def test_tile_contains_published_treks(self):
+        response = self.client.get(self.get_tile_url(12))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertIn(self.trek.name.encode(), response.content)
+        self.assertNotIn(self.unpublished_trek.name.encode(), response.content)
+
+    def test_tile_without_feature_id_argument(self):
+        # PostGIS < 3.0: id is encoded as a feature property
+        with patch.object(connection.ops, 'spatial_version', (2, 5, 0)):
+            response = self.client.get(self.get_tile_url(12))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.trek.name.encode(), response.content)
+
+    def test_tile_out_of_objects_is_empty(self):
+        response = self.client.get(self.get_tile_url(18, shift=100))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+
+    def test_tile_out_of_world(self):
+        response = self.client.get(reverse('apiv2:trek-tile', kwargs={'z': 1, 'x': 2, 'y': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_tile_is_cached(self):
+        url = self.get_tile_url(12)
+        content = self.client.get(url).content
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).content, content)
+
+    def test_path_tiles_require_authentication(self):
+        response = self.client.get(reverse('apiv2:path-tile', kwargs={'z': 0, 'x': 0, 'y': 0}))
+        self.assertEqual(response.status_code, 401)
+
+
+class BinaryFormatsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pois = [trek_factory.POIFactory.create(name=f'POI {i}') for i in range(3)]
+
+    def get_poi_list(self, params):
+        response = self.client.get(reverse('apiv2:poi-list'), {'language': 'en', **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_flatgeobuf_round_trip(self):
+        if not FlatGeobufRenderer.is_supported() or GDAL_VERSION < (3, 1):
+            self.skipTest("FlatGeobuf requires PostGIS 3.2 (and GDAL 3.1 to be read)")
+        expected_features = self.get_poi_list({'format': 'geojson'}).json()['features']
+        response = self.get_poi_list({'format': 'fgb'})
+        self.assertEqual(response['Content-Type'], 'application/flatgeobuf')
+        with NamedTemporaryFile(suffix='.fgb') as f:
+            f.write(response.content)
+            f.flush()
+            features = {feature.get('id'): (feature.get('name'), feature.geom.geos) for feature in DataSource(f.name)[0]}
+        self.assertEqual(len(features), 3)
+        for expected in expected_features:
+            name, geom = features[expected['id']]
+            self.assertEqual(name, expected['properties']['name'])
+            self.assertTrue(geom.equals_exact(GEOSGeometry(json.dumps(expected['geometry'])), 1e-7))
+
+    def test_geobuf(self):
+        response = self.get_poi_list({'format': 'geobuf'})
+        self.assertEqual(response['Content-Type'], 'application/x-protobuf')
+        for poi in self.pois:
+            self.assertIn(poi.name.encode(), response.content)
+
+    def test_flatgeobuf_is_not_available_with_older_postgis(self):
+        with patch.object(FlatGeobufRenderer, 'postgis_version', (99, 0)):
+            response = self.client.get(reverse('apiv2:poi-list'), {'format': 'fgb'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_pagination_links_are_given_in_header(self):
+        response = self.get_poi_list({'format': 'geobuf', 'page_size': 1})
+        self.assertIn('rel="next"', response['Link'])
+
+    def test_detail(self):
+        response = self.client.get(reverse('apiv2:poi-detail', args=(self.pois[0].pk,)), {'format': 'geobuf'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'POI 0', response.content)
+        self.assertNotIn(b'POI 1', response.content)
+
+
+class ConditionalRequestTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trek = trek_factory.TrekFactory.create()
+
+    def test_list_not_modified(self):
+        url = reverse('apiv2:trek-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_not_modified(self):
+        url = reverse('apiv2:trek-detail', args=(self.trek.pk,))
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Unknown object version is read from database
+        caches['default'].delete(object_version_key(trek_models.Trek, self.trek.pk))
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_modified_since(self):
+        url = reverse('apiv2:trek-list')
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_modified_since_previous_day(self):
+        # Lists depend on current date, they are modified at the start of each day
+        url = reverse('apiv2:trek-list')
+        with freeze_time('2099-07-04 10:00:00'):
+            last_modified = self.client.get(url)['Last-Modified']
+        with freeze_time('2099-07-04 22:00:00'):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        with freeze_time('2099-07-05 08:00:00'):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_etag_changes_with_data(self):
+        url = reverse('apiv2:trek-list')
+        etag = self.client.get(url)['ETag']
+        trek_factory.TrekFactory.create()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['count'], 2)
+
+
+class TrekBundleTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        if settings.TREKKING_TOPOLOGY_ENABLED:
+            cls.trek = trek_factory.TrekFactory.create()
+            trek_factory.POIFactory.create(paths=[(cls.trek.paths.first(), 0.5, 0.5)], name="POI near trek")
+            far_away_coords = [[n + 2000 for n in c] for c in cls.trek.geom.coords]
+            far_away_path = core_factory.PathFactory.create(geom=LineString(far_away_coords, srid=settings.SRID))
+            trek_factory.POIFactory.create(paths=[(far_away_path, 0.5, 0.5)], name="POI far from trek")
+        else:
+            cls.trek = trek_factory.TrekFactory.create(geom=LineString(Point(500, 600), Point(550, 800), srid=settings.SRID))
+            trek_factory.POIFactory.create(geom=Point(525, 700, srid=settings.SRID), name="POI near trek")
+            trek_factory.POIFactory.create(geom=Point(2500, 3000, srid=settings.SRID), name="POI far from trek")
+        cls.url = reverse('apiv2:trek-bundle', args=(cls.trek.pk,))
+
+    def test_bundle_matches_endpoints(self):
+        params = {'language': 'en'}
+        bundle = self.client.get(self.url, params).json()
+        self.assertEqual(bundle['trek'], self.client.get(reverse('apiv2:trek-detail', args=(self.trek.pk,)), params).json())
+        self.assertEqual(bundle['profile'], self.client.get(reverse('apiv2:trek-profile', args=(self.trek.pk,)), params).json())
+        for key, basename in (('pois', 'poi'), ('touristic_contents', 'touristiccontent'),
+                              ('touristic_events', 'touristicevent'), ('sensitive_areas', 'sensitivearea'),
+                              ('signages', 'signage')):
+            response = self.client.get(reverse(f'apiv2:{basename}-list'), {'near_trek': self.trek.pk, **params})
+            self.assertEqual(bundle[key], response.json()['results'])
+        self.assertEqual([poi['name'] for poi in bundle['pois']], ["POI near trek"])
+
+    def test_bundle_is_cached_until_bundled_contents_change(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        if settings.TREKKING_TOPOLOGY_ENABLED:
+            trek_factory.POIFactory.create(paths=[(self.trek.paths.first(), 0.2, 0.2)])
+        else:
+            trek_factory.POIFactory.create(geom=Point(510, 620, srid=settings.SRID))
+        self.assertEqual(len(self.client.get(self.url).json()['pois']), 2)
+
+    def test_bundle_modified_since_previous_day(self):
+        with freeze_time('2099-07-04 10:00:00'):
+            last_modified = self.client.get(self.url)['Last-Modified']
+        with freeze_time('2099-07-05 08:00:00'):
+            response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_bundle_of_unknown_trek(self):
+        response = self.client.get(reverse('apiv2:trek-bundle', args=(0,)))
+        self.assertEqual(response.status_code, 404)
+
+
+class SensitiveAreaPeriodFilterTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Species of factory has two practices, and is present in june and july
+        cls.area = sensitivity_factory.SensitiveAreaFactory.create(published=True)
+        cls.practices = list(cls.area.species.practices.all())
+
+    def get_ids(self, params):
+        response = self.client.get(reverse('apiv2:sensitivearea-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [area['id'] for area in response.json()['results']]
+
+    def test_period(self):
+        self.assertEqual(self.get_ids({'period': '7'}), [self.area.pk])
+        self.assertEqual(self.get_ids({'period': '1,6'}), [self.area.pk])
+        self.assertEqual(self.get_ids({'period': '1,2'}), [])
+        self.assertEqual(self.get_ids({'period': 'any'}), [self.area.pk])
+        self.assertEqual(self.get_ids({'period': 'ignore'}), [self.area.pk])
+
+    @freeze_time('2020-03-01')
+    def test_current_month_by_default(self):
+        self.assertEqual(self.get_ids({}), [])
+
+    def test_practices_do_not_duplicate_areas(self):
+        practices = ','.join(str(practice.pk) for practice in self.practices)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_ids({'period': 'ignore', 'practices': practices}), [self.area.pk])
+        self.assertFalse(any('DISTINCT' in query['sql'] for query in queries.captured_queries))
+
+
+class ChangesFeedTestCase(TestCase):
+    def get_changes(self, params):
+        response = self.client.get(reverse('apiv2:touristiccontent-changes'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes(self):
+        cursor = self.get_changes({})['cursor']
+        updated, unpublished, deleted = tourism_factory.TouristicContentFactory.create_batch(3)
+        # Changes before previous synchronization
+        common_models.Change.objects.all().delete()
+        created = tourism_factory.TouristicContentFactory.create()
+        updated.name = "Updated"
+        updated.save()
+        tourism_models.TouristicContent.objects.filter(pk=unpublished.pk).update(
+            **{f'published_{language}': False for language in settings.MODELTRANSLATION_LANGUAGES}
+        )
+        deleted.delete()
+        changes = self.get_changes({'since': cursor})
+        self.assertEqual(changes['created'], [created.pk])
+        self.assertEqual(changes['updated'], [updated.pk])
+        self.assertEqual(changes['unpublished'], [unpublished.pk])
+        self.assertEqual(changes['deleted'], [deleted.pk])
+        self.assertGreaterEqual(changes['cursor'], cursor)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('apiv2:touristiccontent-changes'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(API_CACHE_WARMING_URL='http://testserver', API_CACHE_WARMING_VIEWSETS=('trek', ),
+                   API_CACHE_WARMING_CONCURRENCY=1, PROFILING_ENABLED=True)
+class CacheWarmingTestCase(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        caches['api_v2'].clear()
+
+    def assertCacheHit(self, url, hit=True):
+        response = self.client.get(url, {'language': 'en'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('cache;desc=hit' if hit else 'cache;desc=miss', response['Server-Timing'])
+
+    def test_warm(self):
+        trek_factory.TrekFactory.create()
+        portal = common_factory.TargetPortalFactory.create()
+        self.assertTrue(warming.warm())
+        self.assertCacheHit(reverse('apiv2:trek-list'))
+        response = self.client.get(reverse('apiv2:trek-list'), {'language': 'en', 'portals': portal.pk})
+        self.assertIn('cache;desc=hit', response['Server-Timing'])
+        # Nothing changed since
+        self.assertEqual(warming.warm(), 0)
+
+    def test_first_warming_renders_lists_only(self):
+        trek = trek_factory.TrekFactory.create()
+        warming.warm()
+        self.assertCacheHit(reverse('apiv2:trek-detail', args=[trek.pk]), hit=False)
+        caches['api_v2'].clear()
+        trek.save()
+        warming.warm()
+        self.assertCacheHit(reverse('apiv2:trek-detail', args=[trek.pk]))
+
+    def test_warm_changed_only(self):
+        trek, other_trek = trek_factory.TrekFactory.create_batch(2)
+        warming.warm()
+        caches['api_v2'].clear()
+        trek.name = "Changed"
+        trek.save()
+        warming.warm()
+        self.assertCacheHit(reverse('apiv2:trek-list'))
+        self.assertCacheHit(reverse('apiv2:trek-detail', args=[trek.pk]))
+        self.assertCacheHit(reverse('apiv2:trek-detail', args=[other_trek.pk]), hit=False)
+
+    def test_related_changes_warm_lists_only(self):
+        trek = trek_factory.TrekFactory.create()
+        theme = common_factory.ThemeFactory.create()
+        trek.themes.add(theme)
+        warming.warm()
+        caches['api_v2'].clear()
+        theme.label = "Changed"
+        theme.save()
+        warming.warm()
+        self.assertCacheHit(reverse('apiv2:trek-list'))
+        self.assertCacheHit(reverse('apiv2:trek-detail', args=[trek.pk]), hit=False)
+
+    @patch('geotrek.common.tasks.warm_api_cache.apply_async')
+    def test_scheduled_once_after_changes(self, mocked_apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            trek_factory.TrekFactory.create_batch(2)
+        mocked_apply_async.assert_called_once_with(countdown=settings.API_CACHE_WARMING_DELAY)
+
+    @override_settings(API_CACHE_WARMING_URL=None)
+    @patch('geotrek.common.tasks.warm_api_cache.apply_async')
+    def test_disabled(self, mocked_apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            trek_factory.TrekFactory.create()
+        mocked_apply_async.assert_not_called()
@@ -1,13 +1,95 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework_extensions.cache.decorators import CacheResponse as BaseCacheResponse
 
+from geotrek.common.utils import profiling
+from geotrek.common.utils.cache import acquire_lock, release_lock, wait_lock
+
+
+def conditional_response(etag_func, last_modified_func):
+    """
+    Answer conditional requests (If-None-Match / If-Modified-Since) with 304 Not Modified
+    before any cache or serialization work, and give validators of successful responses.
+    Validators are computed by view methods named etag_func and last_modified_func,
+    called with the same arguments as cache key functions.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key_kwargs = {'view_instance': self, 'view_method': view_method, 'request': request,
+                          'args': args, 'kwargs': kwargs}
+            etag = quote_etag(getattr(self, etag_func)(**key_kwargs))
+            last_modified = getattr(self, last_modified_func)(**key_kwargs)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if last_modified:
+                    response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+class APIV2CacheResponse(BaseCacheResponse):
+    """ Cached responses, also answering conditional requests (cache key is used as ETag) """
+    def __init__(self, last_modified_func, **kwargs):
+        super().__init__(**kwargs)
+        self.last_modified_func = last_modified_func
+
+    def __call__(self, func):
+        return conditional_response(self.key_func, self.last_modified_func)(super().__call__(func))
+
+    def process_cache_response(self, view_instance, view_method, request, args, kwargs):
+        key = self.calculate_key(view_instance=view_instance, view_method=view_method, request=request,
+                                 args=args, kwargs=kwargs)
+        response_triple = self.cache.get(key)
+        locked = False
+        if response_triple is None:
+            # Single flight: concurrent misses of a response wait for the first one to compute it
+            locked = acquire_lock(key, settings.API_CACHE_LOCK_TIMEOUT)
+            if not locked:
+                wait_lock(key, settings.API_CACHE_LOCK_TIMEOUT)
+                response_triple = self.cache.get(key)
+        profiling.count_cache(hit=response_triple is not None)
+        if response_triple is not None:
+            content, status, headers = response_triple
+            response = HttpResponse(content=content, status=status)
+            for header, value in headers.values():
+                response[header] = value
+            return response
+
+        # Responses are computed and rendered by view method on cache misses only
+        try:
+            with profiling.serializing():
+                response = view_method(view_instance, request, *args, **kwargs)
+                response = view_instance.finalize_response(request, response, *args, **kwargs)
+                response.render()
+            if response.status_code < 400 or self.cache_errors:
+                headers = {header: (header, value) for header, value in response.items()}
+                self.cache.set(key, (response.rendered_content, response.status_code, headers),
+                               self.calculate_timeout(view_instance=view_instance))
+        finally:
+            if locked:
+                release_lock(key)
+        return response
+
 
-class APIV2CacheResponseDetail(BaseCacheResponse):
+class APIV2CacheResponseDetail(APIV2CacheResponse):
     def __init__(self,
                  timeout='object_cache_timeout',
                  key_func='object_cache_key_func',
+                 last_modified_func='object_last_modified_func',
                  cache='api_v2',
                  cache_errors=None):
-        super().__init__(timeout=timeout,
+        super().__init__(last_modified_func=last_modified_func,
+                         timeout=timeout,
                          key_func=key_func,
                          cache=cache,
                          cache_errors=cache_errors)
@@ -16,13 +98,15 @@ class APIV2CacheResponseDetail(BaseCacheResponse):
 cache_response_detail = APIV2CacheResponseDetail
 
 
-class APIV2CacheResponseList(BaseCacheResponse):
+class APIV2CacheResponseList(APIV2CacheResponse):
     def __init__(self,
                  timeout='list_cache_timeout',
                  key_func='list_cache_key_func',
+                 last_modified_func='list_last_modified_func',
                  cache='api_v2',
                  cache_errors=None):
-        super().__init__(timeout=timeout,
+        super().__init__(last_modified_func=last_modified_func,
+                         timeout=timeout,
                          key_func=key_func,
                          cache=cache,
                          cache_errors=cache_errors)
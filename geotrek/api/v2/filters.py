@@ -1,3 +1,4 @@
+import math
 from datetime import date, datetime
 from distutils.util import strtobool
 
@@ -5,22 +6,48 @@ import coreschema
 from coreapi.document import Field
 from django.conf import settings
 from django.contrib.gis.db.models import Collect
-from django.db.models import Exists, OuterRef
+from django.contrib.gis.db.models.functions import Transform
+from django.db.models import Exists, F, OuterRef, Value
 from django.db.models.query_utils import Q
 from django.utils.translation import gettext_lazy as _
 from django_filters import ModelMultipleChoiceFilter
 from django_filters import rest_framework as filters
 from django_filters.widgets import CSVWidget
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import BaseFilterBackend
+from modeltranslation.utils import build_localized_fieldname, get_language
 from rest_framework_gis.filters import DistanceToPointFilter, InBBOXFilter
 
+from geotrek.common.functions import (SearchContains, SearchMatch, SearchQuery, SearchRank, SearchVector,
+                                      SimplifyPreserveTopology)
+from geotrek.common.models import Proximity
+
 from geotrek.tourism.models import TouristicEventOrganizer, TouristicContent, TouristicContentType, TouristicEvent, \
     TouristicEventPlace, TouristicEventType
 from geotrek.trekking.models import ServiceType, Trek, POI
-from geotrek.zoning.models import City, District
+from geotrek.zoning.models import CitySubdivision, DistrictSubdivision
 
 if 'geotrek.outdoor' in settings.INSTALLED_APPS:
     from geotrek.outdoor.models import Course, Site
+if 'geotrek.sensitivity' in settings.INSTALLED_APPS:
+    from geotrek.sensitivity.models import Species
+
+
+def filter_query_string(queryset, q, field_names):
+    """
+    Filter and rank queryset by full-text search in translated fields (current language),
+    case and accent insensitive. Names (first field) match substrings, all fields match words prefixes.
+    Expressions are indexed for each language (see <app>/sql/post_*_search.sql), keep field names in sync.
+    """
+    fields = [build_localized_fieldname(field_name, get_language()) for field_name in field_names]
+    vector = SearchVector(*fields)
+    query = SearchQuery(Value(q))
+    pattern = '%{}%'.format(q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'))
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset \
+        .filter(SearchContains(fields[0], Value(pattern)) | SearchMatch(vector, query)) \
+        .annotate(search_rank=SearchRank(vector, query)) \
+        .order_by('-search_rank', *ordering)
 
 
 class GeotrekQueryParamsFilter(BaseFilterBackend):
@@ -57,7 +84,50 @@ class GeotrekQueryParamsFilter(BaseFilterBackend):
 
 
 class GeotrekQueryParamsDimensionFilter(BaseFilterBackend):
+    """
+    Simplify transformed geometries for a map zoom level or a tolerance.
+    Responses are cached by query parameters, so each zoom level is simplified once.
+    """
+    # Size of a 256 pixels tile side at zoom 0, in meters (web mercator)
+    zoom_0_tile_size = 2 * math.pi * 6378137
+
+    def get_tolerance(self, request):
+        """
+        Return tolerance (in meters) from tolerance parameter, or from zoom parameter (size of a pixel).
+        Invalid tolerances are rejected, invalid zooms are ignored.
+        """
+        tolerance = request.GET.get('tolerance')
+        if tolerance:
+            try:
+                tolerance = float(tolerance)
+            except ValueError:
+                tolerance = math.nan
+            if not math.isfinite(tolerance) or tolerance < 0:
+                raise ValidationError({'tolerance': _("Expected a positive number of meters")})
+            return tolerance
+        try:
+            zoom = request.GET.get('zoom')
+            if zoom and int(zoom) <= settings.API_SIMPLIFY_MAX_ZOOM:
+                return self.zoom_0_tile_size / 256 / 2 ** max(int(zoom), 0)
+        except ValueError:
+            pass
+        return 0
+
     def filter_queryset(self, request, queryset, view):
+        tolerance = self.get_tolerance(request)
+        if not tolerance:
+            return queryset
+        queryset = queryset.all()
+        query = queryset.query
+        for name, annotation in list(query.annotations.items()):
+            if isinstance(annotation, Transform):
+                # Simplify in internal SRID (meters), before transformation
+                geom, srid = annotation.get_source_expressions()
+                annotation = annotation.copy()
+                annotation.set_source_expressions([
+                    SimplifyPreserveTopology(geom, tolerance).resolve_expression(query), srid
+                ])
+                query.annotations[name] = annotation
         return queryset
 
     def get_schema_fields(self, view):
@@ -67,6 +137,16 @@ class GeotrekQueryParamsDimensionFilter(BaseFilterBackend):
                     title=_("Format"),
                     description=_("Set output format (json / geojson). Default: json. Example: geojson.")
                 )
+            ), Field(
+                name='zoom', required=False, location='query', schema=coreschema.Integer(
+                    title=_("Zoom"),
+                    description=_("Simplify geometries for a map displayed at this zoom level. Example: 8.")
+                )
+            ), Field(
+                name='tolerance', required=False, location='query', schema=coreschema.Number(
+                    title=_("Tolerance"),
+                    description=_("Simplify geometries with this tolerance (meters). Example: 100.")
+                )
             ),
         )
 
@@ -158,29 +238,33 @@ class GeotrekSensitiveAreaFilter(BaseFilterBackend):
         qs = queryset
         practices = request.GET.get('practices')
         if practices:
-            qs = qs.filter(species__practices__id__in=practices.split(','))
+            # Exists subquery instead of join, so that areas are not duplicated
+            qs = qs.filter(Exists(Species.practices.through.objects.filter(
+                species_id=OuterRef('species_id'), sportpractice_id__in=practices.split(',')
+            )))
         structures = request.GET.get('structures')
         if structures:
             qs = qs.filter(structure__in=structures.split(','))
         period = request.GET.get('period')
         if not period:
-            qs = qs.filter(**{'species__period{:02}'.format(date.today().month): True})
+            months = [date.today().month]
         elif period == 'any':
-            q = Q()
-            for m in range(1, 13):
-                q |= Q(**{'species__period{:02}'.format(m): True})
-            qs = qs.filter(q)
+            months = range(1, 13)
         elif period == 'ignore':
-            pass
+            months = None
         else:
-            q = Q()
-            for m in [int(m) for m in period.split(',')]:
-                q |= Q(**{'species__period{:02}'.format(m): True})
-            qs = qs.filter(q)
+            months = [int(m) for m in period.split(',')]
+        if months is not None:
+            qs = qs.alias(species_in_period=F('species__period_mask').bitand(Species.months_mask(months))) \
+                .filter(species_in_period__gt=0)
         trek_id = request.GET.get('trek')
         if trek_id:
             qs = _filter_near(base_model=qs.model, queryset=qs, target_model=Trek, target_pk=trek_id)
-        return qs.distinct()
+        return qs
+
+    def get_cache_models(self, request):
+        """ Labels of models of filter targets, whose changes invalidate list cache """
+        return {'trekking.Trek'} if request.GET.get('trek') else set()
 
     def get_schema_fields(self, view):
         return (
@@ -227,6 +311,11 @@ class GeotrekPOIFilter(BaseFilterBackend):
             qs = qs.filter(pk__in=self.get_pois_to_filter_outdoor_objects(Course, courses))
         return qs
 
+    def get_cache_models(self, request):
+        """ Labels of models of filter targets, whose changes invalidate list cache """
+        targets = {'trek': 'trekking.Trek', 'sites': 'outdoor.Site', 'courses': 'outdoor.Course'}
+        return {model for param, model in targets.items() if request.GET.get(param) is not None}
+
     def get_pois_to_filter_outdoor_objects(self, model, elems):
         list_pois = POI.objects.none()
         objects_outdoor = model.objects.filter(pk__in=elems.split(','))
@@ -268,18 +357,31 @@ def _filter_near(base_model, target_model, target_pk, queryset):
     The function uses the model properties to achieve the filtering. For instance it would find and use the `target_trek.pois` property to filter
     q POI queryset near a target trek.
 
+    Objects of models kept in the Proximity index are looked up in it, without fetching the target.
+
     Return an empty queryset if the target does not exist.
     """
 
-    def pluralize(name):
-        return name + 's'
-
+    if Proximity.is_indexed(base_model, target_model):
+        return queryset.filter(pk__in=Proximity.near(base_model, target_model, target_pk))
     try:
         target = target_model.objects.get(pk=target_pk)
     except target_model.DoesNotExist:
         return queryset.none()
+    return filter_near(queryset, target)
+
+
+def filter_near(queryset, target):
+    """Filter the queryset by keeping only the objects near an already fetched target object (see _filter_near)."""
+
+    def pluralize(name):
+        return name + 's'
+
+    base_model = queryset.model
+    if Proximity.is_indexed(base_model, target.__class__):
+        return queryset.filter(pk__in=Proximity.near(base_model, target.__class__, target.pk))
     prop_name = getattr(base_model, "related_near_objects_property_name", None) or pluralize(base_model._meta.model_name)
-    prop = getattr(target_model, prop_name)
+    prop = getattr(target.__class__, prop_name)
     return prop.fget(target, queryset)
 
 
@@ -312,6 +414,12 @@ class NearbyContentFilter(BaseFilterBackend):
                                   target_pk=near_outdoorcourse)
         return qs
 
+    def get_cache_models(self, request):
+        """ Labels of models of targets of near_* filters, whose changes invalidate list cache """
+        targets = {'near_touristicevent': 'tourism.TouristicEvent', 'near_touristiccontent': 'tourism.TouristicContent',
+                   'near_trek': 'trekking.Trek', 'near_outdoorsite': 'outdoor.Site', 'near_outdoorcourse': 'outdoor.Course'}
+        return {model for param, model in targets.items() if request.GET.get(param)}
+
     def get_schema_fields(self, view):
         fields = (
             Field(
@@ -361,10 +469,10 @@ class GeotrekZoningAndThemeFilter(BaseFilterBackend):
         qs = queryset
         cities = request.GET.get('cities')
         if cities:
-            qs = qs.filter(Exists(City.objects.filter(code__in=cities.split(","), geom__intersects=OuterRef('geom'))))
+            qs = qs.filter(Exists(CitySubdivision.objects.filter(city__in=cities.split(","), geom__intersects=OuterRef('geom'))))
         districts = request.GET.get('districts')
         if districts:
-            qs = qs.filter(Exists(District.objects.filter(pk__in=districts.split(","), geom__intersects=OuterRef('geom'))))
+            qs = qs.filter(Exists(DistrictSubdivision.objects.filter(district__in=districts.split(","), geom__intersects=OuterRef('geom'))))
         structures = request.GET.get('structures')
         if structures:
             qs = qs.filter(structure__in=structures.split(','))
@@ -377,16 +485,14 @@ class GeotrekZoningAndThemeFilter(BaseFilterBackend):
             if portals:
                 qs = qs.filter(parent_sites__portal__in=portals.split(','))
             if q:
-                qs = qs.filter(
-                    Q(name__icontains=q) | Q(description__icontains=q)
-                )
+                qs = filter_query_string(qs, q, ('name', 'description'))
         else:
             if themes:
                 qs = qs.filter(themes__in=themes.split(','))
             if portals:
                 qs = qs.filter(portal__in=portals.split(','))
             if q:
-                qs = qs.filter(Q(name__icontains=q) | Q(description__icontains=q) | Q(description_teaser__icontains=q))
+                qs = filter_query_string(qs, q, ('name', 'description_teaser', 'description'))
         return qs
 
     def _get_schema_fields(self, view):
@@ -696,10 +802,10 @@ class GeotrekTrekQueryParamsFilter(BaseFilterBackend):
             qs = qs.filter(ascent__lte=ascent_max)
         cities = request.GET.get('cities')
         if cities:
-            qs = qs.filter(Exists(City.objects.filter(code__in=cities.split(","), geom__intersects=OuterRef('geom'))))
+            qs = qs.filter(Exists(CitySubdivision.objects.filter(city__in=cities.split(","), geom__intersects=OuterRef('geom'))))
         districts = request.GET.get('districts')
         if districts:
-            qs = qs.filter(Exists(District.objects.filter(pk__in=districts.split(","), geom__intersects=OuterRef('geom'))))
+            qs = qs.filter(Exists(DistrictSubdivision.objects.filter(district__in=districts.split(","), geom__intersects=OuterRef('geom'))))
         structures = request.GET.get('structures')
         if structures:
             qs = qs.filter(structure__in=structures.split(','))
@@ -729,10 +835,7 @@ class GeotrekTrekQueryParamsFilter(BaseFilterBackend):
             qs = qs.filter(practice__in=practices.split(','))
         q = request.GET.get('q')
         if q:
-            qs = qs.filter(
-                Q(name__icontains=q) | Q(description__icontains=q)
-                | Q(description_teaser__icontains=q) | Q(ambiance__icontains=q)
-            )
+            qs = filter_query_string(qs, q, ('name', 'description_teaser', 'description', 'ambiance'))
         return qs
 
     def get_schema_fields(self, view):
@@ -1,8 +1,10 @@
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from rest_framework import serializers
 
 from geotrek.common import models as common_models
+from geotrek.zoning import models as zoning_models
 
 
 class PDFSerializerMixin:
@@ -32,3 +34,25 @@ class PDFSerializerMixin:
             for language in settings.MODELTRANSLATION_LANGUAGES:
                 data[language] = self._get_pdf_url_lang(obj, language, portal)
         return data
+
+
+class PublishedZoningSerializerMixin:
+    """
+    Serialize published cities and districts.
+    When serializing a list (a page), zones of all objects are resolved at once and kept in serializer context.
+    """
+
+    def _get_published_zones(self, obj, zoning_model, property_name):
+        objects = self.parent.instance if isinstance(self.parent, serializers.ListSerializer) else None
+        if objects is None:
+            return [zone.pk for zone in getattr(obj, property_name)]
+        resolved = self.context.setdefault('published_zones', {}).setdefault((obj._meta.model, zoning_model), {})
+        if obj.pk not in resolved:
+            resolved.update(obj.published_zones_pks([elem.pk for elem in objects], zoning_model))
+        return resolved[obj.pk]
+
+    def get_cities(self, obj):
+        return self._get_published_zones(obj, zoning_models.City, 'published_cities')
+
+    def get_districts(self, obj):
+        return self._get_published_zones(obj, zoning_models.District, 'published_districts')
@@ -1,9 +1,21 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
 from collections import OrderedDict
 
-from django.core.paginator import Paginator
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
 from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from geotrek.api.v2.renderers import FEATURE_FORMATS
 
 
 class FasterPaginator(Paginator):
@@ -15,19 +27,177 @@ class FasterPaginator(Paginator):
 
 
 class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Page number pagination, or keyset pagination if ``cursor`` parameter is given
+    (empty for the first page). In keyset mode, ``count=false`` skips counting objects.
+    """
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 1000
     django_paginator_class = FasterPaginator
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = _('Invalid cursor')
 
-    def get_paginated_response(self, data):
-        if self.request.query_params.get('format', 'json') == 'geojson':
-            return Response(OrderedDict([
+    def is_cursor_mode(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            return list(self.paginate_queryset_by_cursor(queryset, request))
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_queryset_lazily(self, queryset, request, view=None):
+        """ Same as paginate_queryset, but return page queryset instead of evaluating it """
+        if self.is_cursor_mode(request):
+            return self.paginate_queryset_by_cursor(queryset, request)
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+        self.request = request
+        return self.page.object_list
+
+    def get_keyset_field(self, queryset, name):
+        """
+        Return (name, field) of an ordering field name, usable to compare values of the keyset,
+        or None if it can not be used (expressions, transforms, many-to-many or reverse relations)
+        """
+        if name == 'pk':
+            pk = queryset.model._meta.pk
+            # Primary key of child models of multi-table inheritance (e.g. topologies) is a relation
+            return name, pk.target_field if pk.is_relation else pk
+        if name in queryset.query.annotations:
+            return name, queryset.query.annotations[name].output_field
+        opts = queryset.model._meta
+        parts = name.split(LOOKUP_SEP)
+        for i, part in enumerate(parts):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                return None
+            if not field.is_relation:
+                return (name, field) if i == len(parts) - 1 else None
+            if i == len(parts) - 1:
+                # Ordering by a relation sorts by related model ordering, the keyset has to compare raw ids
+                if not field.concrete or field.many_to_many:
+                    return None
+                return f'{name}_id' if part == field.name else name, field.target_field
+            opts = field.related_model._meta
+        return None
+
+    def get_keyset_ordering(self, queryset):
+        """ Queryset ordering, made total by adding pk, as a list of (field name, model field) """
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not all(isinstance(field, str) and field != '?' for field in ordering):
+            ordering = []
+        keyset = []
+        for field in ordering:
+            desc = '-' if field.startswith('-') else ''
+            keyset_field = self.get_keyset_field(queryset, field.lstrip('-'))
+            if keyset_field is None:
+                keyset = []
+                break
+            name, model_field = keyset_field
+            keyset.append((desc + name, model_field))
+        if not {'pk', queryset.model._meta.pk.name} & {name.lstrip('-') for name, _field in keyset}:
+            keyset.append(self.get_keyset_field(queryset, 'pk'))
+        return keyset
+
+    def encode_cursor(self, values):
+        return urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+    def decode_cursor(self, cursor, keyset):
+        """ Return values of keyset fields encoded in cursor, converted to python values of their fields """
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (BinasciiError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(keyset):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [None if value is None else field.to_python(value)
+                      for value, (_name, field) in zip(values, keyset)]
+            for value, (_name, field) in zip(values, keyset):
+                field.run_validators(value)
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_keyset_filter(self, keyset, values):
+        """ Objects after given values of keyset fields (NULLs are last in ascending order, as in PostgreSQL) """
+        after = Q(pk__in=[])
+        equal = Q()
+        for (field, _model_field), value in zip(keyset, values):
+            name = field.lstrip('-')
+            if field.startswith('-'):
+                field_after = Q(**{f'{name}__isnull': False}) if value is None else Q(**{f'{name}__lt': value})
+            else:
+                field_after = Q(pk__in=[]) if value is None else Q(**{f'{name}__gt': value}) | Q(**{f'{name}__isnull': True})
+            field_equal = Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+            after |= equal & field_after
+            equal &= field_equal
+        return after
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        keyset = self.get_keyset_ordering(queryset)
+        ordering = [name for name, _field in keyset]
+        queryset = queryset.order_by(*ordering)
+        self.count = None
+        if request.query_params.get(self.count_query_param) != 'false':
+            self.count = self.django_paginator_class(queryset, page_size).count
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(keyset, self.decode_cursor(cursor, keyset)))
+        # Values of last object of this page, and whether there is a next page
+        keys = list(queryset.values_list(*[name.lstrip('-') for name in ordering])[page_size - 1:page_size + 1])
+        self.next_cursor = self.encode_cursor(list(keys[0])) if len(keys) == 2 else None
+        return queryset[:page_size]
+
+    def get_count(self):
+        if self.is_cursor_mode(self.request):
+            return self.count
+        return self.page.paginator.count
+
+    def get_next_link(self):
+        if not self.is_cursor_mode(self.request):
+            return super().get_next_link()
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if not self.is_cursor_mode(self.request):
+            return super().get_previous_link()
+        # Keyset pagination only walks forward
+        return None
+
+    def is_geojson(self):
+        return self.request.query_params.get('format', 'json') in FEATURE_FORMATS
+
+    def get_paginated_data(self, data):
+        if self.is_geojson():
+            return OrderedDict([
                 ('type', 'FeatureCollection'),
-                ('count', self.page.paginator.count),
+                ('count', self.get_count()),
                 ('next', self.get_next_link()),
                 ('previous', self.get_previous_link()),
                 ('features', data['features'])
-            ]))
+            ])
         else:
-            return super().get_paginated_response(data)
+            return OrderedDict([
+                ('count', self.get_count()),
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data)
+            ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
@@ -1,5 +1,9 @@
+import json
+
 import pygal
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
 from django.utils import translation
 from django.utils.translation import gettext as _
 from pygal.style import LightSolarizedStyle
@@ -51,3 +55,123 @@ class SVGProfileRenderer(BaseRenderer):
         translation.deactivate()
         line_chart.add('', [(int(v[0]), int(v[3])) for v in profile])
         return line_chart.render()
+
+
+class MVTRenderer(BaseRenderer):
+    media_type = "application/vnd.mapbox-vector-tile"
+    format = "mvt"
+    charset = None
+
+    def render(self, data, media_type=None, renderer_context=None):
+        """ Tiles are encoded by PostGIS, errors have no body """
+        if isinstance(data, (bytes, memoryview)):
+            return bytes(data)
+        return b''
+
+
+# Formats whose data are serialized as GeoJSON features
+FEATURE_FORMATS = ('geojson', 'fgb', 'geobuf')
+
+
+def get_column_type(values, json_type):
+    """ Return SQL type of a feature property, from its values """
+    types = {type(value) for value in values if value is not None}
+    if types == {bool}:
+        return 'boolean'
+    if types and types <= {int}:
+        return 'bigint'
+    if types and types <= {int, float}:
+        return 'double precision'
+    if types <= {str}:
+        return 'text'
+    return json_type
+
+
+class PostGISFeaturesRenderer(BaseRenderer):
+    """
+    Encode GeoJSON features (a feature collection or a single feature) with a PostGIS aggregate function.
+    Feature ids and properties become typed columns, nested properties are kept as JSON.
+    """
+    charset = None
+    aggregate = None
+    aggregate_arguments = None
+    json_type = 'jsonb'
+    # Minimum PostGIS version providing aggregate function
+    postgis_version = (2, 4)
+
+    @classmethod
+    def is_supported(cls):
+        return connection.ops.spatial_version >= cls.postgis_version
+
+    def get_features(self, data):
+        if not isinstance(data, dict):
+            return None
+        if data.get('type') == 'Feature':
+            return [data]
+        return data.get('features')
+
+    def set_link_header(self, data, renderer_context):
+        """ Pagination links can't be encoded in features, give them in Link header """
+        response = (renderer_context or {}).get('response')
+        links = [f'<{data[rel]}>; rel="{rel}"' for rel in ('next', 'previous') if data.get(rel)]
+        if response is not None and links:
+            response['Link'] = ', '.join(links)
+
+    def render(self, data, media_type=None, renderer_context=None):
+        features = self.get_features(data)
+        if features is None:
+            # Errors have no body
+            return b''
+        self.set_link_header(data, renderer_context)
+        rows = [{'id': feature.get('id'), **(feature.get('properties') or {})} for feature in features]
+        qn = connection.ops.quote_name
+        # GeoJSON as text, ST_GeomFromGeoJSON(jsonb) requires PostGIS 3.0
+        columns = ["ST_GeomFromGeoJSON(feature->>'geometry') AS geometry"]
+        params = []
+        for name in dict.fromkeys(name for row in rows for name in row):
+            column_type = get_column_type([row.get(name) for row in rows], self.json_type)
+            operator = '->' if column_type == 'jsonb' else '->>'
+            columns.append(f"(feature->'properties'{operator}%s)::{column_type} AS {qn(name)}")
+            params.append(name)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {self.aggregate}(features, {self.aggregate_arguments}) "
+                f"FROM (SELECT {', '.join(columns)} FROM jsonb_array_elements(%s::jsonb) AS feature) AS features",
+                params + [json.dumps([
+                    {'geometry': feature.get('geometry'), 'properties': row} for feature, row in zip(features, rows)
+                ], cls=DjangoJSONEncoder)]
+            )
+            encoded = cursor.fetchone()[0]
+        return bytes(encoded) if encoded else b''
+
+
+class FlatGeobufRenderer(PostGISFeaturesRenderer):
+    """ FlatGeobuf, with spatial index """
+    media_type = "application/flatgeobuf"
+    format = "fgb"
+    aggregate = "ST_AsFlatGeobuf"
+    aggregate_arguments = "true, 'geometry'"
+    postgis_version = (3, 2)
+
+
+class GeobufRenderer(PostGISFeaturesRenderer):
+    """ Geobuf, nested properties are encoded as JSON strings """
+    media_type = "application/x-protobuf"
+    format = "geobuf"
+    aggregate = "ST_AsGeobuf"
+    aggregate_arguments = "'geometry'"
+    json_type = 'text'
+
+
+def render_stream(renderer, envelope, items, accepted_media_type=None, renderer_context=None):
+    """
+    Render data with a JSON renderer, yielding encoded items one by one.
+    Items are rendered in place of the last (empty) list of envelope.
+    """
+    prefix, suffix = renderer.render(envelope, accepted_media_type, renderer_context).rsplit(b'[]', 1)
+    yield prefix + b'['
+    for i, item in enumerate(items):
+        if i:
+            yield b','
+        yield renderer.render(item, accepted_media_type, renderer_context)
+    yield b']' + suffix
@@ -1,10 +1,12 @@
-from bs4 import BeautifulSoup
 import json
+from weakref import WeakSet
 
 from django.conf import settings
 from django.contrib.gis.db.models.functions import Transform
 from django.contrib.gis.geos import MultiLineString, Point
+from django.core.signals import setting_changed
 from django.db.models import F
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.translation import get_language
 from django.utils.translation import gettext_lazy as _
@@ -12,14 +14,17 @@ from drf_dynamic_fields import DynamicFieldsMixin
 from easy_thumbnails.alias import aliases
 from easy_thumbnails.exceptions import InvalidImageFormatError
 from easy_thumbnails.files import get_thumbnailer
+from modeltranslation.utils import build_localized_fieldname
 from PIL.Image import DecompressionBombError
 from rest_framework import serializers
 from rest_framework.relations import HyperlinkedIdentityField
 from rest_framework_gis import serializers as geo_serializers
 
 from geotrek.api.v2.functions import Length3D
-from geotrek.api.v2.mixins import PDFSerializerMixin
-from geotrek.api.v2.utils import build_url, get_translation_or_dict
+from geotrek.api.v2.mixins import PDFSerializerMixin, PublishedZoningSerializerMixin
+from geotrek.api.v2.renderers import FEATURE_FORMATS
+from geotrek.api.v2.utils import (build_url, get_requested_language, get_rich_text_templates, get_translation_or_dict,
+                                  replace_image_paths_with_urls, translation_accessors)
 from geotrek.authent import models as authent_models
 from geotrek.common import models as common_models
 from geotrek.common.utils import simplify_coords
@@ -70,11 +75,77 @@ class TimeStampedSerializer(serializers.ModelSerializer):
         fields = ('create_datetime', 'update_datetime')
 
 
+class TranslatedField(serializers.Field):
+    """
+    Read-only translated model field, in requested language or as a dict of all translations.
+    Cheaper than a SerializerMethodField calling get_translation_or_dict(): getters of translations
+    are read from the table of the serializer class (see TranslatedSerializerMixin),
+    and requested language is read once per context.
+    """
+
+    def __init__(self, rich_text=False, **kwargs):
+        self.rich_text = rich_text
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        table = getattr(parent, 'translation_accessors', {})
+        self.accessors = table[field_name] if field_name in table else translation_accessors(self.source)
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, instance):
+        lang = get_requested_language(self)
+        if lang == 'all':
+            data = {language: getter(instance) for language, getter in self.accessors.items()}
+        elif lang in self.accessors:
+            data = self.accessors[lang](instance)
+        else:
+            data = get_translation_or_dict(self.source, self, instance)
+        if self.rich_text:
+            data = self.parent._replace_image_paths_with_urls(data)
+        return data
+
+
+# Serializer classes with translated fields, whose tables are rebuilt when languages change
+translated_serializers = WeakSet()
+
+
+class TranslatedSerializerMixin:
+    """
+    Build {field name: {language: getter}} table of TranslatedFields once per serializer class
+    """
+    translation_accessors = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.build_translation_accessors()
+        translated_serializers.add(cls)
+
+    @classmethod
+    def build_translation_accessors(cls):
+        cls.translation_accessors = {
+            field_name: translation_accessors(field.source or field_name)
+            for field_name, field in cls._declared_fields.items() if isinstance(field, TranslatedField)
+        }
+
+
+@receiver(setting_changed)
+def rebuild_translation_accessors(setting, **kwargs):
+    """ Languages can be overridden (e.g. in tests) """
+    if setting == 'MODELTRANSLATION_LANGUAGES':
+        translation_accessors.cache_clear()
+        for serializer_class in list(translated_serializers):
+            serializer_class.build_translation_accessors()
+
+
 def override_serializer(format_output, base_serializer_class):
     """
     Override Serializer switch output format and dimension data
     """
-    if format_output == 'geojson':
+    if format_output in FEATURE_FORMATS:
         class GeneratedGeoSerializer(BaseGeoJSONSerializer,
                                      base_serializer_class):
             class Meta(BaseGeoJSONSerializer.Meta,
@@ -258,6 +329,10 @@ class AttachmentsSerializerMixin(serializers.ModelSerializer):
         return obj.attachment_file
 
     def get_thumbnail(self, obj):
+        url = obj.get_thumbnail_url('apiv2')
+        if url is not None:
+            return build_url(self, url) if url else ""
+        # Not generated yet
         thumbnailer = get_thumbnailer(self.get_attachment_file(obj))
         try:
             thumbnail = thumbnailer.get_thumbnail(aliases.get('apiv2'))
@@ -438,7 +513,7 @@ if 'geotrek.tourism' in settings.INSTALLED_APPS:
             model = tourism_models.TouristicEventType
             fields = ('id', 'pictogram', 'type')
 
-    class TouristicModelSerializer(PDFSerializerMixin, DynamicFieldsMixin, TimeStampedSerializer):
+    class TouristicModelSerializer(PublishedZoningSerializerMixin, PDFSerializerMixin, DynamicFieldsMixin, TimeStampedSerializer):
         geometry = geo_serializers.GeometryField(read_only=True, source="geom_transformed", precision=7)
         accessibility = serializers.SerializerMethodField()
         external_id = serializers.CharField(source='eid')
@@ -456,12 +531,6 @@ if 'geotrek.tourism' in settings.INSTALLED_APPS:
         def get_practical_info(self, obj):
             return get_translation_or_dict('practical_info', self, obj)
 
-        def get_cities(self, obj):
-            return [city.code for city in obj.published_cities]
-
-        def get_districts(self, obj):
-            return [district.pk for district in obj.published_districts]
-
         def get_name(self, obj):
             return get_translation_or_dict('name', self, obj)
 
@@ -623,44 +692,45 @@ if 'geotrek.core' in settings.INSTALLED_APPS:
 
 
 if 'geotrek.trekking' in settings.INSTALLED_APPS:
-    class TrekSerializer(PDFSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
+    class TrekSerializer(TranslatedSerializerMixin, PublishedZoningSerializerMixin, PDFSerializerMixin, DynamicFieldsMixin,
+                         serializers.ModelSerializer):
         url = HyperlinkedIdentityField(view_name='apiv2:trek-detail')
-        published = serializers.SerializerMethodField()
+        published = TranslatedField()
         geometry = geo_serializers.GeometryField(read_only=True, source="geom3d_transformed", precision=7)
         length_2d = serializers.FloatField(source='length_2d_display')
         length_3d = serializers.SerializerMethodField()
-        name = serializers.SerializerMethodField()
-        access = serializers.SerializerMethodField()
-        accessibility_advice = serializers.SerializerMethodField()
-        accessibility_covering = serializers.SerializerMethodField()
-        accessibility_exposure = serializers.SerializerMethodField()
-        accessibility_signage = serializers.SerializerMethodField()
-        accessibility_slope = serializers.SerializerMethodField()
-        accessibility_width = serializers.SerializerMethodField()
-        ambiance = serializers.SerializerMethodField()
-        description = serializers.SerializerMethodField()
-        description_teaser = serializers.SerializerMethodField()
-        departure = serializers.SerializerMethodField()
-        disabled_infrastructure = serializers.SerializerMethodField()
+        name = TranslatedField()
+        access = TranslatedField()
+        accessibility_advice = TranslatedField()
+        accessibility_covering = TranslatedField()
+        accessibility_exposure = TranslatedField()
+        accessibility_signage = TranslatedField()
+        accessibility_slope = TranslatedField()
+        accessibility_width = TranslatedField()
+        ambiance = TranslatedField(rich_text=True)
+        description = TranslatedField(rich_text=True)
+        description_teaser = TranslatedField(rich_text=True)
+        departure = TranslatedField()
+        disabled_infrastructure = TranslatedField(source='accessibility_infrastructure')
         departure_geom = serializers.SerializerMethodField()
-        arrival = serializers.SerializerMethodField()
+        arrival = TranslatedField()
         external_id = serializers.CharField(source='eid')
         second_external_id = serializers.CharField(source='eid2')
         create_datetime = serializers.DateTimeField(source='topo_object.date_insert')
         update_datetime = serializers.DateTimeField(source='topo_object.date_update')
         attachments = AttachmentSerializer(many=True, source='sorted_attachments')
         attachments_accessibility = AttachmentAccessibilitySerializer(many=True)
-        gear = serializers.SerializerMethodField()
+        gear = TranslatedField()
         gpx = serializers.SerializerMethodField('get_gpx_url')
         kml = serializers.SerializerMethodField('get_kml_url')
         pdf = serializers.SerializerMethodField('get_pdf_url')
-        advice = serializers.SerializerMethodField()
-        advised_parking = serializers.SerializerMethodField()
+        advice = TranslatedField()
+        advised_parking = TranslatedField()
         parking_location = serializers.SerializerMethodField()
-        ratings_description = serializers.SerializerMethodField()
+        ratings_description = TranslatedField()
         children = serializers.ReadOnlyField(source='children_id')
         parents = serializers.ReadOnlyField(source='parents_id')
-        public_transport = serializers.SerializerMethodField()
+        public_transport = TranslatedField()
         elevation_area_url = serializers.SerializerMethodField()
         elevation_svg_url = serializers.SerializerMethodField()
         altimetric_profile = serializers.SerializerMethodField('get_altimetric_profile_url')
@@ -669,52 +739,35 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
         next = serializers.ReadOnlyField(source='next_id')
         cities = serializers.SerializerMethodField()
         districts = serializers.SerializerMethodField()
-        departure_city = serializers.SerializerMethodField()
+        departure_city = serializers.ReadOnlyField(source='departure_city_id')
         labels = serializers.SerializerMethodField()
         web_links = WebLinkSerializer(many=True)
         view_points = HDViewPointSerializer(many=True)
 
-        def get_gear(self, obj):
-            return get_translation_or_dict('gear', self, obj)
-
-        def get_published(self, obj):
-            return get_translation_or_dict('published', self, obj)
-
-        def get_name(self, obj):
-            return get_translation_or_dict('name', self, obj)
-
-        def get_description(self, obj):
-            return self._replace_image_paths_with_urls(get_translation_or_dict('description', self, obj))
-
-        def get_access(self, obj):
-            return get_translation_or_dict('access', self, obj)
-
-        def get_accessibility_advice(self, obj):
-            return get_translation_or_dict('accessibility_advice', self, obj)
-
-        def get_accessibility_covering(self, obj):
-            return get_translation_or_dict('accessibility_covering', self, obj)
-
-        def get_accessibility_exposure(self, obj):
-            return get_translation_or_dict('accessibility_exposure', self, obj)
-
-        def get_accessibility_signage(self, obj):
-            return get_translation_or_dict('accessibility_signage', self, obj)
-
-        def get_accessibility_slope(self, obj):
-            return get_translation_or_dict('accessibility_slope', self, obj)
-
-        def get_accessibility_width(self, obj):
-            return get_translation_or_dict('accessibility_width', self, obj)
-
-        def get_ambiance(self, obj):
-            return self._replace_image_paths_with_urls(get_translation_or_dict('ambiance', self, obj))
-
-        def get_disabled_infrastructure(self, obj):
-            return get_translation_or_dict('accessibility_infrastructure', self, obj)
-
-        def get_departure(self, obj):
-            return get_translation_or_dict('departure', self, obj)
+        rich_text_fields = ('ambiance', 'description', 'description_teaser')
+
+        @classmethod
+        def many_init(cls, instance=None, *args, **kwargs):
+            # Resolve children, parents, previous and next of all treks at once
+            if instance is not None:
+                instance = trekking_models.TrekItinerancy.prefetch(instance)
+            list_serializer = super().many_init(instance, *args, **kwargs)
+            if instance is not None:
+                list_serializer.child.prefetch_rich_text_templates(instance)
+            return list_serializer
+
+        def get_request_rich_text_templates(self):
+            """ Parsed rich texts of current request, see get_rich_text_templates() """
+            return self.context.setdefault('_rich_text_templates', {})
+
+        def prefetch_rich_text_templates(self, treks):
+            """ Read parsed rich texts of all treks at once """
+            lang = get_requested_language(self)
+            languages = [lang] if lang in settings.MODELTRANSLATION_LANGUAGES else settings.MODELTRANSLATION_LANGUAGES
+            fields = [field_name for field_name in self.rich_text_fields if field_name in self.fields]
+            get_rich_text_templates([getattr(trek, build_localized_fieldname(field_name, language))
+                                     for trek in treks for field_name in fields for language in languages],
+                                    self.get_request_rich_text_templates())
 
         def get_first_point(self, geom):
             if isinstance(geom, Point):
@@ -726,12 +779,6 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
         def get_departure_geom(self, obj):
             return self.get_first_point(obj.geom3d_transformed)[:2]
 
-        def get_arrival(self, obj):
-            return get_translation_or_dict('arrival', self, obj)
-
-        def get_description_teaser(self, obj):
-            return self._replace_image_paths_with_urls(get_translation_or_dict('description_teaser', self, obj))
-
         def get_length_3d(self, obj):
             return round(obj.length_3d_m, 1)
 
@@ -741,24 +788,12 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
         def get_kml_url(self, obj):
             return build_url(self, reverse('trekking:trek_kml_detail', kwargs={'lang': get_language(), 'pk': obj.pk, 'slug': obj.slug}))
 
-        def get_advice(self, obj):
-            return get_translation_or_dict('advice', self, obj)
-
-        def get_advised_parking(self, obj):
-            return get_translation_or_dict('advised_parking', self, obj)
-
         def get_parking_location(self, obj):
             if not obj.parking_location:
                 return None
             point = obj.parking_location.transform(settings.API_SRID, clone=True)
             return [round(point.x, 7), round(point.y, 7)]
 
-        def get_ratings_description(self, obj):
-            return get_translation_or_dict('ratings_description', self, obj)
-
-        def get_public_transport(self, obj):
-            return get_translation_or_dict('public_transport', self, obj)
-
         def get_elevation_area_url(self, obj):
             return build_url(self, reverse('apiv2:trek-dem', args=(obj.pk,)))
 
@@ -774,38 +809,16 @@ if 'geotrek.trekking' in settings.INSTALLED_APPS:
             geojson = obj.points_reference.transform(settings.API_SRID, clone=True).geojson
             return json.loads(geojson)
 
-        def get_cities(self, obj):
-            return [city.code for city in obj.published_cities]
-
-        def get_districts(self, obj):
-            return [district.pk for district in obj.published_districts]
-
         def get_labels(self, obj):
             return [label.pk for label in obj.published_labels]
 
-        def get_departure_city(self, obj):
-            geom = self.get_first_point(obj.geom)
-            city = zoning_models.City.objects.all().filter(geom__contains=geom).first()
-            return city.code if city else None
-
         def _replace_image_paths_with_urls(self, data):
-            def replace(html_content):
-                if not html_content:
-                    return html_content
-                soup = BeautifulSoup(html_content, features="html.parser")
-                imgs = soup.find_all('img')
-                for img in imgs:
-                    if img.attrs['src'][0] == '/':
-                        img['src'] = self.context.get("request").build_absolute_uri(img.attrs["src"])
-                return str(soup)
-
-            try:
-                for k, v in data.items():
-                    data[k] = replace(v)
-            except AttributeError:
-                data = replace(data)
-
-            return data
+            request = self.context.get("request")
+            templates = self.get_request_rich_text_templates()
+            if isinstance(data, dict):
+                return {language: replace_image_paths_with_urls(html_content, request, templates)
+                        for language, html_content in data.items()}
+            return replace_image_paths_with_urls(data, request, templates)
 
         class Meta:
             model = trekking_models.Trek
@@ -1125,7 +1138,7 @@ if 'geotrek.outdoor' in settings.INSTALLED_APPS:
             model = outdoor_models.Practice
             fields = ('id', 'name')
 
-    class SiteSerializer(PDFSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
+    class SiteSerializer(PublishedZoningSerializerMixin, PDFSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
         url = HyperlinkedIdentityField(view_name='apiv2:site-detail')
         geometry = geo_serializers.GeometryField(read_only=True, source="geom_transformed", precision=7)
         attachments = AttachmentSerializer(many=True)
@@ -1140,12 +1153,6 @@ if 'geotrek.outdoor' in settings.INSTALLED_APPS:
         web_links = WebLinkSerializer(many=True)
         view_points = HDViewPointSerializer(many=True)
 
-        def get_cities(self, obj):
-            return [city.code for city in obj.published_cities]
-
-        def get_districts(self, obj):
-            return [district.pk for district in obj.published_districts]
-
         def get_labels(self, obj):
             return [label.pk for label in obj.published_labels]
 
@@ -1204,7 +1211,7 @@ if 'geotrek.outdoor' in settings.INSTALLED_APPS:
                 'type', 'url', 'uuid', 'courses', 'web_links', 'wind',
             )
 
-    class CourseSerializer(PDFSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
+    class CourseSerializer(PublishedZoningSerializerMixin, PDFSerializerMixin, DynamicFieldsMixin, serializers.ModelSerializer):
         url = HyperlinkedIdentityField(view_name='apiv2:course-detail')
         geometry = geo_serializers.GeometryField(read_only=True, source="geom_transformed", precision=7)
         children = serializers.ReadOnlyField(source='children_id')
@@ -1223,12 +1230,6 @@ if 'geotrek.outdoor' in settings.INSTALLED_APPS:
         def get_accessibility(self, obj):
             return get_translation_or_dict('accessibility', self, obj)
 
-        def get_cities(self, obj):
-            return [city.code for city in obj.published_cities]
-
-        def get_districts(self, obj):
-            return [district.pk for district in obj.published_districts]
-
         def get_equipment(self, obj):
             return get_translation_or_dict('equipment', self, obj)
 
@@ -4,9 +4,12 @@ from django.views.generic import RedirectView
 from rest_framework import routers
 
 from geotrek.api.v2 import views as api_views
+from geotrek.api.v2.renderers import MVTRenderer
 
 
 router = routers.DefaultRouter()
+# Viewsets served as vector tiles, by layer name
+tile_viewsets = {}
 router.register('structure', api_views.StructureViewSet, basename='structure')
 router.register('portal', api_views.TargetPortalViewSet, basename='portal')
 router.register('theme', api_views.ThemeViewSet, basename='theme')
@@ -17,6 +20,7 @@ router.register('organism', api_views.OrganismViewSet, basename='organism')
 router.register('file_type', api_views.FileTypeViewSet, basename='filetype')
 if 'geotrek.core' in settings.INSTALLED_APPS:
     router.register('path', api_views.PathViewSet, basename='path')
+    tile_viewsets['path'] = api_views.PathViewSet
 if 'geotrek.infrastructure' in settings.INSTALLED_APPS:
     router.register('infrastructure', api_views.InfrastructureViewSet, basename='infrastructure')
     router.register('infrastructure_type', api_views.InfrastructureTypeViewSet, basename='infrastructure-type')
@@ -31,6 +35,8 @@ if 'geotrek.feedback' in settings.INSTALLED_APPS:
 if 'geotrek.trekking' in settings.INSTALLED_APPS:
     router.register('trek', api_views.TrekViewSet, basename='trek')
     router.register('poi', api_views.POIViewSet, basename='poi')
+    tile_viewsets['trek'] = api_views.TrekViewSet
+    tile_viewsets['poi'] = api_views.POIViewSet
     router.register('poi_type', api_views.POITypeViewSet, basename='poitype')
     router.register('tour', api_views.TourViewSet, basename='tour')
     router.register('trek_accessibility', api_views.AccessibilityViewSet, basename='accessibility')
@@ -57,6 +63,7 @@ if 'geotrek.tourism' in settings.INSTALLED_APPS:
     router.register('label_accessibility', api_views.LabelAccessibilityViewSet, basename='labelaccessibility')
 if 'geotrek.sensitivity' in settings.INSTALLED_APPS:
     router.register('sensitivearea', api_views.SensitiveAreaViewSet, basename='sensitivearea')
+    tile_viewsets['sensitivearea'] = api_views.SensitiveAreaViewSet
     router.register('sensitivearea_practice', api_views.SportPracticeViewSet, basename='sportpractice')
     router.register('sensitivearea_species', api_views.SpeciesViewSet, basename='species')
 if 'geotrek.zoning' in settings.INSTALLED_APPS:
@@ -92,6 +99,12 @@ _urlpatterns += [
     path('sportpractice/', RedirectView.as_view(pattern_name='apiv2:sportpractice-list', permanent=True)),
     path('sportpractice/<int:pk>/', RedirectView.as_view(pattern_name='apiv2:sportpractice-detail', permanent=True)),
     path('version', api_views.GeotrekVersionAPIView.as_view()),
-    path('', include(router.urls)),
 ]
+_urlpatterns += [
+    path(f'tiles/{layer}/<int:z>/<int:x>/<int:y>.mvt',
+         viewset.as_view({'get': 'tile'}, basename=layer, detail=False, renderer_classes=[MVTRenderer]),
+         name=f'{layer}-tile')
+    for layer, viewset in tile_viewsets.items()
+]
+_urlpatterns.append(path('', include(router.urls)))
 urlpatterns = [path('api/v2/', include(_urlpatterns))]
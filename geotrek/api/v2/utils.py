@@ -1,4 +1,42 @@
+from functools import lru_cache
+from hashlib import md5
+from itertools import islice
+from operator import attrgetter
+
+from bs4 import BeautifulSoup
+from bs4.dammit import EntitySubstitution
 from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import prefetch_related_objects
+from django.db.models.constants import LOOKUP_SEP
+from modeltranslation.utils import build_localized_fieldname
+
+
+@lru_cache()
+def translation_accessors(model_field_name):
+    """
+    Return {language: getter} of translations of a model field, built once per field
+    :param model_field_name: Model name field
+    """
+    return {language: attrgetter('{}_{}'.format(model_field_name, language))
+            for language in settings.MODELTRANSLATION_LANGUAGES}
+
+
+def get_requested_language(serializer):
+    """
+    Return language requested with `language` parameter ('all' by default),
+    read once for all fields and objects serialized in the same context
+    :param serializer: serializer object
+    """
+    context = serializer.context
+    try:
+        return context['_requested_language']
+    except KeyError:
+        request = context.get('request')
+        lang = request.GET.get('language', 'all') if request else 'all'
+        context['_requested_language'] = lang
+        return lang
 
 
 def get_translation_or_dict(model_field_name, serializer, instance):
@@ -9,20 +47,37 @@ def get_translation_or_dict(model_field_name, serializer, instance):
     :param instance: instance object
     :return: unicode or dict
     """
-    lang = serializer.context.get('request').GET.get('language', 'all') if serializer.context.get('request') else 'all'
+    lang = get_requested_language(serializer)
+    accessors = translation_accessors(model_field_name)
 
     if lang != 'all':
-        data = getattr(instance, '{}_{}'.format(model_field_name, lang))
+        getter = accessors.get(lang)
+        data = getter(instance) if getter else getattr(instance, '{}_{}'.format(model_field_name, lang))
 
     else:
-        data = {}
-
-        for language in settings.MODELTRANSLATION_LANGUAGES:
-            data.update({language: getattr(instance, '{}_{}'.format(model_field_name, language), )})
+        data = {language: getter(instance) for language, getter in accessors.items()}
 
     return data
 
 
+def localized_lookup(model, lookup, language):
+    """
+    Return lookup whose last field is replaced by its translation in language, if this field is translated
+    :param model: Model the lookup starts from
+    :param lookup: field lookup, as 'species__name'
+    :param language: language code
+    """
+    *path, field_name = lookup.split(LOOKUP_SEP)
+    for related_name in path:
+        model = model._meta.get_field(related_name).related_model
+    localized_field_name = build_localized_fieldname(field_name, language)
+    try:
+        model._meta.get_field(localized_field_name)
+    except FieldDoesNotExist:
+        return lookup
+    return LOOKUP_SEP.join(path + [localized_field_name])
+
+
 def build_url(serializer, url):
     """
     Return the full url for a file or picture
@@ -36,3 +91,80 @@ def build_url(serializer, url):
     else:
         raise Exception('Bad context. No server variable found in the request !')
     return url
+
+
+IMAGE_SOURCE_MARKER = '\ue000'
+# Parsed rich texts are shared by processes, keyed by content
+RICH_TEXT_CACHE = 'default'
+
+
+def rich_text_key(html_content):
+    return f"rich_text:{md5(html_content.encode()).hexdigest()}"
+
+
+def rich_text_template(html_content):
+    """
+    Parse rich text, return (parts, sources):
+    serialized HTML split around relative sources of images, and these sources
+    """
+    soup = BeautifulSoup(html_content, features="html.parser")
+    sources = []
+    for img in soup.find_all('img'):
+        if img.attrs['src'][0] == '/':
+            sources.append(img.attrs['src'])
+            img['src'] = IMAGE_SOURCE_MARKER
+    parts = str(soup).split(IMAGE_SOURCE_MARKER)
+    if len(parts) != len(sources) + 1:
+        return None, sources
+    return parts, sources
+
+
+def get_rich_text_templates(contents, templates):
+    """
+    Add templates of rich texts (see rich_text_template) to templates dict {content: template},
+    read at once from shared cache, parsing only contents never parsed before
+    """
+    keys = {rich_text_key(content): content for content in set(contents) if content and content not in templates}
+    if not keys:
+        return templates
+    cache = caches[RICH_TEXT_CACHE]
+    templates.update({keys[key]: template for key, template in cache.get_many(keys).items()})
+    parsed = {content: rich_text_template(content) for content in keys.values() if content not in templates}
+    cache.set_many({rich_text_key(content): template for content, template in parsed.items()}, None)
+    templates.update(parsed)
+    return templates
+
+
+def replace_image_paths_with_urls(html_content, request, templates=None):
+    """
+    Return rich text with absolute URLs of images
+    HTML is parsed once per content, then only URLs are built for each request
+    :param templates: dict {content: template} of current request, see get_rich_text_templates()
+    """
+    if not html_content:
+        return html_content
+    templates = get_rich_text_templates([html_content], {} if templates is None else templates)
+    parts, sources = templates[html_content]
+    urls = [request.build_absolute_uri(source) for source in sources]
+    if parts is None or any('"' in url for url in urls):
+        # Marker found in content itself, or attribute quoted differently
+        soup = BeautifulSoup(html_content, features="html.parser")
+        for img in soup.find_all('img'):
+            if img.attrs['src'][0] == '/':
+                img['src'] = request.build_absolute_uri(img.attrs['src'])
+        return str(soup)
+    return parts[0] + ''.join(EntitySubstitution.substitute_xml(url) + part for url, part in zip(urls, parts[1:]))
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Iterate over queryset with a server-side cursor, yielding lists of objects
+    Related objects are prefetched chunk by chunk, as iterator() ignores prefetch_related()
+    """
+    iterator = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        prefetch_related_objects(chunk, *queryset._prefetch_related_lookups)
+        yield chunk
@@ -10,7 +10,7 @@ from geotrek.api.v2.functions import Length3D
 from geotrek.core import models as core_models
 
 
-class PathViewSet(api_viewsets.GeotrekGeometricViewset):
+class PathViewSet(api_viewsets.VectorTileMixin, api_viewsets.GeotrekGeometricViewset):
     """
     Use HTTP basic authentication to access this endpoint.
     """
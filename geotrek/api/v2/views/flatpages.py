@@ -6,7 +6,7 @@ from geotrek.common.models import Attachment
 from geotrek.flatpages import models as flatpages_models
 
 
-class FlatPageViewSet(api_viewsets.GeotrekViewSet):
+class FlatPageViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekViewSet):
     filter_backends = api_viewsets.GeotrekViewSet.filter_backends + (
         api_filters.FlatPageFilter,
         api_filters.UpdateOrCreateDateFilter
@@ -8,7 +8,7 @@ from geotrek.common.models import Attachment
 from geotrek.infrastructure import models as infra_models
 
 
-class InfrastructureViewSet(api_viewsets.GeotrekGeometricViewset):
+class InfrastructureViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (
         api_filters.NearbyContentFilter,
         api_filters.UpdateOrCreateDateFilter,
@@ -10,7 +10,7 @@ from geotrek.common.models import Attachment, HDViewPoint
 from geotrek.outdoor import models as outdoor_models
 
 
-class SiteViewSet(api_viewsets.GeotrekGeometricViewset):
+class SiteViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (
         api_filters.GeotrekSiteFilter,
         api_filters.NearbyContentFilter,
@@ -80,7 +80,7 @@ class OutdoorRatingViewSet(api_viewsets.GeotrekViewSet):
         .order_by('order', 'name', 'pk')  # Required for reliable pagination
 
 
-class CourseViewSet(api_viewsets.GeotrekGeometricViewset):
+class CourseViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (
         api_filters.GeotrekCourseFilter,
         api_filters.NearbyContentFilter,
@@ -11,7 +11,7 @@ from geotrek.sensitivity import models as sensitivity_models
 from ..filters import GeotrekQueryParamsFilter, GeotrekQueryParamsDimensionFilter, GeotrekInBBoxFilter, GeotrekSensitiveAreaFilter, NearbyContentFilter, UpdateOrCreateDateFilter
 
 
-class SensitiveAreaViewSet(api_viewsets.GeotrekGeometricViewset):
+class SensitiveAreaViewSet(api_viewsets.VectorTileMixin, api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = (
         DjangoFilterBackend,
         GeotrekQueryParamsFilter,
@@ -23,6 +23,7 @@ class SensitiveAreaViewSet(api_viewsets.GeotrekGeometricViewset):
     )
     bbox_filter_field = 'geom_transformed'
     bbox_filter_include_overlapping = True
+    tile_properties = {'name': 'species__name'}
 
     def get_serializer_class(self):
         if 'bubble' in self.request.GET:
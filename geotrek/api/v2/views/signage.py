@@ -8,7 +8,7 @@ from geotrek.common.models import Attachment
 from geotrek.signage import models as signage_models
 
 
-class SignageViewSet(api_viewsets.GeotrekGeometricViewset):
+class SignageViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (api_filters.NearbyContentFilter, api_filters.UpdateOrCreateDateFilter)
     serializer_class = api_serializers.SignageSerializer
     queryset = signage_models.Signage.objects.existing() \
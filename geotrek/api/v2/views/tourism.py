@@ -34,7 +34,7 @@ class TouristicContentCategoryViewSet(api_viewsets.GeotrekViewSet):
         return Response(serializer.data)
 
 
-class TouristicContentViewSet(api_viewsets.GeotrekGeometricViewset):
+class TouristicContentViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (
         api_filters.GeotrekTouristicContentFilter,
         api_filters.NearbyContentFilter,
@@ -59,7 +59,7 @@ class InformationDeskTypeViewSet(api_viewsets.GeotrekViewSet):
     queryset = tourism_models.InformationDeskType.objects.order_by('pk')
 
 
-class InformationDeskViewSet(api_viewsets.GeotrekViewSet):
+class InformationDeskViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekViewSet):
     filter_backends = api_viewsets.GeotrekViewSet.filter_backends + (api_filters.TreksAndSitesRelatedPortalFilter,
                                                                      api_filters.GeotrekInformationDeskFilter)
     serializer_class = api_serializers.InformationDeskSerializer
@@ -82,7 +82,7 @@ class TouristicEventTypeViewSet(api_viewsets.GeotrekViewSet):
     queryset = tourism_models.TouristicEventType.objects.order_by('pk')  # Required for reliable pagination
 
 
-class TouristicEventViewSet(api_viewsets.GeotrekGeometricViewset):
+class TouristicEventViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (
         api_filters.GeotrekTouristicEventFilter,
         api_filters.NearbyContentFilter,
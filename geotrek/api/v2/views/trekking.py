@@ -1,3 +1,6 @@
+from datetime import date
+from hashlib import md5
+
 from django.conf import settings
 from django.contrib.gis.db.models.functions import Transform
 from django.db.models import F, Prefetch, Q
@@ -12,15 +15,23 @@ from geotrek.api.v2.decorators import cache_response_detail
 from geotrek.api.v2.functions import Length3D
 from geotrek.api.v2.renderers import SVGProfileRenderer
 from geotrek.common.models import Attachment, AccessibilityAttachment, HDViewPoint
+from geotrek.common.utils.cache import get_model_versions, get_models_modified_today, model_dependencies
 from geotrek.trekking import models as trekking_models
 
+if 'geotrek.sensitivity' in settings.INSTALLED_APPS:
+    from geotrek.api.v2.views.sensitivity import SensitiveAreaViewSet
+if 'geotrek.signage' in settings.INSTALLED_APPS:
+    from geotrek.api.v2.views.signage import SignageViewSet
+if 'geotrek.tourism' in settings.INSTALLED_APPS:
+    from geotrek.api.v2.views.tourism import TouristicContentViewSet, TouristicEventViewSet
+
 
 class WebLinkCategoryViewSet(api_viewsets.GeotrekViewSet):
     serializer_class = api_serializers.WebLinkCategorySerializer
     queryset = trekking_models.WebLinkCategory.objects.all()
 
 
-class TrekViewSet(api_viewsets.GeotrekGeometricViewset):
+class TrekViewSet(api_viewsets.VectorTileMixin, api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (
         api_filters.GeotrekTrekQueryParamsFilter,
         api_filters.NearbyContentFilter,
@@ -28,6 +39,7 @@ class TrekViewSet(api_viewsets.GeotrekGeometricViewset):
         api_filters.GeotrekRatingsFilter
     )
     serializer_class = api_serializers.TrekSerializer
+    tile_properties = {'name': 'name', 'practice': 'practice'}
 
     def get_queryset(self):
         activate(self.request.GET.get('language'))
@@ -92,6 +104,60 @@ class TrekViewSet(api_viewsets.GeotrekGeometricViewset):
             content = trek.get_formatted_elevation_profile_and_limits()
         return Response(content)
 
+    def get_bundle_viewsets(self):
+        """ {key: viewset} of contents near trek, served with it by bundle action """
+        if not hasattr(self, '_bundle_viewsets'):
+            viewset_classes = {'pois': POIViewSet}
+            if 'geotrek.tourism' in settings.INSTALLED_APPS:
+                viewset_classes['touristic_contents'] = TouristicContentViewSet
+                viewset_classes['touristic_events'] = TouristicEventViewSet
+            if 'geotrek.sensitivity' in settings.INSTALLED_APPS:
+                viewset_classes['sensitive_areas'] = SensitiveAreaViewSet
+            if 'geotrek.signage' in settings.INSTALLED_APPS:
+                viewset_classes['signages'] = SignageViewSet
+            self._bundle_viewsets = {
+                key: viewset_class(request=self.request, format_kwarg=self.format_kwarg, action='list', args=(), kwargs={})
+                for key, viewset_class in viewset_classes.items()
+            }
+        return self._bundle_viewsets
+
+    def get_bundle_cache_models(self):
+        """ return models whose changes invalidate bundle cache: trek related models and models of bundled lists """
+        models = set(model_dependencies(trekking_models.Trek))
+        for viewset in self.get_bundle_viewsets().values():
+            models |= viewset.get_list_cache_models()
+        return models
+
+    def bundle_cache_key_func(self, **kwargs):
+        """ cache key md5 for bundle action, based on trek version and versions of bundled models """
+        if not hasattr(self, '_bundle_cache_key'):
+            versions = get_model_versions(self.get_bundle_cache_models())
+            # Some filters of bundled lists depend on current date
+            key = f"{self.get_object_cache_key(kwargs.get('kwargs').get('pk'))}:{date.today().isoformat()}:{versions}"
+            self._bundle_cache_key = md5(key.encode("utf-8")).hexdigest()
+        return self._bundle_cache_key
+
+    def bundle_last_modified_func(self, **kwargs):
+        return get_models_modified_today(self.get_bundle_cache_models())
+
+    @action(detail=True, url_name="bundle")
+    @cache_response_detail(key_func='bundle_cache_key_func', last_modified_func='bundle_last_modified_func')
+    def bundle(self, request, *args, **kwargs):
+        """
+        Return trek, its profile and contents near it (as their lists filtered by near_trek parameter)
+        in one response. Trek is fetched once and shared by proximity filters of all lists.
+        """
+        qs_filtered = self.filter_published_lang_retrieve(request, self.get_queryset())
+        trek = get_object_or_404(qs_filtered, pk=kwargs['pk'])
+        data = {
+            'trek': self.get_serializer(trek).data,
+            'profile': trek.get_formatted_elevation_profile_and_limits(),
+        }
+        for key, viewset in self.get_bundle_viewsets().items():
+            queryset = viewset.filter_queryset(api_filters.filter_near(viewset.get_queryset(), trek))
+            data[key] = viewset.get_serializer(queryset, many=True).data
+        return Response(data)
+
 
 class TourViewSet(TrekViewSet):
     serializer_class = api_serializers.TourSerializer
@@ -159,13 +225,14 @@ class DifficultyViewSet(api_viewsets.GeotrekViewSet):
         return Response(serializer.data)
 
 
-class POIViewSet(api_viewsets.GeotrekGeometricViewset):
+class POIViewSet(api_viewsets.VectorTileMixin, api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (
         api_filters.GeotrekPOIFilter,
         api_filters.NearbyContentFilter,
         api_filters.UpdateOrCreateDateFilter
     )
     serializer_class = api_serializers.POISerializer
+    tile_properties = {'name': 'name', 'type': 'type'}
     queryset = trekking_models.POI.objects.existing() \
         .select_related('topo_object', 'type', ) \
         .prefetch_related('topo_object__aggregations',
@@ -219,7 +286,7 @@ class ServiceTypeViewSet(api_viewsets.GeotrekViewSet):
         return Response(serializer.data)
 
 
-class ServiceViewSet(api_viewsets.GeotrekGeometricViewset):
+class ServiceViewSet(api_viewsets.ChangesFeedMixin, api_viewsets.GeotrekGeometricViewset):
     filter_backends = api_viewsets.GeotrekGeometricViewset.filter_backends + (api_filters.NearbyContentFilter, api_filters.UpdateOrCreateDateFilter, api_filters.GeotrekServiceFilter)
     serializer_class = api_serializers.ServiceSerializer
     queryset = trekking_models.Service.objects.all() \
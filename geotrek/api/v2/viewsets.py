@@ -1,19 +1,38 @@
+import math
+from datetime import date
 from hashlib import md5
 
 from django.conf import settings
+from django.contrib.gis.db.models.functions import Transform
+from django.contrib.gis.geos import Polygon
+from django.db import connections
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext as _
 from django_filters.rest_framework.backends import DjangoFilterBackend
 from mapentity.renderers import GeoJSONRenderer
 from rest_framework import viewsets, renderers
 from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.response import Response
 
 from geotrek.api.v2 import pagination as api_pagination, filters as api_filters
-from geotrek.api.v2.cache import RetrieveCacheResponseMixin
+from geotrek.api.v2.cache import ListCacheResponseMixin, RetrieveCacheResponseMixin
+from geotrek.api.v2.decorators import cache_response_list, conditional_response
+from geotrek.api.v2.renderers import FlatGeobufRenderer, GeobufRenderer, PostGISFeaturesRenderer, render_stream
 from geotrek.api.v2.serializers import override_serializer
+from geotrek.api.v2.utils import iterate_in_chunks, localized_lookup
+from geotrek.common.functions import AsMVTGeom
+from geotrek.common.models import Change
+from geotrek.common.utils.cache import (count_hit, get_model_versions, get_models, get_models_modified,
+                                        get_models_modified_today, get_object_version, model_dependencies,
+                                        register_object_version)
 
 
-class GeotrekViewSet(RetrieveCacheResponseMixin, viewsets.ReadOnlyModelViewSet):
+class GeotrekViewSet(RetrieveCacheResponseMixin, ListCacheResponseMixin, viewsets.ReadOnlyModelViewSet):
     filter_backends = (
         DjangoFilterBackend,
         api_filters.GeotrekQueryParamsFilter,
@@ -24,6 +43,9 @@ class GeotrekViewSet(RetrieveCacheResponseMixin, viewsets.ReadOnlyModelViewSet):
     authentication_classes = [BasicAuthentication, SessionAuthentication]
     renderer_classes = [renderers.JSONRenderer, renderers.BrowsableAPIRenderer, ] if settings.DEBUG else [renderers.JSONRenderer, ]
     lookup_value_regex = r'\d+'
+    # Other models (as 'app_label.ModelName') whose changes invalidate list cache
+    list_cache_models = ()
+    streaming_chunk_size = 100
 
     def get_ordered_query_params(self):
         """ Get multi value query params sorted by key """
@@ -37,16 +59,87 @@ class GeotrekViewSet(RetrieveCacheResponseMixin, viewsets.ReadOnlyModelViewSet):
         return f"{self.request.path}:{self.get_ordered_query_params()}:{self.request.accepted_renderer.format}:{proto_scheme}"
 
     def get_object_cache_key(self, pk):
-        """ return specific object cache key based on object date_update column"""
-        # don't directly use get_object or get_queryset to avoid select / prefetch and annotation sql queries
-        # insure object exists and doesn't raise exception
-        instance = get_object_or_404(self.get_queryset().model, pk=pk)
-        date_update = instance.date_update
-        return f"{self.get_base_cache_string()}:{date_update.isoformat()}"
+        """ return specific object cache key based on object date_update column and versions of related models """
+        model = self.get_queryset().model
+        version = get_object_version(model, pk)
+        if version is None:
+            # don't directly use get_object or get_queryset to avoid select / prefetch and annotation sql queries
+            # insure object exists and doesn't raise exception
+            instance = get_object_or_404(model, pk=pk)
+            version = register_object_version(instance)
+            count_hit('api_v2_object_key_db')
+        else:
+            count_hit('api_v2_object_key_db_free')
+        # Object own changes are tracked by its version, not by its model version
+        versions = get_model_versions(set(model_dependencies(model)) - {model})
+        return f"{self.get_base_cache_string()}:{version}:{versions}"
 
     def object_cache_key_func(self, **kwargs):
-        """ cache key md5 for retrieve viewset action """
-        return md5(self.get_object_cache_key(kwargs.get('kwargs').get('pk')).encode("utf-8")).hexdigest()
+        """ cache key md5 for retrieve viewset action, also used as ETag """
+        if not hasattr(self, '_object_cache_key'):
+            self._object_cache_key = md5(self.get_object_cache_key(kwargs.get('kwargs').get('pk')).encode("utf-8")).hexdigest()
+        return self._object_cache_key
+
+    def object_last_modified_func(self, **kwargs):
+        """ last change of object model or of its related models """
+        return get_models_modified(model_dependencies(self.get_queryset().model))
+
+    def get_list_cache_models(self):
+        """
+        return models whose changes invalidate list cache: queryset model, its related models, list_cache_models
+        and models of targets of active filters (e.g. near_trek)
+        """
+        labels = set(self.list_cache_models)
+        for backend in self.filter_backends:
+            if hasattr(backend, 'get_cache_models'):
+                labels |= backend().get_cache_models(self.request)
+        return set(model_dependencies(self.get_queryset().model)) | set(get_models(labels))
+
+    def get_list_cache_key(self):
+        """ return list cache key based on versions of models, bumped on each save / delete """
+        versions = get_model_versions(self.get_list_cache_models())
+        # Some filters depend on current date
+        return f"{self.get_base_cache_string()}:{date.today().isoformat()}:{versions}"
+
+    def list_cache_key_func(self, **kwargs):
+        """ cache key md5 for list viewset action, also used as ETag """
+        if not hasattr(self, '_list_cache_key'):
+            self._list_cache_key = md5(self.get_list_cache_key().encode("utf-8")).hexdigest()
+        return self._list_cache_key
+
+    def list_last_modified_func(self, **kwargs):
+        """ last change of models whose changes invalidate list cache, or start of day (some filters depend on it) """
+        return get_models_modified_today(self.get_list_cache_models())
+
+    def is_streamed(self):
+        """ Stream big JSON / GeoJSON pages """
+        return self.paginator is not None \
+            and isinstance(self.request.accepted_renderer, renderers.JSONRenderer) \
+            and self.paginator.get_page_size(self.request) >= settings.API_STREAMING_PAGE_SIZE
+
+    def list(self, request, *args, **kwargs):
+        if self.is_streamed():
+            return self.streaming_list(request)
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response('list_cache_key_func', 'list_last_modified_func')
+    def streaming_list(self, request):
+        """ Serialize and render page objects chunk by chunk, in a streaming response """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginator.paginate_queryset_lazily(queryset, request, view=self)
+        geojson = self.paginator.is_geojson()
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+
+        def items():
+            for chunk in iterate_in_chunks(page, self.streaming_chunk_size):
+                data = serializer_class(chunk, many=True, context=context).data
+                yield from data['features'] if geojson else data
+
+        envelope = self.paginator.get_paginated_data({'features': []} if geojson else [])
+        renderer = request.accepted_renderer
+        stream = render_stream(renderer, envelope, items(), request.accepted_media_type, self.get_renderer_context())
+        return StreamingHttpResponse(stream, content_type=renderer.media_type)
 
     def get_serializer_context(self):
         return {
@@ -55,6 +148,108 @@ class GeotrekViewSet(RetrieveCacheResponseMixin, viewsets.ReadOnlyModelViewSet):
         }
 
 
+class VectorTileMixin:
+    """
+    Serve filtered objects as Mapbox vector tiles (tile action), encoded by PostGIS.
+    Tiles are cached like lists, by path, query parameters and versions of models.
+    """
+    # {tile feature property: model field lookup}, translated fields are read in requested language
+    tile_properties = {'name': 'name'}
+    tile_geom_field = 'geom'
+    tile_extent = 4096
+    tile_max_zoom = 30
+    # Side of web mercator world, in meters
+    world_size = 2 * math.pi * 6378137
+
+    def get_tile_envelope(self, z, x, y):
+        """ Return bounds of tile z/x/y, in web mercator """
+        if z > self.tile_max_zoom or x >= 2 ** z or y >= 2 ** z:
+            raise NotFound()
+        size = self.world_size / 2 ** z
+        xmin = x * size - self.world_size / 2
+        ymax = self.world_size / 2 - y * size
+        envelope = Polygon.from_bbox((xmin, ymax - size, xmin + size, ymax))
+        envelope.srid = 3857
+        return envelope
+
+    def get_tile_queryset(self, envelope):
+        """ Return values of filtered objects within envelope, with geometries in tile coordinates """
+        queryset = self.filter_queryset(self.get_queryset())
+        language = self.request.GET.get('language')
+        if language not in settings.MODELTRANSLATION_LANGUAGES:
+            language = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+        properties = {
+            f'tile_{name}': F(localized_lookup(queryset.model, lookup, language))
+            for name, lookup in self.tile_properties.items()
+        }
+        return queryset.filter(**{f'{self.tile_geom_field}__intersects': envelope}) \
+            .annotate(tile_id=F('pk'),
+                      tile_geom=AsMVTGeom(Transform(self.tile_geom_field, 3857), envelope, self.tile_extent),
+                      **properties) \
+            .order_by() \
+            .values('tile_id', 'tile_geom', *properties)
+
+    def get_tile(self, envelope):
+        """ Return tile of filtered objects within envelope, encoded by ST_AsMVT """
+        queryset = self.get_tile_queryset(envelope)
+        connection = connections[queryset.db]
+        qn = connection.ops.quote_name
+        columns = ', '.join(f'{qn("tile_" + name)} AS {qn(name)}' for name in ('id', 'geom', *self.tile_properties))
+        # Feature id argument requires PostGIS 3.0, id is a feature property otherwise
+        feature_id = ", 'id'" if connection.ops.spatial_version >= (3, 0) else ""
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT ST_AsMVT(tile, %s, %s, 'geom'{feature_id}) "
+                f"FROM (SELECT {columns} FROM ({sql}) AS features WHERE tile_geom IS NOT NULL) AS tile",
+                (self.basename, self.tile_extent, *params)
+            )
+            tile = cursor.fetchone()[0]
+        return bytes(tile) if tile else b''
+
+    @cache_response_list()
+    def tile(self, request, z, x, y, *args, **kwargs):
+        return Response(self.get_tile(self.get_tile_envelope(int(z), int(x), int(y))))
+
+
+class ChangesFeedMixin:
+    """
+    Serve ids of objects created, updated, deleted or no longer served (e.g. unpublished) since a cursor
+    (changes action), so that clients can synchronize incrementally. Without cursor, only return current one:
+    clients get it before a full download, then give the cursor of previous response to each request.
+    Changes of the viewset model have to be logged by triggers (see Change model).
+    """
+
+    @action(detail=False, url_name='changes')
+    def changes(self, request, *args, **kwargs):
+        cursor = Change.cursor()
+        since = request.GET.get('since')
+        if since is None:
+            return Response({'cursor': cursor})
+        try:
+            since = int(since)
+        except ValueError:
+            raise ValidationError({'since': _("Expected a cursor given by a previous changes response")})
+        queryset = self.get_queryset()
+        model = queryset.model
+        actions = Change.actions(model, since, cursor)
+        deleted = {pk for pk, (first_action, last_action) in actions.items() if last_action == Change.DELETED}
+        changed = actions.keys() - deleted
+        served = set(self.filter_queryset(queryset).filter(pk__in=changed).order_by().values_list('pk', flat=True))
+        hidden = model._base_manager.filter(pk__in=changed - served)
+        if any(field.name == 'deleted' for field in model._meta.fields):
+            hidden = hidden.filter(deleted=False)
+        unpublished = set(hidden.values_list('pk', flat=True))
+        created = {pk for pk in served if actions[pk][0] == Change.CREATED}
+        return Response({
+            'cursor': cursor,
+            'created': sorted(created),
+            'updated': sorted(served - created),
+            'deleted': sorted(deleted | (changed - served - unpublished)),
+            'unpublished': sorted(unpublished),
+        })
+
+
 class GeotrekGeometricViewset(GeotrekViewSet):
     filter_backends = GeotrekViewSet.filter_backends + (
         api_filters.GeotrekQueryParamsDimensionFilter,
@@ -64,7 +259,13 @@ class GeotrekGeometricViewset(GeotrekViewSet):
     distance_filter_field = 'geom'
     bbox_filter_field = 'geom'
     bbox_filter_include_overlapping = True
-    renderer_classes = GeotrekViewSet.renderer_classes + [GeoJSONRenderer, ]
+    list_cache_models = ('zoning.City', 'zoning.District')
+    renderer_classes = GeotrekViewSet.renderer_classes + [GeoJSONRenderer, FlatGeobufRenderer, GeobufRenderer]
+
+    def get_renderers(self):
+        """ Binary formats encoded by PostGIS are only available if PostGIS version provides them """
+        return [renderer for renderer in super().get_renderers()
+                if not isinstance(renderer, PostGISFeaturesRenderer) or renderer.is_supported()]
 
     def get_serializer_class(self):
         base_serializer_class = super().get_serializer_class()
@@ -0,0 +1,142 @@
+"""
+Render APIv2 responses in cache after changes (API_CACHE_WARMING_URL setting), in background (celery),
+so that first visitors after an import or a batch of edits do not pay their serialization.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.test.client import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from geotrek.common.models import TargetPortal
+from geotrek.common.utils.cache import VERSIONS_CACHE, get_model_versions
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_KEY = 'api_cache_warming:scheduled'
+# Model versions and date of last warming
+STATE_KEY = 'api_cache_warming:state'
+
+
+def schedule():
+    """ Warm cache in API_CACHE_WARMING_DELAY seconds, unless already scheduled """
+    from geotrek.common.tasks import warm_api_cache
+
+    if caches[VERSIONS_CACHE].add(SCHEDULED_KEY, True, settings.API_CACHE_WARMING_DELAY):
+        warm_api_cache.apply_async(countdown=settings.API_CACHE_WARMING_DELAY)
+
+
+def get_viewsets():
+    """ {basename: viewset class} of warmed viewsets """
+    from geotrek.api.v2.urls import router
+
+    return {basename: viewset_class for prefix, viewset_class, basename in router.registry
+            if basename in settings.API_CACHE_WARMING_VIEWSETS}
+
+
+def get_queries():
+    """ Query parameters of warmed requests: each language, without or with each portal, with each extra params """
+    portals = [None] + list(TargetPortal.objects.order_by('pk').values_list('pk', flat=True))
+    return [
+        {'language': language, **({'portals': portal} if portal else {}), **params}
+        for language in settings.MODELTRANSLATION_LANGUAGES
+        for portal in portals
+        for params in settings.API_CACHE_WARMING_PARAMS
+    ]
+
+
+def get_viewset(viewset_class, request, action):
+    """ Viewset instance handling request, as instantiated by its view """
+    viewset = viewset_class(action_map={'get': action}, format_kwarg=None, args=(), kwargs={})
+    viewset.request = viewset.initialize_request(request)
+    return viewset
+
+
+def labels(models):
+    return {model._meta.label_lower for model in models}
+
+
+class Warmer:
+    def __init__(self):
+        url = urlparse(settings.API_CACHE_WARMING_URL)
+        self.factory = RequestFactory(HTTP_HOST=url.netloc, HTTP_X_FORWARDED_PROTO=url.scheme)
+        self.secure = url.scheme == 'https'
+        state = caches[VERSIONS_CACHE].get(STATE_KEY) or {}
+        self.previous_versions = state.get('versions', {})
+        self.previous_date = state.get('date')
+        self.versions = {}
+
+    def get_request(self, path, query):
+        return self.factory.get(path, query, secure=self.secure)
+
+    def get_changed(self, models):
+        """ Labels of models changed since last warming """
+        versions = get_model_versions(models)
+        self.versions.update(versions)
+        return {label for label, version in versions.items() if self.previous_versions.get(label) != version}
+
+    def get_jobs(self, basename, viewset_class, queries):
+        """ (viewset class, action, path, query, pk) of responses to warm, affected by changes since last warming """
+        list_path = reverse(f'apiv2:{basename}-list')
+        viewset = get_viewset(viewset_class, self.get_request(list_path, queries[0]), 'list')
+        model = viewset.get_queryset().model
+        list_models = viewset.get_list_cache_models()
+        changed = self.get_changed(list_models | {model})
+        jobs = []
+        if changed & labels(list_models):
+            jobs += [(viewset_class, 'list', list_path, query, None) for query in queries]
+        if self.previous_date is None or model._meta.label_lower not in changed:
+            # First warming renders lists only, rendering every detail in each language and portal would take hours.
+            # For the same reason, changes of related models only (e.g. a renamed theme) do not render details:
+            # details are rendered once their object changes.
+            return jobs
+        updated = {'date_update__gte': self.previous_date} if hasattr(model, 'date_update') else {}
+        for query in queries:
+            viewset = get_viewset(viewset_class, self.get_request(list_path, query), 'list')
+            pks = viewset.filter_queryset(viewset.get_queryset()).filter(**updated).order_by().values_list('pk', flat=True)
+            jobs += [(viewset_class, 'retrieve', reverse(f'apiv2:{basename}-detail', args=[pk]), query, pk)
+                     for pk in pks]
+        return jobs
+
+    def render(self, viewset_class, action, path, query, pk):
+        try:
+            response = viewset_class.as_view({'get': action})(self.get_request(path, query),
+                                                              **({'pk': pk} if pk else {}))
+            response.close()
+        except Exception:
+            logger.exception("Warming %s %s failed", path, query)
+
+    def render_in_thread(self, jobs):
+        try:
+            for job in jobs:
+                self.render(*job)
+        finally:
+            connections.close_all()
+
+    def warm(self):
+        date = timezone.now()
+        queries = get_queries()
+        jobs = []
+        for basename, viewset_class in get_viewsets().items():
+            jobs += self.get_jobs(basename, viewset_class, queries)
+        concurrency = settings.API_CACHE_WARMING_CONCURRENCY
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(self.render_in_thread, [jobs[i::concurrency] for i in range(concurrency)]))
+        else:
+            for job in jobs:
+                self.render(*job)
+        # Versions were read before rendering: changes in the meantime will be warmed next time
+        caches[VERSIONS_CACHE].set(STATE_KEY, {'versions': self.versions, 'date': date}, None)
+        logger.info("%s APIv2 responses warmed", len(jobs))
+        return len(jobs)
+
+
+def warm():
+    """ Render list and detail responses of warmed viewsets affected by changes since last warming """
+    return Warmer().warm()
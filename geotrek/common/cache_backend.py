@@ -0,0 +1,229 @@
+"""
+Cache backend of big values (api_v2 and fat caches): values are stored in files spread over 256 directories,
+and indexed in a SQLite database with their size and last access, so that least recently used entries are evicted
+when their total size exceeds MAX_SIZE, without listing files.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS entry (hash TEXT PRIMARY KEY, size INTEGER NOT NULL, expires REAL, "
+    "accessed REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS entry_accessed_idx ON entry (accessed)",
+    "CREATE TABLE IF NOT EXISTS stat (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+# Counters of each process, added to stat table on writes
+COUNTERS = ('hits', 'misses', 'evictions')
+# Evict down to this ratio of MAX_SIZE, in order not to evict on each write once full
+FILL_RATIO = 0.9
+
+
+class ShardedFileCache(BaseCache):
+    """
+    Size-bounded file cache with LRU eviction. MAX_ENTRIES and CULL_FREQUENCY options are ignored, other options:
+    - MAX_SIZE: maximum total size of values in bytes (default 1 GiB)
+    - ACCESS_RESOLUTION: last access of entries and counters are written at most once per this number of seconds
+      and process (default 60)
+    The cache directory must be local: SQLite locking is not reliable on network filesystems.
+    """
+    cache_suffix = '.djcache'
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    index_name = 'index.sqlite3'
+
+    def __init__(self, dir, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._dir = os.path.abspath(dir)
+        self._index_path = os.path.join(self._dir, self.index_name)
+        self._max_size = options.get('MAX_SIZE', 1024 ** 3)
+        self._access_resolution = options.get('ACCESS_RESOLUTION', 60)
+        self._connection = None
+        self._pid = None
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._flushed = time.time()
+
+    @property
+    def _db(self):
+        # Reconnect in forked processes and when the cache directory has been deleted
+        if self._connection is None or self._pid != os.getpid() or not os.path.exists(self._index_path):
+            self._createdir(self._dir)
+            self._connection = sqlite3.connect(self._index_path, timeout=30, isolation_level=None,
+                                               check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+            self._pid = os.getpid()
+        return self._connection
+
+    @contextmanager
+    def _write(self):
+        """ Transaction locking the index (and files) against other writers, flushing counters """
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            self._incr_stats(db, **self._counters)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._flushed = time.time()
+
+    def _incr_stats(self, db, **values):
+        db.executemany(
+            "INSERT INTO stat (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            [(name, value) for name, value in values.items() if value]
+        )
+
+    def _createdir(self, path):
+        # Set the umask because os.makedirs() doesn't apply the "mode" argument
+        # to intermediate-level directories.
+        old_umask = os.umask(0o077)
+        try:
+            os.makedirs(path, 0o700, exist_ok=True)
+        finally:
+            os.umask(old_umask)
+
+    def _key_to_hash(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def _hash_to_file(self, key_hash):
+        return os.path.join(self._dir, key_hash[:2], key_hash + self.cache_suffix)
+
+    def _is_expired(self, expires, now):
+        return expires is not None and expires < now
+
+    def get(self, key, default=None, version=None):
+        key_hash = self._key_to_hash(key, version)
+        now = time.time()
+        row = self._db.execute("SELECT expires, accessed FROM entry WHERE hash = ?", (key_hash, )).fetchone()
+        value, hit = default, False
+        if row is not None and not self._is_expired(row[0], now):
+            try:
+                with open(self._hash_to_file(key_hash), 'rb') as f:
+                    value, hit = pickle.loads(zlib.decompress(f.read())), True
+            except FileNotFoundError:
+                pass  # Evicted in the meantime
+        self._counters['hits' if hit else 'misses'] += 1
+        accessed = hit and row[1] < now - self._access_resolution
+        if accessed or self._flushed < now - self._access_resolution:
+            with self._write() as db:
+                if accessed:
+                    db.execute("UPDATE entry SET accessed = ? WHERE hash = ?", (now, key_hash))
+        return value
+
+    def _store(self, key, value, timeout, version, replace):
+        """ Write value, return False if not replace and key exists """
+        key_hash = self._key_to_hash(key, version)
+        fname = self._hash_to_file(key_hash)
+        self._createdir(os.path.dirname(fname))  # Cache dir can be deleted at any time.
+        data = zlib.compress(pickle.dumps(value, self.pickle_protocol))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(fname), suffix='.tmp')
+        try:
+            with open(fd, 'wb') as f:
+                f.write(data)
+            with self._write() as db:
+                now = time.time()
+                row = db.execute("SELECT size, expires FROM entry WHERE hash = ?", (key_hash, )).fetchone()
+                if row is not None and not replace and not self._is_expired(row[1], now):
+                    return False
+                os.replace(tmp_path, fname)
+                db.execute("INSERT OR REPLACE INTO entry (hash, size, expires, accessed) VALUES (?, ?, ?, ?)",
+                           (key_hash, len(data), self.get_backend_timeout(timeout), now))
+                self._incr_stats(db, size=len(data) - (row[0] if row else 0), entries=0 if row else 1)
+                self._evict(db)
+            return True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(key, value, timeout, version, replace=True)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._store(key, value, timeout, version, replace=False)
+
+    def _evict(self, db):
+        """ Remove least recently used entries if total size exceeds MAX_SIZE """
+        row = db.execute("SELECT value FROM stat WHERE name = 'size'").fetchone()
+        size = row[0] if row else 0
+        if size <= self._max_size:
+            return
+        to_free = size - self._max_size * FILL_RATIO
+        evicted = []
+        cursor = db.execute("SELECT hash, size FROM entry ORDER BY accessed")
+        for key_hash, entry_size in cursor:
+            if to_free <= 0:
+                break
+            evicted.append((key_hash, entry_size))
+            to_free -= entry_size
+        cursor.close()
+        self._remove(db, evicted)
+        self._incr_stats(db, evictions=len(evicted))
+
+    def _remove(self, db, entries):
+        """ Remove (hash, size) entries from index and files """
+        db.executemany("DELETE FROM entry WHERE hash = ?", [(key_hash, ) for key_hash, _size in entries])
+        for key_hash, _size in entries:
+            try:
+                os.remove(self._hash_to_file(key_hash))
+            except FileNotFoundError:
+                pass
+        self._incr_stats(db, size=-sum(size for _key_hash, size in entries), entries=-len(entries))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key_hash = self._key_to_hash(key, version)
+        with self._write() as db:
+            cursor = db.execute("UPDATE entry SET expires = ? WHERE hash = ? AND (expires IS NULL OR expires >= ?)",
+                                (self.get_backend_timeout(timeout), key_hash, time.time()))
+            return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key_hash = self._key_to_hash(key, version)
+        with self._write() as db:
+            row = db.execute("SELECT size FROM entry WHERE hash = ?", (key_hash, )).fetchone()
+            if row is None:
+                return False
+            self._remove(db, [(key_hash, row[0])])
+            return True
+
+    def has_key(self, key, version=None):
+        key_hash = self._key_to_hash(key, version)
+        row = self._db.execute("SELECT expires FROM entry WHERE hash = ?", (key_hash, )).fetchone()
+        return row is not None and not self._is_expired(row[0], time.time())
+
+    def clear(self):
+        """ Remove all entries, and files left by interrupted writes or by Django FileBasedCache """
+        with self._write() as db:
+            db.execute("DELETE FROM entry")
+            db.execute("DELETE FROM stat WHERE name IN ('size', 'entries')")
+            for entry in os.scandir(self._dir):
+                if entry.is_dir() and len(entry.name) == 2:
+                    for fname in os.scandir(entry.path):
+                        os.remove(fname.path)
+                elif entry.name.endswith(self.cache_suffix):
+                    os.remove(entry.path)
+
+    def stats(self):
+        """ Number of entries, total size of values, and counters of hits, misses and evictions since creation """
+        with self._write() as db:
+            values = dict(db.execute("SELECT name, value FROM stat"))
+        return {
+            'entries': values.get('entries', 0),
+            'size': values.get('size', 0),
+            'max_size': self._max_size,
+            **{name: values.get(name, 0) for name in COUNTERS},
+        }
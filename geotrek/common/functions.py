@@ -1,5 +1,6 @@
 from django.contrib.gis.db.models import PointField
-from django.db.models import CharField, FloatField
+from django.contrib.postgres.search import SearchQueryField, SearchVectorField
+from django.db.models import BooleanField, CharField, FloatField, Func
 from django.contrib.gis.db.models.functions import GeoFunc, GeomOutputGeoFunc
 
 
@@ -12,6 +13,11 @@ class SimplifyPreserveTopology(GeomOutputGeoFunc):
     """ ST_SimplifyPreserveTopology postgis function """
 
 
+class AsMVTGeom(GeomOutputGeoFunc):
+    """ ST_AsMVTGeom postgis function: geometry in tile coordinate space, clipped to tile bounds """
+    geom_param_pos = (0, 1)
+
+
 class GeometryType(GeoFunc):
     """ GeometryType postgis function """
     output_field = CharField()
@@ -42,3 +48,38 @@ class Buffer(GeomOutputGeoFunc):
 class Area(GeoFunc):
     """ ST_Area postgis function """
     output_field = FloatField()
+
+
+class SearchVector(Func):
+    """ search_vector SQL function: unaccented tsvector of texts (see common/sql/post_10_utilities.sql) """
+    function = 'search_vector'
+    output_field = SearchVectorField()
+
+
+class SearchQuery(Func):
+    """ search_query SQL function: unaccented tsquery matching all words of text as prefixes """
+    function = 'search_query'
+    output_field = SearchQueryField()
+
+
+class SearchRank(Func):
+    """ ts_rank postgresql function """
+    function = 'ts_rank'
+    output_field = FloatField()
+
+
+class SearchMatch(Func):
+    """ tsvector @@ tsquery """
+    arity = 2
+    template = '%(expressions)s'
+    arg_joiner = ' @@ '
+    output_field = BooleanField()
+
+
+class SearchContains(Func):
+    """ Case and accent insensitive match of a LIKE pattern, using trigram indexes of search_unaccent(field) """
+    arity = 2
+    function = 'search_unaccent'
+    template = '%(function)s(%(expressions)s)'
+    arg_joiner = ') ILIKE search_unaccent('
+    output_field = BooleanField()
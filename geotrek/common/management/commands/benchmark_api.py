@@ -0,0 +1,181 @@
+import json
+import math
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+import geotrek
+from geotrek.tourism.models import TouristicContent
+from geotrek.trekking.models import POI, Trek
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, percent):
+    """ Nearest-rank percentile of sorted values """
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def summarize(durations, errors, elapsed):
+    """ Throughput (requests per second) and latencies (milliseconds) of an endpoint """
+    durations = sorted(duration * 1000 for duration in durations)
+    latency = {'min': durations[0], 'mean': statistics.mean(durations)}
+    latency.update({f'p{percent}': percentile(durations, percent) for percent in PERCENTILES})
+    latency['max'] = durations[-1]
+    return {
+        'requests': len(durations),
+        'errors': errors,
+        'throughput': len(durations) / elapsed,
+        'latency': {key: round(value, 2) for key, value in latency.items()},
+    }
+
+
+def get_endpoints(language):
+    """ Benchmarked endpoints as {name: (path, query parameters, headers)}, using objects of the database """
+    trek = Trek.objects.existing().filter(published=True).order_by('pk').first()
+    if trek is None:
+        raise CommandError("No published trek found, see generate_benchmark_dataset command")
+    content = TouristicContent.objects.existing().order_by('pk').first()
+    params = {'language': language}
+    endpoints = {
+        'apiv2:trek-list': (reverse('apiv2:trek-list'), params, {}),
+        'apiv2:trek-list (page of 500)': (reverse('apiv2:trek-list'), {**params, 'page_size': 500}, {}),
+        # Serialization of translated fields, in all languages
+        'apiv2:trek-list (page of 1000, all languages)': (reverse('apiv2:trek-list'), {'page_size': 1000}, {}),
+        'apiv2:trek-detail': (reverse('apiv2:trek-detail', args=[trek.pk]), params, {}),
+        'apiv2:poi-list (near trek)': (reverse('apiv2:poi-list'), {**params, 'near_trek': trek.pk}, {}),
+        'apiv2:touristiccontent-list': (reverse('apiv2:touristiccontent-list'), params, {}),
+        'apiv2:touristiccontent-list (near trek)': (reverse('apiv2:touristiccontent-list'),
+                                                    {**params, 'near_trek': trek.pk}, {}),
+        'apiv2:touristicevent-list': (reverse('apiv2:touristicevent-list'), params, {}),
+    }
+    if content is not None:
+        endpoints['apiv2:touristiccontent-detail'] = (reverse('apiv2:touristiccontent-detail', args=[content.pk]),
+                                                      params, {})
+    if 'geotrek.sensitivity' in settings.INSTALLED_APPS:
+        endpoints['apiv2:sensitivearea-list (near trek)'] = (reverse('apiv2:sensitivearea-list'),
+                                                             {**params, 'near_trek': trek.pk}, {})
+    if 'geotrek.zoning' in settings.INSTALLED_APPS:
+        endpoints['apiv2:city-list'] = (reverse('apiv2:city-list'), params, {})
+    headers = {'Accept-Language': language}
+    endpoints.update({
+        'apimobile:treks-list': (reverse('apimobile:treks-list'), {}, headers),
+        'apimobile:treks-detail': (reverse('apimobile:treks-detail', args=[trek.pk]), {}, headers),
+        'apimobile:treks-pois': (reverse('apimobile:treks-pois', args=[trek.pk]), {}, headers),
+        'mapentity:trek-layer': (Trek.get_layer_url(), {}, {}),
+        'mapentity:trek-datatables': (Trek.get_datatablelist_url(), {}, {}),
+        'mapentity:trek-detail': (trek.get_detail_url(), {}, {}),
+        'mapentity:poi-layer': (POI.get_layer_url(), {}, {}),
+    })
+    return endpoints
+
+
+class Command(BaseCommand):
+    help = "Measure throughput and latency percentiles of API v2, mobile API and MapEntity endpoints of a running " \
+           "Geotrek using this database, and store results as JSON to compare versions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="Base URL of Geotrek, e.g. http://localhost:8000")
+        parser.add_argument('--requests', '-n', type=int, default=100, help="Requests per endpoint (default: 100)")
+        parser.add_argument('--concurrency', '-c', type=int, default=4,
+                            help="Simultaneous requests (default: 4)")
+        parser.add_argument('--warmup', type=int, default=1,
+                            help="Requests per endpoint before measuring, e.g. to fill caches (default: 1)")
+        parser.add_argument('--endpoint', '-e', action='append', dest='endpoints', default=[],
+                            help="Only benchmark endpoints whose name contains this, can be repeated")
+        parser.add_argument('--language', '-l', default=settings.MODELTRANSLATION_DEFAULT_LANGUAGE)
+        parser.add_argument('--username', help="User to log in, MapEntity endpoints are skipped without it")
+        parser.add_argument('--password')
+        parser.add_argument('--output', '-o', help="JSON file to store results")
+        parser.add_argument('--compare', help="JSON file of previous results to compare with")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("At least one request per endpoint is needed")
+        self.base_url = options['url'].rstrip('/')
+        self.cookies = {}
+        if options['username']:
+            self.login(options['username'], options['password'])
+        endpoints = get_endpoints(options['language'])
+        if not options['username']:
+            endpoints = {name: endpoint for name, endpoint in endpoints.items() if not name.startswith('mapentity:')}
+        if options['endpoints']:
+            endpoints = {name: endpoint for name, endpoint in endpoints.items()
+                         if any(pattern in name for pattern in options['endpoints'])}
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)
+
+        results = {
+            'version': geotrek.__version__,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'url': self.base_url,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'endpoints': {},
+        }
+        for name, (path, params, headers) in endpoints.items():
+            result = self.benchmark(path, params, headers, options['requests'], options['concurrency'],
+                                    options['warmup'])
+            results['endpoints'][name] = {'path': path, 'params': params, **result}
+            self.report(name, result, previous and previous['endpoints'].get(name))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results stored in {options['output']}")
+
+    def login(self, username, password):
+        """ Log in MapEntity, keep session cookies """
+        session = requests.Session()
+        login_url = self.base_url + reverse('login')
+        session.get(login_url)
+        response = session.post(login_url, data={
+            'username': username, 'password': password,
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken'),
+        }, headers={'Referer': login_url}, allow_redirects=False)
+        if response.status_code != 302:
+            raise CommandError(f"Login of {username} failed")
+        self.cookies = session.cookies.get_dict()
+
+    def benchmark(self, path, params, headers, count, concurrency, warmup):
+        local = threading.local()
+        url = self.base_url + path
+
+        def fetch(_):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+                local.session.cookies.update(self.cookies)
+            start = time.perf_counter()
+            response = local.session.get(url, params=params, headers=headers)
+            response.content  # Wait for the whole body
+            return time.perf_counter() - start, response.ok
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(fetch, range(warmup)))
+            start = time.perf_counter()
+            measures = list(executor.map(fetch, range(count)))
+            elapsed = time.perf_counter() - start
+        return summarize([duration for duration, ok in measures], sum(not ok for duration, ok in measures), elapsed)
+
+    def report(self, name, result, previous=None):
+        latency = result['latency']
+        line = f"{name:<42} {result['throughput']:8.1f} req/s" + ''.join(
+            f" {key} {latency[key]:8.1f} ms" for key in ('p50', 'p95', 'p99'))
+        if result['errors']:
+            line += self.style.ERROR(f" {result['errors']} errors")
+        self.stdout.write(line)
+        if previous:
+            changes = [('req/s', result['throughput'], previous['throughput'])]
+            changes += [(key, latency[key], previous['latency'][key]) for key in ('p50', 'p95', 'p99')]
+            self.stdout.write(' ' * 42 + ''.join(
+                f" {key} {(new - old) / old * 100:+8.1f} %" if old else f" {key} {'':>8}  "
+                for key, new, old in changes))
@@ -0,0 +1,265 @@
+import io
+import math
+import random
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import LineString, MultiPolygon, Point, Polygon
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from modeltranslation.translator import translator
+from modeltranslation.utils import build_localized_fieldname
+from PIL import Image
+
+from geotrek.authent.models import default_structure
+from geotrek.common.models import Attachment, FileType, Theme
+from geotrek.common.utils.cache import bump_model_versions
+from geotrek.core.models import Path
+from geotrek.tourism.models import TouristicContent, TouristicContentCategory, TouristicEvent
+from geotrek.trekking.models import POI, DifficultyLevel, POIType, Practice, Trek
+from geotrek.zoning.models import City, District
+
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut "
+         "aliquip ex ea commodo consequat. Duis aute irure dolor in reprehenderit in voluptate velit esse cillum "
+         "dolore eu fugiat nulla pariatur.")
+
+# Objects per unit of scale
+TREKS = 100
+POIS = 500
+TOURISTIC_CONTENTS = 200
+TOURISTIC_EVENTS = 50
+SENSITIVE_AREAS = 20
+GRID_CELLS = 15  # Paths network is a grid of GRID_CELLS x GRID_CELLS cells at scale 1
+CELL_SIZE = 1000  # meters
+
+
+def translated(model, **values):
+    """ Fields values, given in all languages for translated fields of model """
+    options = translator.get_options_for_model(model)
+    result = {}
+    for name, value in values.items():
+        if name in options.fields:
+            for language in settings.MODELTRANSLATION_LANGUAGES:
+                result[build_localized_fieldname(name, language)] = value
+        else:
+            result[name] = value
+    return result
+
+
+class Command(BaseCommand):
+    help = "Generate a realistic synthetic dataset to benchmark Geotrek (see benchmark_api command), in an empty database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1,
+                            help=f"Size of dataset, 1 means {TREKS} treks, {POIS} POIs, {TOURISTIC_CONTENTS} touristic "
+                                 f"contents on a network of {2 * GRID_CELLS * (GRID_CELLS + 1)} paths, "
+                                 f"may be fractional, e.g. 0.1 (default: 1)")
+        parser.add_argument('--pictures', type=int, default=2,
+                            help="Pictures attached to each trek, POI and touristic content (default: 2)")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Random seed, same seed and scale give the same dataset (default: 0)")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.scale = options['scale']
+        self.rng = random.Random(options['seed'])
+        self.structure = default_structure()
+        side = max(1, round(GRID_CELLS * math.sqrt(self.scale)))
+        xmin, ymin, xmax, ymax = settings.SPATIAL_EXTENT
+        origin = ((xmin + xmax - side * CELL_SIZE) / 2, (ymin + ymax - side * CELL_SIZE) / 2)
+        # Jittered grid, nodes move less than a quarter of cell so that paths never cross
+        self.nodes = {
+            (i, j): (origin[0] + (i + self.rng.uniform(-.25, .25)) * CELL_SIZE,
+                     origin[1] + (j + self.rng.uniform(-.25, .25)) * CELL_SIZE)
+            for i in range(side + 1) for j in range(side + 1)
+        }
+        self.bbox = (origin[0], origin[1], origin[0] + side * CELL_SIZE, origin[1] + side * CELL_SIZE)
+
+        with transaction.atomic():
+            self.create_zoning(side)
+            self.create_paths()
+            self.create_treks()
+            self.create_pois()
+            self.create_tourism()
+            if 'geotrek.sensitivity' in settings.INSTALLED_APPS:
+                self.create_sensitive_areas()
+            if options['pictures']:
+                self.create_attachments(options['pictures'])
+        if options['pictures']:
+            call_command('generate_thumbnails', verbosity=self.verbosity)
+
+    def count(self, per_unit):
+        """ Number of objects of a type, given per unit of scale """
+        return max(1, round(per_unit * self.scale))
+
+    def log(self, message):
+        if self.verbosity >= 1:
+            self.stdout.write(message)
+
+    def random_point(self):
+        """ Random point of the network (on a path) and the path with its position """
+        (a, b), path = self.rng.choice(list(self.paths.items()))
+        position = self.rng.random()
+        (xa, ya), (xb, yb) = self.nodes[a], self.nodes[b]
+        return Point(xa + position * (xb - xa), ya + position * (yb - ya), srid=settings.SRID), path, position
+
+    def grid_polygons(self, count):
+        """ Rectangles dividing the dataset area into count x count cells """
+        xmin, ymin, xmax, ymax = self.bbox
+        width, height = (xmax - xmin) / count, (ymax - ymin) / count
+        for i in range(count):
+            for j in range(count):
+                polygon = Polygon.from_bbox((xmin + i * width, ymin + j * height,
+                                             xmin + (i + 1) * width, ymin + (j + 1) * height))
+                yield MultiPolygon(polygon, srid=settings.SRID)
+
+    def create_zoning(self, side):
+        count = max(1, side // 4)
+        for n, geom in enumerate(self.grid_polygons(count)):
+            City.objects.create(code=f'{n:05d}', name=f"City {n}", geom=geom)
+        for n, geom in enumerate(self.grid_polygons(max(1, count // 2))):
+            District.objects.create(name=f"District {n}", geom=geom)
+        self.log(f"{count * count} cities and {max(1, count // 2) ** 2} districts created")
+
+    def create_paths(self):
+        """ Paths between neighbour nodes of the grid, keyed by their (start node, end node) """
+        self.paths = {}
+        for (i, j) in self.nodes:
+            for neighbour in ((i + 1, j), (i, j + 1)):
+                if neighbour in self.nodes:
+                    geom = LineString(self.nodes[(i, j)], self.nodes[neighbour], srid=settings.SRID)
+                    self.paths[((i, j), neighbour)] = Path.objects.create(geom=geom, structure=self.structure)
+        self.log(f"{len(self.paths)} paths created")
+
+    def random_walk(self, length):
+        """ Nodes of a random walk on the grid, never going back to a node """
+        walk = [self.rng.choice(list(self.nodes))]
+        while len(walk) <= length:
+            i, j = walk[-1]
+            neighbours = [node for node in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1))
+                          if node in self.nodes and node not in walk]
+            if not neighbours:
+                break
+            walk.append(self.rng.choice(neighbours))
+        return walk
+
+    def create_treks(self):
+        practices = [Practice.objects.create(**translated(Practice, name=f"Practice {n}")) for n in range(4)]
+        difficulties = [
+            DifficultyLevel.objects.get_or_create(id=n, defaults=translated(DifficultyLevel, difficulty=f"Level {n}"))[0]
+            for n in range(1, 5)
+        ]
+        self.themes = [Theme.objects.create(**translated(Theme, label=f"Theme {n}")) for n in range(6)]
+        for n in range(self.count(TREKS)):
+            walk = self.random_walk(self.rng.randint(3, 20))
+            trek = Trek.objects.create(
+                geom=None if settings.TREKKING_TOPOLOGY_ENABLED else LineString(
+                    [self.nodes[node] for node in walk], srid=settings.SRID),
+                practice=self.rng.choice(practices),
+                difficulty=self.rng.choice(difficulties),
+                duration=round(self.rng.uniform(1, 8), 1),
+                structure=self.structure,
+                **translated(Trek, name=f"Trek {n}", departure=f"Departure {n}", arrival=f"Arrival {n}",
+                             description_teaser=LOREM[:120], description=f"<p>{LOREM}</p>",
+                             ambiance=f"<p>{LOREM}</p>", access=f"<p>{LOREM}</p>", published=True),
+            )
+            trek.themes.set(self.rng.sample(self.themes, 2))
+            if settings.TREKKING_TOPOLOGY_ENABLED:
+                for order, (a, b) in enumerate(zip(walk, walk[1:])):
+                    if (a, b) in self.paths:
+                        trek.add_path(self.paths[(a, b)], start=0, end=1, order=order, reload=False)
+                    else:
+                        trek.add_path(self.paths[(b, a)], start=1, end=0, order=order, reload=False)
+        self.log(f"{self.count(TREKS)} treks created")
+
+    def create_pois(self):
+        types = [POIType.objects.create(**translated(POIType, label=f"POI type {n}")) for n in range(8)]
+        for n in range(self.count(POIS)):
+            point, path, position = self.random_point()
+            poi = POI.objects.create(
+                geom=None if settings.TREKKING_TOPOLOGY_ENABLED else point,
+                type=self.rng.choice(types),
+                structure=self.structure,
+                **translated(POI, name=f"POI {n}", description=f"<p>{LOREM}</p>", published=True),
+            )
+            if settings.TREKKING_TOPOLOGY_ENABLED:
+                poi.add_path(path, start=position, end=position, reload=False)
+        self.log(f"{self.count(POIS)} POIs created")
+
+    def create_tourism(self):
+        categories = [
+            TouristicContentCategory.objects.create(**translated(TouristicContentCategory, label=f"Category {n}"))
+            for n in range(5)
+        ]
+        for n in range(self.count(TOURISTIC_CONTENTS)):
+            content = TouristicContent.objects.create(
+                geom=self.random_point()[0],
+                category=self.rng.choice(categories),
+                structure=self.structure,
+                **translated(TouristicContent, name=f"Touristic content {n}", description_teaser=LOREM[:120],
+                             description=f"<p>{LOREM}</p>", published=True),
+            )
+            content.themes.set(self.rng.sample(self.themes, 2))
+        for n in range(self.count(TOURISTIC_EVENTS)):
+            begin_date = date.today() + timedelta(days=self.rng.randint(-30, 180))
+            TouristicEvent.objects.create(
+                geom=self.random_point()[0],
+                begin_date=begin_date,
+                end_date=begin_date + timedelta(days=self.rng.randint(0, 5)),
+                structure=self.structure,
+                **translated(TouristicEvent, name=f"Touristic event {n}", description_teaser=LOREM[:120],
+                             description=f"<p>{LOREM}</p>", published=True),
+            )
+        self.log(f"{self.count(TOURISTIC_CONTENTS)} touristic contents and "
+                 f"{self.count(TOURISTIC_EVENTS)} touristic events created")
+
+    def create_sensitive_areas(self):
+        from geotrek.sensitivity.models import SensitiveArea, Species, SportPractice
+
+        sport_practices = [SportPractice.objects.create(**translated(SportPractice, name=f"Sport practice {n}"))
+                           for n in range(3)]
+        species = []
+        for n in range(6):
+            months = self.rng.sample(range(1, 13), self.rng.randint(2, 6))
+            species.append(Species.objects.create(
+                category=Species.SPECIES,
+                **{f'period{month:02}': True for month in months},
+                **translated(Species, name=f"Species {n}"),
+            ))
+            species[-1].practices.set(self.rng.sample(sport_practices, 2))
+        for n in range(self.count(SENSITIVE_AREAS)):
+            SensitiveArea.objects.create(
+                geom=self.random_point()[0].buffer(self.rng.uniform(200, 800)),
+                species=self.rng.choice(species),
+                published=True,
+                structure=self.structure,
+                **translated(SensitiveArea, description=f"<p>{LOREM}</p>"),
+            )
+        self.log(f"{self.count(SENSITIVE_AREAS)} sensitive areas created")
+
+    def create_attachments(self, count):
+        """ Pictures of treks, POIs and touristic contents, sharing a few files """
+        filetype = FileType.objects.get_or_create(type="Photographie")[0]
+        creator = get_user_model().objects.get_or_create(username="benchmark", defaults={'is_active': False})[0]
+        files = []
+        for n in range(10):
+            content = io.BytesIO()
+            color = tuple(self.rng.randint(0, 255) for _ in range(3))
+            Image.new('RGB', (1600, 1200), color).save(content, format='JPEG')
+            storage = Attachment._meta.get_field('attachment_file').storage
+            files.append(storage.save(f'paperclip/benchmark/benchmark-{n}.jpg', ContentFile(content.getvalue())))
+        attachments = []
+        for model in (Trek, POI, TouristicContent):
+            for obj in model.objects.all():
+                for n in range(count):
+                    attachments.append(Attachment(
+                        content_object=obj, filetype=filetype, creator=creator, attachment_file=self.rng.choice(files),
+                        title=f"Picture {n}", legend=LOREM[:60], author="Benchmark", is_image=True, starred=n == 0,
+                    ))
+        Attachment.objects.bulk_create(attachments, batch_size=1000)
+        bump_model_versions(Attachment)
+        self.log(f"{len(attachments)} attachments created")
@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from geotrek.common.mixins.models import ThumbnailsMixin
+
+
+class Command(BaseCommand):
+    help = "Generate missing, outdated or removed thumbnails of attachments and information desks, and store their URLs"
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if not issubclass(model, ThumbnailsMixin):
+                continue
+            field = model.thumbnail_file_field
+            for instance in model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).iterator():
+                if not instance.thumbnails_outdated and not instance.thumbnails_missing:
+                    continue
+                instance.update_thumbnails()
+                if options['verbosity'] > 1:
+                    self.stdout.write("{file} thumbnails generated".format(file=instance.thumbnail_file.name))
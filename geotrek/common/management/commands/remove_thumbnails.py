@@ -1,10 +1,14 @@
 import os
 
+from django.apps import apps
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
 from easy_thumbnails.models import Thumbnail
 
+from geotrek.common.mixins.models import ThumbnailsMixin
+from geotrek.common.utils.cache import bump_model_versions
+
 
 class Command(BaseCommand):
     help = "Remove all thumbnails"
@@ -19,3 +23,9 @@ class Command(BaseCommand):
             thumbnail.delete()
             if options['verbosity'] > 0:
                 self.stdout.write("{pict} deleted".format(pict=thumbnail.name))
+
+        # Stored URLs are outdated
+        for model in apps.get_models():
+            if issubclass(model, ThumbnailsMixin):
+                model.objects.update(thumbnails={})
+                bump_model_versions(model)
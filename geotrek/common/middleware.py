@@ -1,8 +1,14 @@
 import re
+from contextlib import ExitStack
 
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.utils import translation
 from django.utils.translation.trans_real import get_supported_language_variant
 
+from geotrek.common.utils import profiling
+
 language_code_prefix_re = re.compile(r'^/api/([\w-]+)(/|$)')
 
 
@@ -27,3 +33,40 @@ class APILocaleMiddleware:
             translation.activate(language)
             request.LANGUAGE_CODE = translation.get_language()
         return self.get_response(request)
+
+
+class ProfilingMiddleware:
+    """
+    Record SQL queries, serialization time and cache hits of requests when PROFILING_ENABLED,
+    give them in Server-Timing header and aggregate them by view name (see geotrek.common.utils.profiling).
+    Queries run while streaming responses are not recorded.
+    """
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats, token = profiling.start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            profiling.end_request(token)
+        stats.stop()
+        response['Server-Timing'] = stats.server_timing()
+        if request.resolver_match:
+            view_name = request.resolver_match.view_name
+            try:
+                profiling.check_query_budget(view_name, stats)
+            finally:
+                profiling.record(view_name, stats)
+        return response
+
+    def process_template_response(self, request, response):
+        # Rendering happens once template responses went through middlewares
+        stop_serializing = profiling.start_serializing()
+        response.add_post_render_callback(lambda response: stop_serializing())
+        return response
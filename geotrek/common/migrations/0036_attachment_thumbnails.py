@@ -0,0 +1,23 @@
+# Generated by Django 3.2.21 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0035_label_published'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accessibilityattachment',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Thumbnails'),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Thumbnails'),
+        ),
+    ]
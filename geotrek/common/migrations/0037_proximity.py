@@ -0,0 +1,31 @@
+# Generated by Django 3.2.21 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0036_attachment_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Proximity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.IntegerField()),
+                ('near_model', models.CharField(max_length=100)),
+                ('near_object_id', models.IntegerField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='proximity',
+            index=models.Index(fields=['near_model', 'near_object_id', 'model'], name='proximity_near_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proximity',
+            index=models.Index(fields=['model', 'object_id'], name='proximity_object_idx'),
+        ),
+    ]
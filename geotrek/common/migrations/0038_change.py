@@ -0,0 +1,28 @@
+# Generated by Django 3.2.21 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0037_proximity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.IntegerField()),
+                ('action', models.CharField(max_length=10)),
+                ('transaction_id', models.BigIntegerField()),
+                ('date', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'transaction_id'], name='change_model_transaction_idx'),
+        ),
+    ]
@@ -3,6 +3,7 @@ import hashlib
 import os
 import shutil
 import uuid
+from urllib.parse import unquote
 
 from PIL.Image import DecompressionBombError
 from django.conf import settings
@@ -14,14 +15,17 @@ from django.template.defaultfilters import slugify
 from django.template.loader import render_to_string
 from django.utils.formats import date_format
 from django.utils.safestring import mark_safe
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from easy_thumbnails.alias import aliases
 from easy_thumbnails.exceptions import InvalidImageFormatError
-from easy_thumbnails.files import get_thumbnailer
+from easy_thumbnails.files import ThumbnailFile, get_thumbnailer
+from easy_thumbnails.storage import thumbnail_default_storage
 from embed_video.backends import detect_backend, VideoDoesntExistException
 
 from geotrek.common.mixins.managers import NoDeleteManager
 from geotrek.common.utils import classproperty, logger
+from geotrek.common.utils.cache import bump_model_versions, set_object_version
 
 from mapentity.models import MapEntityMixin
 
@@ -139,13 +143,19 @@ class PicturesMixin:
     def resized_pictures(self):
         resized = []
         for picture in self.pictures:
+            text = settings.THUMBNAIL_COPYRIGHT_FORMAT.format(author=picture.author, title=picture.title,
+                                                              legend=picture.legend)
+            if not text:
+                # Without watermark, same as the precomputed medium thumbnail
+                thdetail = picture.get_thumbnail('medium')
+                if thdetail:
+                    resized.append((picture, thdetail))
+                continue
             thumbnailer = get_thumbnailer(picture.attachment_file)
             try:
                 # Uppercase options aren't used by prepared options (a primary
                 # use of prepared options is to generate the filename -- these
                 # options don't alter the filename).
-                text = settings.THUMBNAIL_COPYRIGHT_FORMAT.format(author=picture.author, title=picture.title,
-                                                                  legend=picture.legend)
                 ali = thumbnailer.get_options({'size': (800, 800),
                                                'TEXT': text,
                                                'SIZE_WATERMARK': settings.THUMBNAIL_COPYRIGHT_SIZE,
@@ -162,11 +172,8 @@ class PicturesMixin:
     @property
     def picture_print(self):
         for picture in self.pictures:
-            thumbnailer = get_thumbnailer(picture.attachment_file)
-            try:
-                thumbnail = thumbnailer.get_thumbnail(aliases.get('print'))
-            except (IOError, InvalidImageFormatError, DecompressionBombError) as e:
-                logger.info(_("Image {} invalid or missing from disk: {}.").format(picture.attachment_file, e))
+            thumbnail = picture.get_thumbnail('print')
+            if not thumbnail:
                 continue
             thumbnail.author = picture.author
             thumbnail.legend = picture.legend
@@ -176,11 +183,8 @@ class PicturesMixin:
     @property
     def thumbnail(self):
         for picture in self.pictures:
-            thumbnailer = get_thumbnailer(picture.attachment_file)
-            try:
-                thumbnail = thumbnailer.get_thumbnail(aliases.get('small-square'))
-            except (IOError, InvalidImageFormatError, DecompressionBombError) as e:
-                logger.info(_("Image {} invalid or missing from disk: {}.").format(picture.attachment_file, e))
+            thumbnail = picture.get_thumbnail('small-square')
+            if not thumbnail:
                 continue
             thumbnail.author = picture.author
             thumbnail.legend = picture.legend
@@ -260,6 +264,100 @@ class PicturesMixin:
         return self.attachments.order_by('-starred', 'date_insert')
 
 
+def thumbnail_options_digest():
+    """ Digest of settings of precomputed thumbnails (alias options, processors, watermark), stored with them """
+    options = [(alias, aliases.get(alias)) for alias in settings.PRECOMPUTED_THUMBNAIL_ALIASES]
+    options += [settings.THUMBNAIL_PROCESSORS, settings.THUMBNAIL_COPYRIGHT_FORMAT, settings.THUMBNAIL_COPYRIGHT_SIZE]
+    return hashlib.md5(repr(options).encode('utf-8')).hexdigest()
+
+
+class ThumbnailsMixin(models.Model):
+    """
+    URLs of thumbnails of an attached file, for all aliases of ``PRECOMPUTED_THUMBNAIL_ALIASES``.
+    Generated asynchronously after each change of file (see ``geotrek.common.tasks.generate_thumbnails``),
+    so that serializers do not stat or resize images.
+    """
+    # Computed values (managed asynchronously by celery)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False, verbose_name=_("Thumbnails"))
+
+    thumbnail_file_field = 'attachment_file'
+
+    class Meta:
+        abstract = True
+
+    @property
+    def thumbnail_file(self):
+        return getattr(self, self.thumbnail_file_field)
+
+    @property
+    def thumbnails_outdated(self):
+        """ Stored thumbnails are not those of current file, or of current thumbnail settings """
+        file = self.thumbnail_file
+        return bool(file) and (self.thumbnails.get('file') != file.name
+                               or self.thumbnails.get('options') != thumbnail_options_digest())
+
+    @property
+    def thumbnails_missing(self):
+        """ Some stored thumbnail was removed from disk (stats files) """
+        return any(name and not thumbnail_default_storage.exists(name)
+                   for name in map(self.get_thumbnail_name, settings.PRECOMPUTED_THUMBNAIL_ALIASES))
+
+    def get_thumbnail_url(self, alias):
+        """ Return stored URL of thumbnail, '' if file is not an image, None if not generated yet """
+        if self.thumbnails_outdated:
+            return None
+        return self.thumbnails.get(alias)
+
+    def get_thumbnail_name(self, alias):
+        """ Return storage name of stored thumbnail, None if not generated yet or not stored in media """
+        url = self.get_thumbnail_url(alias)
+        if url and url.startswith(settings.MEDIA_URL):
+            return unquote(url[len(settings.MEDIA_URL):])
+        return None
+
+    def get_thumbnail(self, alias):
+        """
+        Return thumbnail of file for alias (a file like easy-thumbnails ones), None if file is not an image.
+        Stored one is used if any, without resize, else it is generated.
+        """
+        if self.get_thumbnail_url(alias) == "":
+            return None
+        name = self.get_thumbnail_name(alias)
+        if name and thumbnail_default_storage.exists(name):
+            return ThumbnailFile(name, storage=thumbnail_default_storage)
+        # Not generated yet, or removed from disk
+        try:
+            return get_thumbnailer(self.thumbnail_file).get_thumbnail(aliases.get(alias))
+        except (IOError, InvalidImageFormatError, DecompressionBombError) as e:
+            logger.info(_("Image {} invalid or missing from disk: {}.").format(self.thumbnail_file, e))
+            return None
+
+    def compute_thumbnails(self):
+        """ Generate thumbnails of file, return their URLs """
+        file = self.thumbnail_file
+        thumbnailer = get_thumbnailer(file)
+        thumbnails = {'file': file.name, 'options': thumbnail_options_digest()}
+        for alias in settings.PRECOMPUTED_THUMBNAIL_ALIASES:
+            try:
+                thumbnails[alias] = thumbnailer.get_thumbnail(aliases.get(alias)).url
+            except (IOError, InvalidImageFormatError, DecompressionBombError) as e:
+                logger.info(_("Image {} invalid or missing from disk: {}.").format(file, e))
+                thumbnails[alias] = ""
+        return thumbnails
+
+    def update_thumbnails(self):
+        """ Generate thumbnails and store their URLs, without sending signals """
+        values = {'thumbnails': self.compute_thumbnails()}
+        if hasattr(self, 'date_update'):
+            values['date_update'] = now()
+        for name, value in values.items():
+            setattr(self, name, value)
+        type(self)._default_manager.filter(pk=self.pk).update(**values)
+        # Signals are not sent: invalidate API cache of this object and of objects serializing it
+        bump_model_versions(type(self))
+        set_object_version(self)
+
+
 class BasePublishableMixin(models.Model):
     """
     Basic fields to control publication of objects.
@@ -8,8 +8,9 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.gis.db import models as gis_models
-from django.db import models
+from django.db import connection, models
 from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django.template.defaultfilters import slugify
 from django.urls import reverse
 from django.utils.http import urlencode
@@ -25,7 +26,7 @@ from geotrek.authent.models import StructureOrNoneRelated
 
 from .managers import AccessibilityAttachmentManager
 from .mixins.models import (OptionalPictogramMixin, PictogramMixin,
-                            TimeStampedModelMixin)
+                            ThumbnailsMixin, TimeStampedModelMixin)
 
 
 def attachment_accessibility_upload(instance, filename):
@@ -47,7 +48,7 @@ class License(StructureOrNoneRelated, BaseLicense):
         ordering = ['label']
 
 
-class AccessibilityAttachment(models.Model):
+class AccessibilityAttachment(ThumbnailsMixin, models.Model):
     # Do not forget to change default value in sql (geotrek/common/sql/post_30_attachments.sql)
     class InfoAccessibilityChoices(models.TextChoices):
         SLOPE = 'slope', _('Slope')
@@ -92,6 +93,8 @@ class AccessibilityAttachment(models.Model):
                                        verbose_name=_("Update date"))
     random_suffix = models.CharField(null=False, blank=True, default='', max_length=128)
 
+    thumbnail_file_field = 'attachment_accessibility_file'
+
     class Meta:
         ordering = ['-date_insert']
         verbose_name = _("Attachment accessibility")
@@ -182,7 +185,7 @@ class FileType(StructureOrNoneRelated, TimeStampedModelMixin, BaseFileType):
         return self.type
 
 
-class Attachment(BaseAttachment):
+class Attachment(ThumbnailsMixin, BaseAttachment):
     creation_date = models.DateField(verbose_name=_("Creation Date"), null=True, blank=True)
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
 
@@ -380,3 +383,85 @@ class HDViewPoint(TimeStampedModelMixin, MapEntityMixin):
 
     def get_annotate_url(self):
         return reverse('common:hdviewpoint_annotate', args=[self.pk])
+
+
+class Proximity(models.Model):
+    """
+    Object (e.g. a touristic content) near another one (e.g. a trek), within the intersection margin
+    of the latter. Kept up to date by triggers (see common/sql/post_30_proximity.sql),
+    so that near_* API filters are indexed lookups instead of spatial queries.
+    """
+    # Models (as 'app_label.modelname') which can be targeted by near_* filters, and those which can be filtered.
+    # Keep them in sync with v_proximity_targets and v_proximity_objects SQL views.
+    indexed_near_models = ('trekking.trek', 'tourism.touristiccontent', 'tourism.touristicevent',
+                           'outdoor.site', 'outdoor.course')
+    indexed_models = indexed_near_models + ('sensitivity.sensitivearea', )
+
+    model = models.CharField(max_length=100)
+    object_id = models.IntegerField()
+    near_model = models.CharField(max_length=100)
+    near_object_id = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(name='proximity_near_object_idx', fields=['near_model', 'near_object_id', 'model']),
+            models.Index(name='proximity_object_idx', fields=['model', 'object_id']),
+        ]
+
+    @classmethod
+    def is_indexed(cls, model, near_model):
+        label, near_label = model._meta.label_lower, near_model._meta.label_lower
+        # Treks near treks depend on topologies
+        return label in cls.indexed_models and near_label in cls.indexed_near_models and not label == near_label == 'trekking.trek'
+
+    @classmethod
+    def near(cls, model, near_model, near_pk):
+        """ Ids of model objects near the near_model object """
+        return cls.objects.filter(
+            near_model=near_model._meta.label_lower, near_object_id=near_pk, model=model._meta.label_lower
+        ).values('object_id')
+
+
+class Change(models.Model):
+    """
+    Creation, update or deletion of an object served by APIv2, logged by triggers (see common/sql/post_40_changes.sql)
+    with its transaction id, so that clients can synchronize incrementally (see ChangesFeedMixin).
+    """
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=100)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=10)
+    transaction_id = models.BigIntegerField()
+    date = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(name='change_model_transaction_idx', fields=['model', 'transaction_id']),
+        ]
+
+    @classmethod
+    def cursor(cls):
+        """ Oldest running transaction id: changes of transactions before it are final """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def actions(cls, model, since, until):
+        """
+        {object id: (first action, last action)} of model objects changed by transactions from since to until
+        (excluded), or by current transaction
+        """
+        changes = cls.objects.filter(model=model._meta.label_lower, transaction_id__gte=since) \
+            .filter(Q(transaction_id__lt=until) | Q(transaction_id=RawSQL('txid_current_if_assigned()', ()))) \
+            .order_by('id') \
+            .values_list('object_id', 'action')
+        actions = {}
+        for object_id, action in changes:
+            first_action = actions[object_id][0] if object_id in actions else action
+            actions[object_id] = (first_action, action)
+        return actions
@@ -1,13 +1,18 @@
 from django.contrib.admin.models import DELETION, LogEntry
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.utils.timezone import now
 
 from mapentity.middleware import get_internal_user
 
+from geotrek.common.mixins.models import ThumbnailsMixin
 from geotrek.common.models import (AccessibilityAttachment, Attachment,
                                    HDViewPoint)
+from geotrek.common.tasks import generate_thumbnails
+from geotrek.common.utils.cache import bump_model_versions, delete_object_version, is_versioned, set_object_version
 
 
 def log_cascade_deletion(sender, instance, related_model, cascading_field):
@@ -38,3 +43,40 @@ def update_content_object_date_update(sender, instance, *args, **kwargs):
     if content_object and hasattr(content_object, 'date_update'):
         content_object.date_update = now()
         content_object.save(update_fields=['date_update'])
+
+
+@receiver(post_save)
+def generate_attachment_thumbnails(sender, instance, *args, **kwargs):
+    """ after each change of thumbnailed file (attachments, desk photos), generate thumbnails once committed """
+    if isinstance(instance, ThumbnailsMixin) and instance.thumbnails_outdated:
+        transaction.on_commit(lambda: generate_thumbnails.delay(sender._meta.label, instance.pk))
+
+
+def schedule_api_cache_warming(model):
+    """ Warm APIv2 cache after changes of Geotrek models, once they are committed (API_CACHE_WARMING_URL) """
+    if settings.API_CACHE_WARMING_URL and is_versioned(model):
+        from geotrek.api.v2.warming import schedule
+
+        transaction.on_commit(schedule)
+
+
+@receiver(post_save)
+def update_model_version(sender, instance, *args, **kwargs):
+    """ after each creation / edition, increment model version and mirror object version to invalidate API cache """
+    bump_model_versions(sender)
+    set_object_version(instance)
+    schedule_api_cache_warming(sender)
+
+
+@receiver(post_delete)
+def delete_model_version(sender, instance, *args, **kwargs):
+    bump_model_versions(sender)
+    delete_object_version(instance)
+    schedule_api_cache_warming(sender)
+
+
+@receiver(m2m_changed)
+def update_m2m_model_version(sender, instance, action, *args, **kwargs):
+    if action.startswith('post_'):
+        bump_model_versions(sender, instance.__class__, kwargs['model'])
+        schedule_api_cache_warming(instance.__class__)
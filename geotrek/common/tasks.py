@@ -4,6 +4,7 @@ import os
 from os.path import join
 import sys
 from celery import Task, shared_task, current_task
+from django.apps import apps
 from django.contrib.auth.models import User
 from django.core.management import call_command
 from django.conf import settings
@@ -175,3 +176,23 @@ def launch_sync_rando(*args, **kwargs):
     return {
         'name': current_task.name,
     }
+
+
+@shared_task(name='geotrek.common.generate-thumbnails')
+def generate_thumbnails(model_label, pk):
+    """
+    celery shared task - generate thumbnails of an attachment and store their URLs
+    """
+    attachment = apps.get_model(model_label)._default_manager.filter(pk=pk).first()
+    if attachment and attachment.thumbnails_outdated:
+        attachment.update_thumbnails()
+
+
+@shared_task(name='geotrek.common.warm-api-cache')
+def warm_api_cache():
+    """
+    celery shared task - render APIv2 responses affected by changes in cache
+    """
+    from geotrek.api.v2.warming import warm
+
+    return warm()
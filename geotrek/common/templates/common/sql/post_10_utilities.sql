@@ -38,3 +38,27 @@ BEGIN
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
+
+-------------------------------------------------------------------------------
+-- Full-text search
+-- Expressions indexed for each language by apps (e.g. trekking/sql/post_50_search.sql)
+-- Functions are replaced, not dropped, so that indexes are kept across migrations:
+-- if their result changes, indexes using them must be dropped in pre_10_cleanup.sql to be rebuilt
+-------------------------------------------------------------------------------
+
+-- unaccent() is only stable (its dictionary can change), it can not be used in indexes as is
+CREATE OR REPLACE FUNCTION {{ schema_geotrek }}.search_unaccent(text) RETURNS text AS $$
+    SELECT unaccent('unaccent'::regdictionary, $1)
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+-- HTML tags are skipped by the default parser
+CREATE OR REPLACE FUNCTION {{ schema_geotrek }}.search_vector(VARIADIC texts text[]) RETURNS tsvector AS $$
+    SELECT to_tsvector('simple'::regconfig, {{ schema_geotrek }}.search_unaccent(lower(array_to_string(texts, ' '))))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- All words of query must match, as prefixes
+CREATE OR REPLACE FUNCTION {{ schema_geotrek }}.search_query(query text) RETURNS tsquery AS $$
+    SELECT to_tsquery('simple'::regconfig, string_agg(quote_literal(word) || ':*', ' & '))
+    FROM regexp_split_to_table({{ schema_geotrek }}.search_unaccent(lower(query)), '[^[:alnum:]]+') AS word
+    WHERE word <> ''
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
@@ -0,0 +1,168 @@
+-------------------------------------------------------------------------------
+-- Keep proximities up to date (see Proximity model)
+-- An object is near a target object when it is within the intersection margin
+-- of the target (sensitive areas: when their buffered geometry intersects it).
+-- Treks near treks are not indexed: they depend on topologies, not on margins.
+-------------------------------------------------------------------------------
+
+-- Objects which can be targeted by near_* filters, with their intersection margin
+CREATE VIEW {{ schema_geotrek }}.v_proximity_targets AS (
+    SELECT 'trekking.trek'::text AS model, t.id, t.geom,
+           COALESCE(p.distance, {{ TOURISM_INTERSECTION_MARGIN }}) AS margin
+    FROM core_topology t
+    JOIN trekking_trek k ON k.topo_object_id = t.id
+    LEFT JOIN trekking_practice p ON p.id = k.practice_id
+    UNION ALL
+    SELECT 'tourism.touristiccontent'::text, id, geom, {{ TOURISM_INTERSECTION_MARGIN }}
+    FROM tourism_touristiccontent
+    UNION ALL
+    SELECT 'tourism.touristicevent'::text, id, geom, {{ TOURISM_INTERSECTION_MARGIN }}
+    FROM tourism_touristicevent
+    {% if 'geotrek.outdoor' in INSTALLED_APPS %}
+    UNION ALL
+    SELECT 'outdoor.site'::text, id, geom, {{ OUTDOOR_INTERSECTION_MARGIN }}
+    FROM outdoor_site
+    UNION ALL
+    SELECT 'outdoor.course'::text, id, geom, {{ OUTDOOR_INTERSECTION_MARGIN }}
+    FROM outdoor_course
+    {% endif %}
+);
+
+-- Objects which can be filtered by near_* filters
+CREATE VIEW {{ schema_geotrek }}.v_proximity_objects AS (
+    SELECT model, id, geom, FALSE AS buffered FROM v_proximity_targets
+    {% if 'geotrek.sensitivity' in INSTALLED_APPS %}
+    UNION ALL
+    SELECT 'sensitivity.sensitivearea'::text, id, geom_buffered, TRUE
+    FROM sensitivity_sensitivearea
+    {% endif %}
+);
+
+CREATE FUNCTION {{ schema_geotrek }}.proximity_update(changed_model text, changed_id integer) RETURNS void SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    DELETE FROM common_proximity
+    WHERE (model = changed_model AND object_id = changed_id)
+       OR (near_model = changed_model AND near_object_id = changed_id);
+
+    -- Targets near which the changed object is
+    INSERT INTO common_proximity (model, object_id, near_model, near_object_id)
+    SELECT o.model, o.id, n.model, n.id
+    FROM v_proximity_objects o, v_proximity_targets n
+    WHERE o.model = changed_model AND o.id = changed_id
+      AND NOT (o.model = n.model AND (o.id = n.id OR o.model = 'trekking.trek'))
+      AND ST_DWithin(o.geom, n.geom, CASE WHEN o.buffered THEN 0 ELSE n.margin END);
+
+    -- Objects near the changed target
+    INSERT INTO common_proximity (model, object_id, near_model, near_object_id)
+    SELECT o.model, o.id, n.model, n.id
+    FROM v_proximity_objects o, v_proximity_targets n
+    WHERE n.model = changed_model AND n.id = changed_id
+      AND NOT (o.model = n.model AND (o.id = n.id OR o.model = 'trekking.trek'))
+      AND ST_DWithin(o.geom, n.geom, CASE WHEN o.buffered THEN 0 ELSE n.margin END);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION {{ schema_geotrek }}.proximity_update_iud() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    -- Trigger argument is the model label, e.g. 'tourism.touristiccontent'
+    IF TG_OP = 'DELETE' THEN
+        PERFORM proximity_update(TG_ARGV[0], OLD.id);
+        RETURN OLD;
+    END IF;
+    PERFORM proximity_update(TG_ARGV[0], NEW.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trek geometries are computed from paths, in core_topology
+CREATE FUNCTION {{ schema_geotrek }}.proximity_update_trek_iud() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM proximity_update('trekking.trek', OLD.topo_object_id);
+        RETURN OLD;
+    END IF;
+    PERFORM proximity_update('trekking.trek', NEW.topo_object_id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION {{ schema_geotrek }}.proximity_update_practice_u() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+    trek_id integer;
+BEGIN
+    FOR trek_id IN SELECT topo_object_id FROM trekking_trek WHERE practice_id = NEW.id LOOP
+        PERFORM proximity_update('trekking.trek', trek_id);
+    END LOOP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER common_proximity_topology_u_tgr
+AFTER UPDATE OF geom ON core_topology
+FOR EACH ROW WHEN (NEW.kind = 'TREK') EXECUTE PROCEDURE proximity_update_iud('trekking.trek');
+
+CREATE TRIGGER common_proximity_trek_iud_tgr
+AFTER INSERT OR UPDATE OF practice_id OR DELETE ON trekking_trek
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_trek_iud();
+
+CREATE TRIGGER common_proximity_practice_u_tgr
+AFTER UPDATE OF distance ON trekking_practice
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_practice_u();
+
+CREATE TRIGGER common_proximity_touristiccontent_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON tourism_touristiccontent
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('tourism.touristiccontent');
+
+CREATE TRIGGER common_proximity_touristiccontent_d_tgr
+AFTER DELETE ON tourism_touristiccontent
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('tourism.touristiccontent');
+
+CREATE TRIGGER common_proximity_touristicevent_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON tourism_touristicevent
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('tourism.touristicevent');
+
+CREATE TRIGGER common_proximity_touristicevent_d_tgr
+AFTER DELETE ON tourism_touristicevent
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('tourism.touristicevent');
+
+{% if 'geotrek.outdoor' in INSTALLED_APPS %}
+CREATE TRIGGER common_proximity_site_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON outdoor_site
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('outdoor.site');
+
+CREATE TRIGGER common_proximity_site_d_tgr
+AFTER DELETE ON outdoor_site
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('outdoor.site');
+
+CREATE TRIGGER common_proximity_course_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON outdoor_course
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('outdoor.course');
+
+CREATE TRIGGER common_proximity_course_d_tgr
+AFTER DELETE ON outdoor_course
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('outdoor.course');
+{% endif %}
+
+{% if 'geotrek.sensitivity' in INSTALLED_APPS %}
+CREATE TRIGGER common_proximity_sensitivearea_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON sensitivity_sensitivearea
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('sensitivity.sensitivearea');
+
+CREATE TRIGGER common_proximity_sensitivearea_d_tgr
+AFTER DELETE ON sensitivity_sensitivearea
+FOR EACH ROW EXECUTE PROCEDURE proximity_update_iud('sensitivity.sensitivearea');
+{% endif %}
+
+
+-- Margins are settings, compute all proximities again
+
+TRUNCATE common_proximity;
+
+INSERT INTO common_proximity (model, object_id, near_model, near_object_id)
+SELECT o.model, o.id, n.model, n.id
+FROM v_proximity_objects o, v_proximity_targets n
+WHERE NOT (o.model = n.model AND (o.id = n.id OR o.model = 'trekking.trek'))
+  AND ST_DWithin(o.geom, n.geom, CASE WHEN o.buffered THEN 0 ELSE n.margin END);
@@ -0,0 +1,153 @@
+-------------------------------------------------------------------------------
+-- Log changes of objects served by APIv2 changes feeds (see Change model).
+-- Changes are stamped with their transaction id: the feed only serves changes
+-- of finished transactions, so that late commits are never skipped.
+-- Keep logged models in sync with viewsets using ChangesFeedMixin.
+-------------------------------------------------------------------------------
+
+CREATE FUNCTION {{ schema_geotrek }}.change_log(changed_model text, changed_id integer, changed_action text) RETURNS void SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    INSERT INTO common_change (model, object_id, action, transaction_id, date)
+    VALUES (changed_model, changed_id, changed_action, txid_current(), now());
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION {{ schema_geotrek }}.change_log_iud() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    -- Trigger arguments are the model label, e.g. 'tourism.touristiccontent', and its primary key column
+    IF TG_OP = 'DELETE' THEN
+        PERFORM change_log(TG_ARGV[0], (to_jsonb(OLD) ->> TG_ARGV[1])::integer, 'deleted');
+        RETURN OLD;
+    END IF;
+    PERFORM change_log(TG_ARGV[0], (to_jsonb(NEW) ->> TG_ARGV[1])::integer,
+                       CASE WHEN TG_OP = 'INSERT' THEN 'created' ELSE 'updated' END);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Geometries, dates and soft deletion of topology based models are in core_topology
+CREATE FUNCTION {{ schema_geotrek }}.change_log_topology_u() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+    changed_model text;
+BEGIN
+    changed_model := CASE NEW.kind
+        WHEN 'TREK' THEN 'trekking.trek'
+        WHEN 'POI' THEN 'trekking.poi'
+        WHEN 'SERVICE' THEN 'trekking.service'
+        WHEN 'SIGNAGE' THEN 'signage.signage'
+        WHEN 'INFRASTRUCTURE' THEN 'infrastructure.infrastructure'
+    END;
+    IF changed_model IS NOT NULL THEN
+        PERFORM change_log(changed_model, NEW.id, 'updated');
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER common_change_topology_u_tgr
+AFTER UPDATE ON core_topology
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_topology_u();
+
+CREATE TRIGGER common_change_trek_id_tgr
+AFTER INSERT OR DELETE ON trekking_trek
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('trekking.trek', 'topo_object_id');
+
+CREATE TRIGGER common_change_trek_u_tgr
+AFTER UPDATE ON trekking_trek
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('trekking.trek', 'topo_object_id');
+
+CREATE TRIGGER common_change_poi_id_tgr
+AFTER INSERT OR DELETE ON trekking_poi
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('trekking.poi', 'topo_object_id');
+
+CREATE TRIGGER common_change_poi_u_tgr
+AFTER UPDATE ON trekking_poi
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('trekking.poi', 'topo_object_id');
+
+CREATE TRIGGER common_change_service_id_tgr
+AFTER INSERT OR DELETE ON trekking_service
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('trekking.service', 'topo_object_id');
+
+CREATE TRIGGER common_change_service_u_tgr
+AFTER UPDATE ON trekking_service
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('trekking.service', 'topo_object_id');
+
+CREATE TRIGGER common_change_touristiccontent_id_tgr
+AFTER INSERT OR DELETE ON tourism_touristiccontent
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('tourism.touristiccontent', 'id');
+
+CREATE TRIGGER common_change_touristiccontent_u_tgr
+AFTER UPDATE ON tourism_touristiccontent
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('tourism.touristiccontent', 'id');
+
+CREATE TRIGGER common_change_touristicevent_id_tgr
+AFTER INSERT OR DELETE ON tourism_touristicevent
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('tourism.touristicevent', 'id');
+
+CREATE TRIGGER common_change_touristicevent_u_tgr
+AFTER UPDATE ON tourism_touristicevent
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('tourism.touristicevent', 'id');
+
+CREATE TRIGGER common_change_informationdesk_id_tgr
+AFTER INSERT OR DELETE ON tourism_informationdesk
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('tourism.informationdesk', 'id');
+
+CREATE TRIGGER common_change_informationdesk_u_tgr
+AFTER UPDATE ON tourism_informationdesk
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('tourism.informationdesk', 'id');
+
+CREATE TRIGGER common_change_flatpage_id_tgr
+AFTER INSERT OR DELETE ON flatpages_flatpage
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('flatpages.flatpage', 'id');
+
+CREATE TRIGGER common_change_flatpage_u_tgr
+AFTER UPDATE ON flatpages_flatpage
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('flatpages.flatpage', 'id');
+
+CREATE TRIGGER common_change_signage_id_tgr
+AFTER INSERT OR DELETE ON signage_signage
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('signage.signage', 'topo_object_id');
+
+CREATE TRIGGER common_change_signage_u_tgr
+AFTER UPDATE ON signage_signage
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('signage.signage', 'topo_object_id');
+
+CREATE TRIGGER common_change_infrastructure_id_tgr
+AFTER INSERT OR DELETE ON infrastructure_infrastructure
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('infrastructure.infrastructure', 'topo_object_id');
+
+CREATE TRIGGER common_change_infrastructure_u_tgr
+AFTER UPDATE ON infrastructure_infrastructure
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('infrastructure.infrastructure', 'topo_object_id');
+
+{% if 'geotrek.outdoor' in INSTALLED_APPS %}
+CREATE TRIGGER common_change_site_id_tgr
+AFTER INSERT OR DELETE ON outdoor_site
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('outdoor.site', 'id');
+
+CREATE TRIGGER common_change_site_u_tgr
+AFTER UPDATE ON outdoor_site
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('outdoor.site', 'id');
+
+CREATE TRIGGER common_change_course_id_tgr
+AFTER INSERT OR DELETE ON outdoor_course
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('outdoor.course', 'id');
+
+CREATE TRIGGER common_change_course_u_tgr
+AFTER UPDATE ON outdoor_course
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('outdoor.course', 'id');
+
+{% endif %}
+
+{% if 'geotrek.sensitivity' in INSTALLED_APPS %}
+CREATE TRIGGER common_change_sensitivearea_id_tgr
+AFTER INSERT OR DELETE ON sensitivity_sensitivearea
+FOR EACH ROW EXECUTE PROCEDURE change_log_iud('sensitivity.sensitivearea', 'id');
+
+CREATE TRIGGER common_change_sensitivearea_u_tgr
+AFTER UPDATE ON sensitivity_sensitivearea
+FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE change_log_iud('sensitivity.sensitivearea', 'id');
+
+{% endif %}
@@ -4,3 +4,12 @@ DROP FUNCTION IF EXISTS ft_date_insert() CASCADE;
 DROP FUNCTION IF EXISTS ft_date_update() CASCADE;
 DROP FUNCTION IF EXISTS ft_uuid_insert() CASCADE;
 DROP FUNCTION IF EXISTS flatten_geometrycollection_iu() CASCADE;
+DROP VIEW IF EXISTS v_proximity_objects CASCADE;
+DROP VIEW IF EXISTS v_proximity_targets CASCADE;
+DROP FUNCTION IF EXISTS proximity_update(text, integer) CASCADE;
+DROP FUNCTION IF EXISTS proximity_update_iud() CASCADE;
+DROP FUNCTION IF EXISTS proximity_update_trek_iud() CASCADE;
+DROP FUNCTION IF EXISTS proximity_update_practice_u() CASCADE;
+DROP FUNCTION IF EXISTS change_log(text, integer, text) CASCADE;
+DROP FUNCTION IF EXISTS change_log_iud() CASCADE;
+DROP FUNCTION IF EXISTS change_log_topology_u() CASCADE;
@@ -1,3 +1,6 @@
 -- Used to ensure extension is enabled even in test database (migrations disabled)
 -- Otherwise UUIDs on objects can not be generated on insert (including path splits)
-CREATE EXTENSION IF NOT EXISTS "pgcrypto";
\ No newline at end of file
+CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+-- Used by full-text search (see post_10_utilities.sql)
+CREATE EXTENSION IF NOT EXISTS "unaccent";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from geotrek.common.cache_backend import ShardedFileCache
+
+
+class ShardedFileCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.cache = self.get_cache()
+
+    def get_cache(self, **options):
+        return ShardedFileCache(self.dir, {'OPTIONS': {'MAX_SIZE': 10000, 'ACCESS_RESOLUTION': 0, **options}})
+
+    def test_set_get_delete(self):
+        self.cache.set('key', {'value': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'value': [1, 2]})
+        self.assertTrue(self.cache.has_key('key'))
+        self.assertTrue(self.cache.delete('key'))
+        self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(self.cache.delete('key'))
+
+    def test_files_are_sharded(self):
+        self.cache.set('key', 'value')
+        fname = self.cache._hash_to_file(self.cache._key_to_hash('key'))
+        self.assertEqual(os.path.dirname(os.path.dirname(fname)), self.dir)
+        self.assertTrue(os.path.exists(fname))
+        self.assertEqual([name for name in os.listdir(os.path.dirname(fname))], [os.path.basename(fname)])
+
+    def test_add(self):
+        self.assertTrue(self.cache.add('key', 'value'))
+        self.assertFalse(self.cache.add('key', 'other value'))
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    @mock.patch('geotrek.common.cache_backend.time.time')
+    def test_expiration(self, mocked_time):
+        mocked_time.return_value = 1000
+        self.cache.set('key', 'value', 10)
+        self.cache.set('forever', 'value', None)
+        self.assertTrue(self.cache.touch('key', 20))
+        mocked_time.return_value = 1015
+        self.assertEqual(self.cache.get('key'), 'value')
+        mocked_time.return_value = 1025
+        self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(self.cache.has_key('key'))
+        self.assertFalse(self.cache.touch('key'))
+        self.assertTrue(self.cache.add('key', 'new value'))
+        self.assertEqual(self.cache.get('forever'), 'value')
+
+    def test_shared_between_instances(self):
+        self.cache.set('key', 'value')
+        self.assertEqual(self.get_cache().get('key'), 'value')
+
+    @mock.patch('geotrek.common.cache_backend.time.time')
+    def test_least_recently_used_are_evicted(self, mocked_time):
+        self.cache = self.get_cache(MAX_SIZE=10500)
+        value = os.urandom(1000)  # Not compressible, about 1020 bytes with pickle and zlib headers
+        for i in range(9):
+            mocked_time.return_value = 1000 + i
+            self.cache.set(f'key{i}', value)
+        mocked_time.return_value = 1010
+        self.assertEqual(self.cache.get('key0'), value)
+        mocked_time.return_value = 1011
+        self.cache.set('key9', value)
+        self.assertEqual(self.cache.stats()['evictions'], 0)
+        mocked_time.return_value = 1012
+        self.cache.set('key10', value)
+        # Evicted down to 90% of MAX_SIZE
+        self.assertEqual([key for key in [f'key{i}' for i in range(11)] if not self.cache.has_key(key)],
+                         ['key1', 'key2'])
+        self.assertLessEqual(self.cache.stats()['size'], 9450)
+        self.assertFalse(os.path.exists(self.cache._hash_to_file(self.cache._key_to_hash('key1'))))
+
+    def test_stats(self):
+        self.cache.set('key', 'value')
+        self.cache.set('key', 'other value')
+        self.cache.set('other_key', 'value')
+        self.cache.get('key')
+        self.cache.get('missing')
+        stats = self.get_cache().stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['size'], sum(
+            os.path.getsize(self.cache._hash_to_file(self.cache._key_to_hash(key))) for key in ('key', 'other_key')
+        ))
+        self.assertEqual(stats['max_size'], 10000)
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (1, 1, 0))
+
+    def test_clear(self):
+        self.cache.set('key', 'value')
+        open(os.path.join(self.dir, 'old.djcache'), 'w').close()
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, 'old.djcache')))
+
+    def test_cache_directory_deleted(self):
+        self.cache.set('key', 'value')
+        shutil.rmtree(self.dir)
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
@@ -1,6 +1,7 @@
 from django.core.management import call_command
 from django.core.management.base import CommandError
 
+from django.db import transaction
 from django.test import TestCase
 from django.conf import settings
 
@@ -8,7 +9,10 @@ from geotrek.authent.tests.factories import StructureFactory
 from geotrek.common.tests.factories import AttachmentFactory, TargetPortalFactory
 from geotrek.common.models import TargetPortal
 from geotrek.common.utils.testdata import get_dummy_uploaded_image
-from geotrek.trekking.tests.factories import POIFactory
+from geotrek.common.management.commands.benchmark_api import summarize
+from geotrek.tourism.models import TouristicContent, TouristicEvent
+from geotrek.trekking.models import POI, Trek
+from geotrek.trekking.tests.factories import POIFactory, TrekFactory
 from geotrek.infrastructure.tests.factories import InfrastructureFactory, InfrastructureTypeFactory
 from geotrek.infrastructure.models import InfrastructureType, Infrastructure
 from geotrek.core.models import Usage, Path
@@ -17,7 +21,9 @@ from geotrek.core.tests.factories import UsageFactory, PathFactory
 from easy_thumbnails.models import Thumbnail
 
 from io import StringIO
+import json
 import os
+import tempfile
 
 from unittest import mock
 
@@ -160,3 +166,48 @@ class CommandAttachmentsTests(TestCase):
         call_command('clean_attachments', stdout=output, verbosity=2)
         self.assertIn('%s... Thumbnail' % self.content.thumbnail.name, output.getvalue())
         self.assertTrue(os.path.exists(self.content.thumbnail.path))
+
+
+class CommandBenchmarkTests(TestCase):
+    def test_summarize(self):
+        result = summarize([i / 1000 for i in range(100, 0, -1)], errors=1, elapsed=2)
+        self.assertEqual(result['requests'], 100)
+        self.assertEqual(result['errors'], 1)
+        self.assertEqual(result['throughput'], 50)
+        self.assertEqual(result['latency'], {
+            'min': 1, 'mean': 50.5, 'p50': 50, 'p90': 90, 'p95': 95, 'p99': 99, 'max': 100,
+        })
+
+    def generate_dataset(self, **options):
+        """ Generate dataset, return it and roll it back """
+        with transaction.atomic():
+            call_command('generate_benchmark_dataset', pictures=0, stdout=StringIO(), **options)
+            counts = {model: model.objects.count() for model in (Path, Trek, POI, TouristicContent, TouristicEvent)}
+            dataset = (
+                [path.geom.wkt for path in Path.objects.order_by('pk')],
+                [(trek.name, trek.practice.name, trek.duration) for trek in Trek.objects.order_by('pk')],
+                [content.geom.wkt for content in TouristicContent.objects.order_by('pk')],
+            )
+            transaction.set_rollback(True)
+        return counts, dataset
+
+    def test_generate_benchmark_dataset(self):
+        counts, dataset = self.generate_dataset(scale=0.1, seed=1)
+        self.assertEqual(counts, {Path: 60, Trek: 10, POI: 50, TouristicContent: 20, TouristicEvent: 5})
+        self.assertEqual(self.generate_dataset(scale=0.1, seed=1), (counts, dataset))
+        self.assertNotEqual(self.generate_dataset(scale=0.1, seed=2)[1], dataset)
+
+    @mock.patch('requests.Session.get')
+    def test_benchmark_api(self, mocked_get):
+        mocked_get.return_value = mock.Mock(ok=True, content=b'{}')
+        trek = TrekFactory.create()
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('benchmark_api', 'http://localhost:8000/', requests=5, concurrency=2, endpoint=['apiv2:trek'],
+                         output=output.name, stdout=StringIO())
+            results = json.load(output)
+        self.assertEqual(results['url'], 'http://localhost:8000')
+        self.assertEqual(set(results['endpoints']), {'apiv2:trek-list', 'apiv2:trek-list (page of 500)',
+                                                     'apiv2:trek-detail'})
+        self.assertEqual(results['endpoints']['apiv2:trek-detail']['path'], f'/api/v2/trek/{trek.pk}/')
+        self.assertEqual(results['endpoints']['apiv2:trek-detail']['requests'], 5)
+        self.assertEqual(mocked_get.call_count, 3 * (5 + 1))
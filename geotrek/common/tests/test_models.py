@@ -1,13 +1,18 @@
 import os
 
+from django.conf import settings
+from django.contrib.gis.geos import Point
 from django.core.files import File
 from django.test import TestCase
 
 from geotrek.authent.models import default_structure
 from geotrek.authent.tests.factories import StructureFactory, UserProfileFactory, UserFactory
-from geotrek.common.models import Theme
+from geotrek.common.models import Proximity, Theme
 from geotrek.common.tests.factories import (HDViewPointFactory, LabelFactory, OrganismFactory)
-from geotrek.trekking.tests.factories import TrekFactory
+from geotrek.tourism.models import TouristicContent
+from geotrek.tourism.tests.factories import TouristicContentFactory
+from geotrek.trekking.models import Trek
+from geotrek.trekking.tests.factories import PracticeFactory, TrekFactory
 
 
 class ThemeModelTest(TestCase):
@@ -77,3 +82,43 @@ class HDViewPointTestCase(TestCase):
     def test_properties(self):
         self.assertEqual(str(self.vp), 'Panorama')
         self.assertIn('admin/', self.vp.get_list_url())
+
+
+class ProximityTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.practice = PracticeFactory(distance=None)
+        cls.trek = TrekFactory(practice=cls.practice)
+        cls.trek.refresh_from_db()  # Geometry is computed by triggers
+        cls.point = cls.trek.geom.point_on_surface
+
+    def near_trek(self):
+        return set(TouristicContent.objects.filter(pk__in=Proximity.near(TouristicContent, Trek, self.trek.pk)))
+
+    def content_at(self, dx):
+        return TouristicContentFactory(geom=Point(self.point.x + dx, self.point.y, srid=settings.SRID))
+
+    def test_is_indexed(self):
+        self.assertTrue(Proximity.is_indexed(TouristicContent, Trek))
+        self.assertTrue(Proximity.is_indexed(Trek, TouristicContent))
+        self.assertFalse(Proximity.is_indexed(Trek, Trek))
+
+    def test_proximities_follow_geometries(self):
+        near = self.content_at(100)
+        far = self.content_at(10000)
+        self.assertEqual(self.near_trek(), {near})
+        self.assertEqual(self.near_trek(), set(self.trek.touristic_contents))
+        self.assertEqual(list(Proximity.near(Trek, TouristicContent, near.pk)), [{'object_id': self.trek.pk}])
+        far.geom = Point(self.point.x - 100, self.point.y, srid=settings.SRID)
+        far.save()
+        self.assertEqual(self.near_trek(), {near, far})
+
+    def test_proximities_follow_practice_distance(self):
+        near = self.content_at(100)
+        self.practice.distance = 50
+        self.practice.save()
+        self.assertEqual(self.near_trek(), set())
+        self.practice.distance = 200
+        self.practice.save()
+        self.assertEqual(self.near_trek(), {near})
+        self.assertEqual(self.near_trek(), set(Trek.objects.get(pk=self.trek.pk).touristic_contents))
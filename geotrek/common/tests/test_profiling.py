@@ -0,0 +1,74 @@
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from geotrek.common.utils.profiling import QueryBudgetExceeded
+from geotrek.trekking.tests.factories import TrekFactory
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trek = TrekFactory()
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['api_v2'].clear()
+        self.url = reverse('apiv2:trek-detail', args=[self.trek.pk])
+
+    def test_server_timing(self):
+        response = self.client.get(self.url)
+        self.assertRegex(response['Server-Timing'],
+                         r'^db;dur=[\d.]+;desc="[1-9]\d* queries", serialize;dur=[\d.]+, cache;desc=miss, total;dur=[\d.]+$')
+        response = self.client.get(self.url)
+        self.assertIn('cache;desc=hit', response['Server-Timing'])
+
+    def test_metrics(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        response = self.client.get(reverse('common:metrics'))
+        self.assertEqual(response.status_code, 200)
+        metrics = response.content.decode()
+        self.assertIn('# TYPE geotrek_view_requests_total counter', metrics)
+        self.assertIn('geotrek_view_requests_total{view="apiv2:trek-detail"} 2', metrics)
+        self.assertIn('geotrek_view_cache_hits_total{view="apiv2:trek-detail"} 1', metrics)
+        self.assertIn('geotrek_view_cache_misses_total{view="apiv2:trek-detail"} 1', metrics)
+        self.assertIn('geotrek_view_query_budget_exceeded_total{view="apiv2:trek-detail"} 0', metrics)
+
+    def test_cache_metrics(self):
+        with tempfile.TemporaryDirectory() as cache_dir, override_settings(CACHES={**settings.CACHES, 'api_v2': {
+            'BACKEND': 'geotrek.common.cache_backend.ShardedFileCache',
+            'LOCATION': cache_dir,
+            'OPTIONS': {'MAX_SIZE': 1000000, 'ACCESS_RESOLUTION': 0},
+        }}):
+            self.client.get(self.url)
+            self.client.get(self.url)
+            metrics = self.client.get(reverse('common:metrics')).content.decode()
+        self.assertIn('# TYPE geotrek_cache_size_bytes gauge', metrics)
+        self.assertIn('geotrek_cache_entries{cache="api_v2"} 1', metrics)
+        self.assertIn('geotrek_cache_max_size_bytes{cache="api_v2"} 1000000', metrics)
+        self.assertIn('geotrek_cache_hits_total{cache="api_v2"} 1', metrics)
+        self.assertIn('geotrek_cache_misses_total{cache="api_v2"} 1', metrics)
+
+    @override_settings(PROFILING_QUERY_BUDGETS={'apiv2:trek-detail': 1}, PROFILING_QUERY_BUDGETS_STRICT=True)
+    def test_query_budget_exceeded(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, 'apiv2:trek-detail ran [0-9]+ SQL queries, its budget is 1'):
+            self.client.get(self.url)
+
+    @override_settings(PROFILING_QUERY_BUDGETS={'apiv2:trek-detail': 1})
+    def test_query_budget_exceeded_warning(self):
+        with self.assertLogs('geotrek.common.utils.profiling', level='WARNING'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+        response = self.client.get(reverse('common:metrics'))
+        self.assertEqual(response.status_code, 404)
@@ -3,11 +3,17 @@ import json
 import os
 from unittest.mock import patch
 
-from django.test import TestCase
-from geotrek.common.tasks import import_datas, import_datas_from_web
-from geotrek.common.models import Organism, FileType
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from geotrek.common.tasks import generate_thumbnails, import_datas, import_datas_from_web
+from geotrek.common.models import Attachment, Organism, FileType
+from geotrek.common.tests.factories import AttachmentFactory
+from geotrek.common.utils.cache import get_model_versions
+from geotrek.common.utils.testdata import get_dummy_uploaded_file, get_dummy_uploaded_image
+from geotrek.trekking.tests.factories import TrekFactory
 from geotrek.common.parsers import ExcelParser, GlobalImportError
-from geotrek.tourism.models import TouristicEvent
+from geotrek.tourism.models import InformationDesk, TouristicEvent
+from geotrek.tourism.tests.factories import InformationDeskFactory
 
 
 class OrganismParser(ExcelParser):
@@ -86,3 +92,82 @@ class TasksTest(TestCase):
         event = TouristicEvent.objects.get()
         self.assertEqual(event.eid, "323154")
         self.assertEqual(task.status, "SUCCESS")
+
+
+class GenerateThumbnailsTaskTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trek = TrekFactory()
+
+    def test_thumbnails_are_generated_once_committed(self):
+        with patch('geotrek.common.tasks.generate_thumbnails.delay') as mocked:
+            with self.captureOnCommitCallbacks(execute=True):
+                attachment = AttachmentFactory(content_object=self.trek, attachment_file=get_dummy_uploaded_image())
+        mocked.assert_called_once_with('common.Attachment', attachment.pk)
+
+    def test_thumbnails_urls_are_stored(self):
+        attachment = AttachmentFactory(content_object=self.trek, attachment_file=get_dummy_uploaded_image())
+        self.assertIsNone(attachment.get_thumbnail_url('apiv2'))
+        generate_thumbnails.apply(args=('common.Attachment', attachment.pk))
+        attachment = Attachment.objects.get(pk=attachment.pk)
+        self.assertFalse(attachment.thumbnails_outdated)
+        for alias in ('apiv2', 'thumbnail', 'small-square', 'print', 'medium'):
+            self.assertTrue(attachment.get_thumbnail_url(alias).startswith('/media/'))
+        attachment.attachment_file = get_dummy_uploaded_image('other.png')
+        attachment.save()
+        self.assertIsNone(attachment.get_thumbnail_url('apiv2'))
+
+    def test_thumbnails_of_invalid_image_are_empty(self):
+        attachment = AttachmentFactory(content_object=self.trek, attachment_file=get_dummy_uploaded_file())
+        generate_thumbnails.apply(args=('common.Attachment', attachment.pk))
+        attachment = Attachment.objects.get(pk=attachment.pk)
+        self.assertEqual(attachment.get_thumbnail_url('apiv2'), "")
+
+    def test_stored_thumbnails_are_read_by_pictures_accessors(self):
+        attachment = AttachmentFactory(content_object=self.trek, attachment_file=get_dummy_uploaded_image())
+        generate_thumbnails.apply(args=('common.Attachment', attachment.pk))
+        with patch('geotrek.common.mixins.models.get_thumbnailer') as mocked:
+            self.assertEqual(self.trek.thumbnail.url, Attachment.objects.get().get_thumbnail_url('small-square'))
+            self.assertEqual(self.trek.picture_print.url, Attachment.objects.get().get_thumbnail_url('print'))
+            self.assertTrue(os.path.exists(self.trek.picture_print.path))
+            self.assertEqual(self.trek.resized_pictures[0][1].url,
+                             Attachment.objects.get().get_thumbnail_url('medium'))
+        mocked.assert_not_called()
+
+    def test_stored_thumbnails_of_information_desk_are_read(self):
+        desk = InformationDeskFactory()
+        generate_thumbnails.apply(args=('tourism.InformationDesk', desk.pk))
+        desk = InformationDesk.objects.get(pk=desk.pk)
+        with patch('geotrek.common.mixins.models.get_thumbnailer') as mocked:
+            self.assertEqual(desk.photo_url, desk.get_thumbnail_url('thumbnail'))
+            self.assertEqual(desk.resized_picture.url, desk.get_thumbnail_url('medium'))
+        mocked.assert_not_called()
+
+    def test_thumbnails_are_outdated_by_settings(self):
+        attachment = AttachmentFactory(content_object=self.trek, attachment_file=get_dummy_uploaded_image())
+        generate_thumbnails.apply(args=('common.Attachment', attachment.pk))
+        attachment = Attachment.objects.get(pk=attachment.pk)
+        self.assertFalse(attachment.thumbnails_outdated)
+        with override_settings(THUMBNAIL_COPYRIGHT_SIZE=20):
+            self.assertTrue(attachment.thumbnails_outdated)
+            self.assertIsNone(attachment.get_thumbnail_url('apiv2'))
+            generate_thumbnails.apply(args=('common.Attachment', attachment.pk))
+            self.assertFalse(Attachment.objects.get(pk=attachment.pk).thumbnails_outdated)
+
+    def test_removed_thumbnails_are_generated_again(self):
+        attachment = AttachmentFactory(content_object=self.trek, attachment_file=get_dummy_uploaded_image())
+        generate_thumbnails.apply(args=('common.Attachment', attachment.pk))
+        attachment = Attachment.objects.get(pk=attachment.pk)
+        self.assertFalse(attachment.thumbnails_missing)
+        os.remove(attachment.get_thumbnail('medium').path)
+        self.assertTrue(attachment.thumbnails_missing)
+        self.assertTrue(os.path.exists(attachment.get_thumbnail('medium').path))
+        os.remove(attachment.get_thumbnail('print').path)
+        call_command('generate_thumbnails', verbosity=0)
+        self.assertFalse(Attachment.objects.get(pk=attachment.pk).thumbnails_missing)
+
+    def test_api_cache_is_invalidated(self):
+        attachment = AttachmentFactory(content_object=self.trek, attachment_file=get_dummy_uploaded_image())
+        version = get_model_versions([Attachment])
+        generate_thumbnails.apply(args=('common.Attachment', attachment.pk))
+        self.assertNotEqual(get_model_versions([Attachment]), version)
@@ -19,6 +19,7 @@ app_name = "common"
 
 urlpatterns = [
     path("api/settings.json", views.JSSettings.as_view(), name="settings_json"),
+    path("metrics", views.metrics, name="metrics"),
     path("tools/extents/", views.CheckExtentsView.as_view(), name="check_extents"),
     path(
         "commands/import-update.json",
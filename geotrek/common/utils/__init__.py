@@ -106,7 +106,11 @@ def intersecting(qs, obj, distance=None, ordering=True, field='geom', defer=None
     if distance:
         qs = qs.filter(**{'{}__dwithin'.format(field): (obj.geom, Distance(m=distance))})
     else:
-        qs = qs.filter(**{'{}__intersects'.format(field): obj.geom})
+        if field == 'geom' and hasattr(qs, 'intersecting_geom'):
+            # Zoning layers intersect against their subdivided geometries
+            qs = qs.intersecting_geom(obj.geom)
+        else:
+            qs = qs.filter(**{'{}__intersects'.format(field): obj.geom})
         if obj.geom.geom_type == 'LineString' and ordering:
             qs = qs.order_by(LineLocatePoint(obj.geom,
                                              StartPoint(DumpGeom(Intersection(obj.geom,
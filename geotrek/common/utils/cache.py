@@ -0,0 +1,196 @@
+import time
+from datetime import date
+from functools import lru_cache
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db import transaction
+
+VERSIONS_CACHE = 'default'
+
+
+def is_versioned(model):
+    """ Versions are only tracked for Geotrek models """
+    return model.__module__.startswith('geotrek.')
+
+
+def model_version_key(model):
+    return f"model_version:{model._meta.label_lower}"
+
+
+def model_modified_key(model):
+    return f"model_modified:{model._meta.label_lower}"
+
+
+def initial_version():
+    # A lost counter restarts above any value it may have reached before
+    return time.time_ns() // 1000
+
+
+def _bump(models):
+    cache = caches[VERSIONS_CACHE]
+    for model in models:
+        key = model_version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, initial_version(), None)
+    cache.set_many({model_modified_key(model): int(time.time()) for model in models}, None)
+
+
+def bump_model_versions(*models):
+    """ Increment version counters of given models (signals, raw SQL updates, ...) """
+    # Bumped again on commit, so that responses computed from previous data in the meantime are dropped
+    _on_commit_too(_bump, [model for model in set(models) if is_versioned(model)])
+
+
+def object_version_key(model, pk):
+    return f"object_version:{model._meta.label_lower}:{pk}"
+
+
+def _set_object_version(model, pk, version):
+    caches[VERSIONS_CACHE].set(object_version_key(model, pk), version, None)
+
+
+def _delete_object_version(model, pk):
+    caches[VERSIONS_CACHE].delete(object_version_key(model, pk))
+
+
+def _on_commit_too(func, *args):
+    func(*args)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: func(*args))
+
+
+def object_version(instance):
+    date_update = getattr(instance, 'date_update', None)
+    return date_update.isoformat() if date_update else initial_version()
+
+
+def set_object_version(instance):
+    """ Mirror version (date_update) of a saved object, so that it can be read without querying database """
+    if is_versioned(instance.__class__) and instance.pk is not None:
+        model, pk, version = instance.__class__, instance.pk, object_version(instance)
+        # Until commit, responses are computed from previous data: they must not be cached under the new version,
+        # version is read from database in the meantime
+        _delete_object_version(model, pk)
+        transaction.on_commit(lambda: _set_object_version(model, pk, version))
+
+
+def delete_object_version(instance):
+    if is_versioned(instance.__class__) and instance.pk is not None:
+        _on_commit_too(_delete_object_version, instance.__class__, instance.pk)
+
+
+def get_object_version(model, pk):
+    """ Return mirrored version of an object, None if unknown """
+    return caches[VERSIONS_CACHE].get(object_version_key(model, pk))
+
+
+def register_object_version(instance):
+    """ Mirror version of an object read from database, return it """
+    version = object_version(instance)
+    caches[VERSIONS_CACHE].add(object_version_key(instance.__class__, instance.pk), version, None)
+    return version
+
+
+def count_hit(name):
+    """ Increment a cache statistics counter """
+    cache = caches[VERSIONS_CACHE]
+    key = f"cache_stats:{name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_hits(*names):
+    """ Return {name: count} of cache statistics counters """
+    counts = caches[VERSIONS_CACHE].get_many([f"cache_stats:{name}" for name in names])
+    return {name: counts.get(f"cache_stats:{name}", 0) for name in names}
+
+
+def get_model_versions(models):
+    """ Return {model label: version} of given models """
+    cache = caches[VERSIONS_CACHE]
+    keys = {model_version_key(model): model._meta.label_lower for model in models}
+    versions = cache.get_many(keys.keys())
+    for key in keys.keys() - versions.keys():
+        cache.add(key, initial_version(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in sorted(versions.items())}
+
+
+def get_models_modified(models):
+    """ Return timestamp of last change of given models (first read if changes are unknown) """
+    cache = caches[VERSIONS_CACHE]
+    keys = [model_modified_key(model) for model in models]
+    timestamps = cache.get_many(keys)
+    for key in set(keys) - timestamps.keys():
+        cache.add(key, int(time.time()), None)
+        timestamps[key] = cache.get(key)
+    return max(timestamps.values(), default=None)
+
+
+def get_models_modified_today(models):
+    """ Like get_models_modified, for responses which also depend on current date: not older than today 00:00 """
+    midnight = int(time.mktime(date.today().timetuple()))
+    return max(get_models_modified(models) or midnight, midnight)
+
+
+def get_models(labels):
+    """ Resolve 'app_label.ModelName' labels, ignoring models of uninstalled apps """
+    models = []
+    for label in labels:
+        try:
+            models.append(apps.get_model(label))
+        except LookupError:
+            pass
+    return models
+
+
+def _forward_related_models(model):
+    return {field.related_model for field in model._meta.get_fields()
+            if field.is_relation and not field.auto_created and field.related_model}
+
+
+@lru_cache()
+def model_dependencies(model):
+    """
+    Models whose changes may alter a serialized object of given model:
+    the model, its related models (forward, reverse and through), and models they point to.
+    """
+    related = set()
+    for field in model._meta.get_fields(include_hidden=True):
+        if not field.is_relation or not field.related_model:
+            continue
+        related.add(field.related_model)
+        through = getattr(field.remote_field, 'through', None) or getattr(field, 'through', None)
+        if through:
+            related.add(through)
+    dependencies = {model} | related
+    for related_model in related:
+        dependencies |= _forward_related_models(related_model)
+    return tuple(sorted((dependency for dependency in dependencies if is_versioned(dependency)),
+                        key=lambda dependency: dependency._meta.label_lower))
+
+
+def lock_key(name):
+    return f"lock:{name}"
+
+
+def acquire_lock(name, timeout):
+    """ Take a lock shared by all processes, expiring after timeout seconds, return whether it was free """
+    return caches[VERSIONS_CACHE].add(lock_key(name), True, timeout)
+
+
+def release_lock(name):
+    caches[VERSIONS_CACHE].delete(lock_key(name))
+
+
+def wait_lock(name, timeout, interval=0.05):
+    """ Wait until lock is released or expired, at most timeout seconds """
+    cache = caches[VERSIONS_CACHE]
+    deadline = time.monotonic() + timeout
+    while cache.get(lock_key(name)) and time.monotonic() < deadline:
+        time.sleep(interval)
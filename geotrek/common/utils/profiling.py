@@ -0,0 +1,177 @@
+"""
+Opt-in instrumentation of views (PROFILING_ENABLED setting, see ProfilingMiddleware):
+SQL queries, serialization time and cache hits of each request are given in its Server-Timing header,
+and aggregated by view name in the default cache, exported as Prometheus metrics.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+from geotrek.common.utils.cache import VERSIONS_CACHE
+
+logger = logging.getLogger(__name__)
+
+_current_stats = ContextVar('profiling_stats', default=None)
+
+# {metric name: (stats attribute, description)}, durations are aggregated in microseconds
+METRICS = {
+    'requests': (None, "Requests"),
+    'duration_seconds': ('duration', "Time spent in requests"),
+    'sql_queries': ('queries', "SQL queries"),
+    'sql_seconds': ('sql_time', "Time spent in SQL queries"),
+    'serialize_seconds': ('serialize_time', "Time spent in serialization and rendering, SQL queries excluded"),
+    'cache_hits': ('cache_hits', "Responses read from cache"),
+    'cache_misses': ('cache_misses', "Responses computed and stored in cache"),
+    'query_budget_exceeded': ('budget_exceeded', "Requests exceeding query budget"),
+}
+VIEWS_KEY = 'profiling:views'
+# {cache statistic: (metric name, type, description)} of caches with stats (see ShardedFileCache)
+CACHE_METRICS = {
+    'entries': ('entries', 'gauge', "Entries"),
+    'size': ('size_bytes', 'gauge', "Total size of values"),
+    'max_size': ('max_size_bytes', 'gauge', "Maximum total size of values"),
+    'hits': ('hits_total', 'counter', "Values found"),
+    'misses': ('misses_total', 'counter', "Values not found"),
+    'evictions': ('evictions_total', 'counter', "Least recently used values evicted"),
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.duration = 0
+        self.queries = 0
+        self.sql_time = 0
+        self.serialize_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.budget_exceeded = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """ Database execute wrapper (see connection.execute_wrapper) """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.start
+
+    def server_timing(self):
+        """ Server-Timing header value, durations in milliseconds """
+        timings = [f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"']
+        if self.serialize_time:
+            timings.append(f'serialize;dur={self.serialize_time * 1000:.1f}')
+        if self.cache_hits or self.cache_misses:
+            timings.append(f'cache;desc={"miss" if self.cache_misses else "hit"}')
+        timings.append(f'total;dur={self.duration * 1000:.1f}')
+        return ', '.join(timings)
+
+
+def start_request():
+    """ Start recording stats of current request, return them """
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token):
+    _current_stats.reset(token)
+
+
+def start_serializing():
+    """ Start recording serialization time of current request, SQL queries excluded, return function to stop """
+    stats = _current_stats.get()
+    if stats is None:
+        return lambda: None
+    start, sql_start = time.perf_counter(), stats.sql_time
+
+    def stop():
+        stats.serialize_time += time.perf_counter() - start - (stats.sql_time - sql_start)
+    return stop
+
+
+@contextmanager
+def serializing():
+    """ Record time spent in block as serialization time of current request """
+    stop = start_serializing()
+    try:
+        yield
+    finally:
+        stop()
+
+
+def count_cache(hit):
+    """ Record a cache hit or miss of current request """
+    stats = _current_stats.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+def check_query_budget(view_name, stats):
+    """ Log (or raise, with PROFILING_QUERY_BUDGETS_STRICT) when the query budget of the view is exceeded """
+    budget = settings.PROFILING_QUERY_BUDGETS.get(view_name)
+    if budget is None or stats.queries <= budget:
+        return
+    stats.budget_exceeded = 1
+    message = f"{view_name} ran {stats.queries} SQL queries, its budget is {budget}"
+    if settings.PROFILING_QUERY_BUDGETS_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def _incr(cache, key, delta):
+    """ Increment counter, return False if it did not exist """
+    try:
+        cache.incr(key, delta)
+        return True
+    except ValueError:
+        cache.add(key, delta, None)
+        return False
+
+
+def record(view_name, stats):
+    """ Aggregate stats of a request by view name """
+    cache = caches[VERSIONS_CACHE]
+    for metric, (attribute, _description) in METRICS.items():
+        value = 1 if attribute is None else getattr(stats, attribute)
+        if metric.endswith('_seconds'):
+            value = round(value * 1000000)
+        if not _incr(cache, f"profiling:{view_name}:{metric}", value) and attribute is None:
+            # First request of this view (or lost counters)
+            views = cache.get(VIEWS_KEY, set())
+            cache.set(VIEWS_KEY, views | {view_name}, None)
+
+
+def prometheus_metrics():
+    """ Aggregated stats in Prometheus text format """
+    cache = caches[VERSIONS_CACHE]
+    view_names = sorted(cache.get(VIEWS_KEY, set()))
+    values = cache.get_many([f"profiling:{view_name}:{metric}" for view_name in view_names for metric in METRICS])
+    lines = []
+    for metric, (_attribute, description) in METRICS.items():
+        name = f"geotrek_view_{metric}_total"
+        lines += [f"# HELP {name} {description}, by view", f"# TYPE {name} counter"]
+        for view_name in view_names:
+            value = values.get(f"profiling:{view_name}:{metric}", 0)
+            if metric.endswith('_seconds'):
+                value = value / 1000000
+            lines.append(f'{name}{{view="{view_name}"}} {value}')
+    stats = {alias: caches[alias].stats() for alias in settings.CACHES if hasattr(caches[alias], 'stats')}
+    for statistic, (metric, metric_type, description) in CACHE_METRICS.items():
+        name = f"geotrek_cache_{metric}"
+        lines += [f"# HELP {name} {description}, by cache", f"# TYPE {name} {metric_type}"]
+        lines += [f'{name}{{cache="{alias}"}} {values[statistic]}' for alias, values in stats.items()]
+    return '\n'.join(lines) + '\n'
@@ -68,7 +68,7 @@ from .serializers import (HDViewPointAPIGeoJSONSerializer,
                           HDViewPointGeoJSONSerializer, HDViewPointSerializer,
                           ThemeSerializer)
 from .tasks import import_datas, import_datas_from_web, launch_sync_rando
-from .utils import leaflet_bounds
+from .utils import leaflet_bounds, profiling
 from .utils.import_celery import (create_tmp_destination,
                                   discover_available_parsers)
 
@@ -82,6 +82,13 @@ def handler404(request, exception, template_name="404.html"):
     return page_not_found(request, exception, template_name="404.html")
 
 
+def metrics(request):
+    """ Prometheus metrics of views, aggregated when PROFILING_ENABLED """
+    if not settings.PROFILING_ENABLED:
+        raise Http404
+    return HttpResponse(profiling.prometheus_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 class Meta(MetaMixin, TemplateView):
     template_name = 'common/meta.html'
 
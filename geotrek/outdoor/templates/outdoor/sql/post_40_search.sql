@@ -0,0 +1,12 @@
+-- Full-text search (see geotrek.api.v2.filters.filter_query_string)
+-- Created once per language, kept across migrations (see common/sql/post_10_utilities.sql)
+{% for lang in MODELTRANSLATION_LANGUAGES %}
+CREATE INDEX IF NOT EXISTS outdoor_site_search_{{ lang }}_idx ON outdoor_site
+    USING gin (search_vector(name_{{ lang }}, description_teaser_{{ lang }}, description_{{ lang }}));
+CREATE INDEX IF NOT EXISTS outdoor_site_name_{{ lang }}_trgm_idx ON outdoor_site
+    USING gin (search_unaccent(name_{{ lang }}) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS outdoor_course_search_{{ lang }}_idx ON outdoor_course
+    USING gin (search_vector(name_{{ lang }}, description_{{ lang }}));
+CREATE INDEX IF NOT EXISTS outdoor_course_name_{{ lang }}_trgm_idx ON outdoor_course
+    USING gin (search_unaccent(name_{{ lang }}) gin_trgm_ops);
+{% endfor %}
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.21 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensitivity', '0028_alter_sensitivearea_structure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='species',
+            name='period_mask',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            "UPDATE sensitivity_species SET period_mask = "
+            + " | ".join(f"(period{month:02}::int << {month - 1})" for month in range(1, 13)) + ";",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
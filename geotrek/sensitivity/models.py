@@ -64,6 +64,8 @@ class Species(TimeStampedModelMixin, OptionalPictogramMixin):
     period10 = models.BooleanField(default=False, verbose_name=_("October"))
     period11 = models.BooleanField(default=False, verbose_name=_("November"))
     period12 = models.BooleanField(default=False, verbose_name=_("Decembre"))
+    # Bit n - 1 is set for month n, computed from periodNN fields by trigger
+    period_mask = models.IntegerField(default=0, editable=False)
     practices = models.ManyToManyField(SportPractice, verbose_name=_("Sport practices"))
     url = models.URLField(blank=True, verbose_name="URL")
     radius = models.IntegerField(blank=True, null=True, verbose_name=_("Bubble radius"), help_text=_("meters"))
@@ -80,6 +82,11 @@ class Species(TimeStampedModelMixin, OptionalPictogramMixin):
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def months_mask(months):
+        """ Return period_mask bits of given months (1-12) """
+        return sum(1 << (month - 1) for month in set(months))
+
     def pretty_period(self):
         return ", ".join([str(self._meta.get_field('period{:02}'.format(p)).verbose_name)
                           for p in range(1, 13)
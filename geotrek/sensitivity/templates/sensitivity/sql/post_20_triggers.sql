@@ -13,4 +13,33 @@ $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER sensitivity_geom_buffered_intersection
     BEFORE INSERT OR UPDATE ON sensitivity_sensitivearea
-    FOR EACH ROW EXECUTE PROCEDURE sensitive_area_update_geom_buffered_intersection();
\ No newline at end of file
+    FOR EACH ROW EXECUTE PROCEDURE sensitive_area_update_geom_buffered_intersection();
+
+
+-------------------------------------------------------------
+-- Keep months of species periods as bits of an integer mask
+-------------------------------------------------------------
+
+CREATE FUNCTION {{ schema_geotrek }}.species_update_period_mask() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    NEW.period_mask = NEW.period01::int
+        | (NEW.period02::int << 1)
+        | (NEW.period03::int << 2)
+        | (NEW.period04::int << 3)
+        | (NEW.period05::int << 4)
+        | (NEW.period06::int << 5)
+        | (NEW.period07::int << 6)
+        | (NEW.period08::int << 7)
+        | (NEW.period09::int << 8)
+        | (NEW.period10::int << 9)
+        | (NEW.period11::int << 10)
+        | (NEW.period12::int << 11);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE TRIGGER sensitivity_species_period_mask
+    BEFORE INSERT OR UPDATE ON sensitivity_species
+    FOR EACH ROW EXECUTE PROCEDURE species_update_period_mask();
@@ -19,6 +19,7 @@ ALTER TABLE sensitivity_species ALTER COLUMN period09 SET DEFAULT FALSE;
 ALTER TABLE sensitivity_species ALTER COLUMN period10 SET DEFAULT FALSE;
 ALTER TABLE sensitivity_species ALTER COLUMN period11 SET DEFAULT FALSE;
 ALTER TABLE sensitivity_species ALTER COLUMN period12 SET DEFAULT FALSE;
+ALTER TABLE sensitivity_species ALTER COLUMN period_mask SET DEFAULT 0;
 -- practices
 ALTER TABLE sensitivity_species ALTER COLUMN url SET DEFAULT '';
 -- radius
@@ -3,3 +3,5 @@
 DROP VIEW IF EXISTS v_sensitivearea CASCADE;
 DROP TRIGGER IF EXISTS sensitivity_geom_buffered_intersection ON sensitivity_sensitivearea;
 DROP FUNCTION IF EXISTS {{ schema_geotrek }}.sensitive_area_update_geom_buffered_intersection() CASCADE;
+DROP TRIGGER IF EXISTS sensitivity_species_period_mask ON sensitivity_species;
+DROP FUNCTION IF EXISTS {{ schema_geotrek }}.species_update_period_mask() CASCADE;
@@ -2,6 +2,7 @@ from django.test import TestCase
 from django.test.utils import override_settings
 from django.conf import settings
 
+from geotrek.sensitivity.models import Species
 from geotrek.sensitivity.tests.factories import SensitiveAreaFactory, SpeciesFactory
 from geotrek.trekking.tests.factories import TrekFactory
 
@@ -83,3 +84,18 @@ class SensitiveAreaModelTest(TestCase):
         """ Geom buffered could be created and updated in instance after creation """
         area = SensitiveAreaFactory()
         self.assertIsNotNone(area.geom_buffered)
+
+
+class SpeciesModelTest(TestCase):
+
+    def test_period_mask(self):
+        species = SpeciesFactory.create(period01=True, period06=False, period07=True, period12=True)
+        species.refresh_from_db()
+        self.assertEqual(species.period_mask, 0b100001000001)
+        self.assertEqual(species.period_mask, Species.months_mask([1, 7, 12]))
+
+    def test_period_mask_follows_raw_updates(self):
+        species = SpeciesFactory.create()
+        Species.objects.filter(pk=species.pk).update(period06=False, period07=False, period08=True)
+        species.refresh_from_db()
+        self.assertEqual(species.period_mask, Species.months_mask([8]))
@@ -235,6 +235,7 @@ TEMPLATES = [
 ]
 
 MIDDLEWARE = (
+    'geotrek.common.middleware.ProfilingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'geotrek.authent.middleware.LocaleForcedMiddleware',
@@ -324,14 +325,16 @@ CACHES = {
     },
     # The fat backend is used to store big chunk of data (>1 Mo)
     'fat': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'BACKEND': 'geotrek.common.cache_backend.ShardedFileCache',
         'LOCATION': os.path.join(CACHE_ROOT, 'fat'),
         'TIMEOUT': 2592000,  # 30 days
+        'OPTIONS': {'MAX_SIZE': 1024 ** 3},  # 1 GiB
     },
     'api_v2': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'BACKEND': 'geotrek.common.cache_backend.ShardedFileCache',
         'LOCATION': os.path.join(CACHE_ROOT, 'api_v2'),
         'TIMEOUT': 2592000,  # 30 days
+        'OPTIONS': {'MAX_SIZE': 2 * 1024 ** 3},  # 2 GiB
     }
 }
 
@@ -351,6 +354,8 @@ THUMBNAIL_ALIASES = {
 }
 
 THUMBNAIL_PROCESSORS = easy_thumbnails_defaults.THUMBNAIL_PROCESSORS + ('geotrek.common.thumbnail_processors.add_watermark',)
+# Thumbnails generated asynchronously when attachments (and information desks) are saved, URLs stored on them
+PRECOMPUTED_THUMBNAIL_ALIASES = ('apiv2', 'thumbnail', 'small-square', 'print', 'medium')
 
 FILE_UPLOAD_PERMISSIONS = 0o644
 
@@ -681,6 +686,29 @@ SWAGGER_SETTINGS = {
 }
 
 API_IS_PUBLIC = True
+# APIv2 list pages of at least this size are streamed (not cached)
+API_STREAMING_PAGE_SIZE = 500
+# Geometries are not simplified for higher zoom levels (zoom parameter)
+API_SIMPLIFY_MAX_ZOOM = 20
+# Seconds a request computing an APIv2 response makes other requests of same response wait for it
+API_CACHE_LOCK_TIMEOUT = 30
+# Base URL of public APIv2 (e.g. 'https://admin.example.com') to render its responses in cache after changes (celery)
+API_CACHE_WARMING_URL = None
+# Viewsets (by basename) whose list and detail responses are warmed, in each language and for each portal
+API_CACHE_WARMING_VIEWSETS = ('trek', 'poi', 'touristiccontent', 'touristicevent', 'sensitivearea')
+# Extra query parameters of warmed requests, e.g. ({'fields': 'id,name'}, ) to warm responses as queried by a portal
+API_CACHE_WARMING_PARAMS = ({}, )
+# Seconds after a change before warming, changes in the meantime are warmed at once
+API_CACHE_WARMING_DELAY = 60
+# Responses rendered simultaneously by warming
+API_CACHE_WARMING_CONCURRENCY = 2
+
+# Record SQL queries, serialization time and cache hits of views (Server-Timing header, /metrics)
+PROFILING_ENABLED = False
+# Maximum number of SQL queries of views, by view name, e.g. {'apiv2:trek-list': 20}
+PROFILING_QUERY_BUDGETS = {}
+# Raise QueryBudgetExceeded instead of logging a warning (e.g. to fail tests)
+PROFILING_QUERY_BUDGETS_STRICT = False
 
 SENSITIVITY_DEFAULT_RADIUS = 100  # meters
 SENSITIVE_AREA_INTERSECTION_MARGIN = 500  # meters (always used)
@@ -59,4 +59,5 @@ ADMINS = (
 
 MANAGERS = ADMINS
 
+TEST_RUNNER = 'geotrek.test_runner.CacheIsolationTestRunner'
 # TEST_RUNNER = 'geotrek.test_runner.TestRunner'
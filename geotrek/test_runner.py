@@ -1,3 +1,4 @@
+from django.core.cache import caches
 from django.test.runner import DiscoverRunner
 
 from unittest.runner import TextTestRunner, TextTestResult
@@ -39,5 +40,21 @@ class TimedTextTestRunner(TextTestRunner):
         return result
 
 
-class TestRunner(DiscoverRunner):
+class CacheIsolationTestResultMixin:
+    """
+    Clear cached API responses before each test: their keys are built from model versions, which are not rolled back
+    with the data of previous tests
+    """
+    def startTest(self, test):
+        caches['api_v2'].clear()
+        super().startTest(test)
+
+
+class CacheIsolationTestRunner(DiscoverRunner):
+    def get_resultclass(self):
+        resultclass = super().get_resultclass() or self.test_runner.resultclass
+        return type(resultclass.__name__, (CacheIsolationTestResultMixin, resultclass), {})
+
+
+class TestRunner(CacheIsolationTestRunner):
     test_runner = TimedTextTestRunner
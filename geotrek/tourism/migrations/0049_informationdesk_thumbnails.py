@@ -0,0 +1,18 @@
+# Generated by Django 3.2.21 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0048_alter_touristiceventorganizer_label'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='informationdesk',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Thumbnails'),
+        ),
+    ]
@@ -11,14 +11,12 @@ from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 from django.utils.formats import date_format
 from django.utils.translation import gettext_lazy as _
-from easy_thumbnails.alias import aliases
-from easy_thumbnails.exceptions import InvalidImageFormatError
-from easy_thumbnails.files import get_thumbnailer
 from extended_choices import Choices
 
 from geotrek.authent.models import StructureRelated
 from geotrek.common.mixins.models import (AddPropertyMixin, NoDeleteMixin, OptionalPictogramMixin, PictogramMixin,
-                                          PicturesMixin, PublishableMixin, TimeStampedModelMixin, GeotrekMapEntityMixin)
+                                          PicturesMixin, PublishableMixin, ThumbnailsMixin, TimeStampedModelMixin,
+                                          GeotrekMapEntityMixin)
 from geotrek.common.models import ReservationSystem, Theme
 from geotrek.common.signals import log_cascade_deletion
 from geotrek.common.utils import intersecting, classproperty, queryset_or_model
@@ -65,7 +63,7 @@ class LabelAccessibility(TimeStampedModelMixin, PictogramMixin):
         return self.label
 
 
-class InformationDesk(TimeStampedModelMixin, models.Model):
+class InformationDesk(ThumbnailsMixin, TimeStampedModelMixin, models.Model):
     eid = models.CharField(verbose_name=_("External id"), max_length=1024, blank=True, null=True)
     provider = models.CharField(verbose_name=_("Provider"), db_index=True, max_length=1024, blank=True)
     name = models.CharField(verbose_name=_("Title"), max_length=256)
@@ -99,6 +97,8 @@ class InformationDesk(TimeStampedModelMixin, models.Model):
 
     objects = models.Manager()
 
+    thumbnail_file_field = 'photo'
+
     class Meta:
         verbose_name = _("Information desk")
         verbose_name_plural = _("Information desks")
@@ -122,23 +122,13 @@ class InformationDesk(TimeStampedModelMixin, models.Model):
     def thumbnail(self):
         if not self.photo:
             return None
-        thumbnailer = get_thumbnailer(self.photo)
-        try:
-            return thumbnailer.get_thumbnail(aliases.get('thumbnail'))
-        except (IOError, InvalidImageFormatError):
-            logger.warning(_("Image %s invalid or missing from disk.") % self.photo)
-            return None
+        return self.get_thumbnail('thumbnail')
 
     @property
     def resized_picture(self):
         if not self.photo:
             return None
-        thumbnailer = get_thumbnailer(self.photo)
-        try:
-            return thumbnailer.get_thumbnail(aliases.get('medium'))
-        except (IOError, InvalidImageFormatError):
-            logger.warning(_("Image %s invalid or missing from disk.") % self.photo)
-            return None
+        return self.get_thumbnail('medium')
 
     @property
     def photo_url(self):
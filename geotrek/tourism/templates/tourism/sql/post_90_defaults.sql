@@ -30,6 +30,7 @@ ALTER TABLE tourism_informationdesk ALTER COLUMN accessibility SET DEFAULT '';
 -- eid
 ALTER TABLE tourism_informationdesk ALTER COLUMN uuid SET DEFAULT gen_random_uuid();
 ALTER TABLE tourism_informationdesk ALTER COLUMN provider SET DEFAULT '';
+ALTER TABLE tourism_informationdesk ALTER COLUMN thumbnails SET DEFAULT '{}'::jsonb;
 ALTER TABLE tourism_informationdesk ALTER COLUMN date_insert SET DEFAULT now();
 ALTER TABLE tourism_informationdesk ALTER COLUMN date_update SET DEFAULT now();
 
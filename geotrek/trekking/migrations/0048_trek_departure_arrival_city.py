@@ -0,0 +1,48 @@
+# Generated by Django 3.2.21 on 2026-10-18 11:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoning', '0104_subdivisions'),
+        ('trekking', '0047_remove_servicetype_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trek',
+            name='arrival_city',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='treks_arrival', to='zoning.city', verbose_name='Arrival city'),
+        ),
+        migrations.AddField(
+            model_name='trek',
+            name='departure_city',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='treks_departure', to='zoning.city', verbose_name='Departure city'),
+        ),
+        # Compute cities of existing treks, kept up to date by triggers from now on (trekking/sql/post_40_cities.sql)
+        migrations.RunSQL(
+            """
+            WITH points AS (
+                SELECT trek.topo_object_id AS id,
+                       CASE WHEN ST_GeometryType(t.geom) = 'ST_Point' THEN t.geom
+                            ELSE ST_StartPoint(ST_GeometryN(t.geom, 1)) END AS departure,
+                       CASE WHEN ST_GeometryType(t.geom) = 'ST_Point' THEN t.geom
+                            ELSE ST_EndPoint(ST_GeometryN(t.geom, ST_NumGeometries(t.geom))) END AS arrival
+                FROM trekking_trek trek
+                JOIN core_topology t ON t.id = trek.topo_object_id
+                WHERE t.geom IS NOT NULL AND NOT ST_IsEmpty(t.geom)
+            )
+            UPDATE trekking_trek SET
+                departure_city_id = (SELECT code FROM zoning_city WHERE ST_Covers(zoning_city.geom, points.departure)
+                                     ORDER BY name, code LIMIT 1),
+                arrival_city_id = (SELECT code FROM zoning_city WHERE ST_Covers(zoning_city.geom, points.arrival)
+                                   ORDER BY name, code LIMIT 1)
+            FROM points
+            WHERE points.id = trekking_trek.topo_object_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
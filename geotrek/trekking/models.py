@@ -1,5 +1,6 @@
 import logging
 import os
+from collections import defaultdict
 
 import simplekml
 from colorfield.fields import ColorField
@@ -9,7 +10,7 @@ from django.contrib.gis.db import models
 from django.contrib.gis.db.models.functions import LineLocatePoint, Transform
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db.models import F
+from django.db.models import F, Q
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 from django.template.defaultfilters import slugify
@@ -18,6 +19,8 @@ from django.utils.translation import get_language, gettext
 from django.utils.translation import gettext_lazy as _
 from mapentity.helpers import clone_attachment
 from mapentity.serializers import plain_text
+from modeltranslation.utils import build_localized_fieldname
+from modeltranslation.utils import get_language as get_translation_language
 
 from geotrek.authent.models import StructureRelated
 from geotrek.common.mixins.models import (BasePublishableMixin,
@@ -61,6 +64,61 @@ class OrderedTrekChild(models.Model):
         )
 
 
+class TrekItinerancy:
+    """
+    Itinerancy of treks (parents, children, previous and next treks), computed in memory
+    from all OrderedTrekChild rows relevant to these treks, loaded in one query:
+    rows of their children, and rows of their parents' children.
+    """
+
+    def __init__(self, treks):
+        ids = [trek.pk for trek in treks]
+        published = 'published'
+        if settings.PUBLISHED_BY_LANG:
+            published = build_localized_fieldname(published, get_translation_language())
+        rows = OrderedTrekChild.objects.filter(
+            Q(parent__in=ids) | Q(parent__in=OrderedTrekChild.objects.filter(child__in=ids).values('parent'))
+        ).order_by('parent__id', 'order', 'pk').values_list('parent_id', 'child_id', f'parent__{published}', 'parent__deleted')
+        self._children = defaultdict(list)
+        self._parents = defaultdict(list)
+        self._published_parents = set()
+        for parent_id, child_id, parent_published, parent_deleted in rows:
+            self._children[parent_id].append(child_id)
+            self._parents[child_id].append(parent_id)
+            if parent_published and not parent_deleted:
+                self._published_parents.add(parent_id)
+
+    @classmethod
+    def prefetch(cls, treks):
+        """ Resolve itinerancy of treks at once, return them as a list """
+        treks = list(treks)
+        itinerancy = cls(treks)
+        for trek in treks:
+            trek._prefetched_itinerancy = itinerancy
+        return treks
+
+    def children_id(self, trek_id):
+        return list(self._children.get(trek_id, []))
+
+    def parents_id(self, trek_id):
+        return list(self._parents.get(trek_id, []))
+
+    def _sibling_id(self, parent_id, trek_id, offset):
+        children_id = self._children[parent_id]
+        index = children_id.index(trek_id) + offset
+        return children_id[index] if 0 <= index < len(children_id) else None
+
+    def previous_id(self, trek_id):
+        """ Dict of published parent -> previous child """
+        return {parent_id: self._sibling_id(parent_id, trek_id, -1)
+                for parent_id in self._parents.get(trek_id, []) if parent_id in self._published_parents}
+
+    def next_id(self, trek_id):
+        """ Dict of published parent -> next child """
+        return {parent_id: self._sibling_id(parent_id, trek_id, 1)
+                for parent_id in self._parents.get(trek_id, []) if parent_id in self._published_parents}
+
+
 class Practice(TimeStampedModelMixin, PictogramMixin):
     name = models.CharField(verbose_name=_("Name"), max_length=128)
     distance = models.IntegerField(verbose_name=_("Distance"), blank=True, null=True,
@@ -223,6 +281,11 @@ class Trek(Topology, StructureRelated, PicturesMixin, PublishableMixin, GeotrekM
                                       blank=True)
     attachments_accessibility = GenericRelation('common.AccessibilityAttachment')
     view_points = GenericRelation('common.HDViewPoint', related_query_name='trek')
+    # Computed by triggers, from trek geometry and cities layer
+    departure_city = models.ForeignKey('zoning.City', related_name='treks_departure', on_delete=models.SET_NULL,
+                                       null=True, blank=True, editable=False, verbose_name=_("Departure city"))
+    arrival_city = models.ForeignKey('zoning.City', related_name='treks_arrival', on_delete=models.SET_NULL,
+                                     null=True, blank=True, editable=False, verbose_name=_("Arrival city"))
 
     capture_map_image_waitfor = '.poi_enum_loaded.services_loaded.info_desks_loaded.ref_points_loaded'
 
@@ -327,6 +390,10 @@ class Trek(Topology, StructureRelated, PicturesMixin, PublishableMixin, GeotrekM
 
     @property
     def city_departure(self):
+        city = self.departure_city
+        if city and city.published:
+            return str(city)
+        # Departure city is unknown or not published: first published city crossed by trek
         cities = self.published_cities
         return str(cities[0]) if len(cities) > 0 else ''
 
@@ -409,10 +476,14 @@ class Trek(Topology, StructureRelated, PicturesMixin, PublishableMixin, GeotrekM
     def parents(self):
         return Trek.objects.filter(trek_children__child=self, deleted=False)
 
+    @property
+    def itinerancy(self):
+        """ Itinerancy resolver, shared by treks prefetched together (see TrekItinerancy.prefetch) """
+        return getattr(self, '_prefetched_itinerancy', None) or TrekItinerancy([self])
+
     @property
     def parents_id(self):
-        parents = self.trek_parents.values_list('parent__id', flat=True)
-        return list(parents)
+        return self.itinerancy.parents_id(self.pk)
 
     @property
     def children(self):
@@ -423,10 +494,7 @@ class Trek(Topology, StructureRelated, PicturesMixin, PublishableMixin, GeotrekM
         """
         Get children IDs
         """
-        children = self.trek_children.order_by('order')\
-                                     .values_list('child__id',
-                                                  flat=True)
-        return children
+        return self.itinerancy.children_id(self.pk)
 
     def previous_id_for(self, parent):
         children_id = list(parent.children_id)
@@ -447,14 +515,14 @@ class Trek(Topology, StructureRelated, PicturesMixin, PublishableMixin, GeotrekM
         """
         Dict of parent -> previous child
         """
-        return {parent.id: self.previous_id_for(parent) for parent in self.parents.filter(published=True, deleted=False)}
+        return self.itinerancy.previous_id(self.pk)
 
     @property
     def next_id(self):
         """
         Dict of parent -> next child
         """
-        return {parent.id: self.next_id_for(parent) for parent in self.parents.filter(published=True, deleted=False)}
+        return self.itinerancy.next_id(self.pk)
 
     def clean(self):
         """
@@ -494,6 +562,12 @@ class Trek(Topology, StructureRelated, PicturesMixin, PublishableMixin, GeotrekM
             if picture:
                 return picture
 
+    def reload(self):
+        super().reload()
+        if self.pk:
+            self.refresh_from_db(fields=['departure_city', 'arrival_city'])
+        return self
+
     def save(self, *args, **kwargs):
         if self.pk is not None and kwargs.get('update_fields', None) is None:
             field_names = set()
@@ -204,6 +204,13 @@ class TrekAPISerializer(PublishableSerializerMixin, PicturesSerializerMixin, Alt
 
     length = serializers.ReadOnlyField(source='length_2d')
 
+    @classmethod
+    def many_init(cls, instance=None, *args, **kwargs):
+        # Resolve children, parents, previous and next of all treks at once
+        if instance is not None:
+            instance = trekking_models.TrekItinerancy.prefetch(instance)
+        return super().many_init(instance, *args, **kwargs)
+
     def __init__(self, instance=None, *args, **kwargs):
         # duplicate each trek for each one of its accessibilities
         if instance and hasattr(instance, '__iter__') and settings.SPLIT_TREKS_CATEGORIES_BY_ACCESSIBILITY:
@@ -0,0 +1,91 @@
+-------------------------------------------------------------------------------
+-- Keep departure and arrival cities of treks up to date
+-- They are computed when a trek or its geometry changes, and when a city
+-- which covers (or covered) the departure or the arrival is changed.
+-------------------------------------------------------------------------------
+
+CREATE FUNCTION {{ schema_geotrek }}.trek_city_at(geom geometry, arrival boolean) RETURNS varchar AS $$
+DECLARE
+    point geometry;
+    city_code varchar;
+BEGIN
+    IF geom IS NULL OR ST_IsEmpty(geom) THEN
+        RETURN NULL;
+    END IF;
+    IF ST_GeometryType(geom) = 'ST_Point' THEN
+        point := geom;
+    ELSIF arrival THEN
+        point := ST_EndPoint(ST_GeometryN(geom, ST_NumGeometries(geom)));
+    ELSE
+        point := ST_StartPoint(ST_GeometryN(geom, 1));
+    END IF;
+    SELECT code INTO city_code
+    FROM zoning_city
+    WHERE ST_Covers(zoning_city.geom, point)
+    ORDER BY name, code
+    LIMIT 1;
+    RETURN city_code;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+CREATE FUNCTION {{ schema_geotrek }}.trek_cities_iu() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+    trek_geom geometry;
+BEGIN
+    SELECT geom INTO trek_geom FROM core_topology WHERE id = NEW.topo_object_id;
+    NEW.departure_city_id := trek_city_at(trek_geom, FALSE);
+    NEW.arrival_city_id := trek_city_at(trek_geom, TRUE);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trekking_trek_cities_iu_tgr
+BEFORE INSERT OR UPDATE ON trekking_trek
+FOR EACH ROW EXECUTE PROCEDURE trek_cities_iu();
+
+
+CREATE FUNCTION {{ schema_geotrek }}.topology_trek_cities_iu() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    -- Cities are recomputed by trekking_trek_cities_iu_tgr
+    UPDATE trekking_trek SET departure_city_id = NULL, arrival_city_id = NULL
+    WHERE topo_object_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_topology_trek_cities_iu_tgr
+AFTER INSERT OR UPDATE OF geom ON core_topology
+FOR EACH ROW WHEN (NEW.kind = 'TREK')
+EXECUTE PROCEDURE topology_trek_cities_iu();
+
+
+CREATE FUNCTION {{ schema_geotrek }}.city_trek_cities_iud() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    -- Cities are recomputed by trekking_trek_cities_iu_tgr
+    IF TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
+        UPDATE trekking_trek SET departure_city_id = NULL, arrival_city_id = NULL
+        WHERE departure_city_id = OLD.code OR arrival_city_id = OLD.code;
+    END IF;
+    IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+        UPDATE trekking_trek SET departure_city_id = NULL, arrival_city_id = NULL
+        FROM core_topology t
+        WHERE t.id = trekking_trek.topo_object_id
+          AND ST_Intersects(t.geom, NEW.geom)
+          AND (ST_Covers(NEW.geom, ST_StartPoint(ST_GeometryN(t.geom, 1)))
+               OR ST_Covers(NEW.geom, ST_EndPoint(ST_GeometryN(t.geom, ST_NumGeometries(t.geom))))
+               OR ST_GeometryType(t.geom) = 'ST_Point');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER zoning_city_trek_cities_iu_tgr
+AFTER INSERT OR UPDATE OF code, name, geom ON zoning_city
+FOR EACH ROW EXECUTE PROCEDURE city_trek_cities_iud();
+
+CREATE TRIGGER zoning_city_trek_cities_d_tgr
+AFTER DELETE ON zoning_city
+FOR EACH ROW EXECUTE PROCEDURE city_trek_cities_iud();
@@ -15,7 +15,7 @@ from mapentity.middleware import clear_internal_user_cache
 from geotrek.common.tests import TranslationResetMixin
 from geotrek.core.tests.factories import PathFactory
 from geotrek.trekking.models import (OrderedTrekChild, Rating, RatingScale,
-                                     Trek)
+                                     Trek, TrekItinerancy)
 from geotrek.trekking.tests.factories import (POIFactory, PracticeFactory,
                                               RatingFactory,
                                               RatingScaleFactory,
@@ -326,6 +326,7 @@ class RelatedObjectsTest(TranslationResetMixin, TestCase):
         city2 = CityFactory.create(geom=MultiPolygon(Polygon(((3, 3), (9, 3), (9, 9),
                                                               (3, 9), (3, 3)))))
         self.assertEqual([city for city in trek.cities], [city1, city2])
+        trek.refresh_from_db()
         self.assertEqual(trek.city_departure, str(city1))
 
     @skipIf(settings.TREKKING_TOPOLOGY_ENABLED, 'Test without dynamic segmentation only')
@@ -338,8 +339,42 @@ class RelatedObjectsTest(TranslationResetMixin, TestCase):
         city2 = CityFactory.create(geom=MultiPolygon(Polygon(((3, 3), (9, 3), (9, 9),
                                                               (3, 9), (3, 3)))))
         self.assertEqual([city for city in trek.cities], [city1, city2])
+        trek.refresh_from_db()
         self.assertEqual(trek.city_departure, str(city1))
 
+    @skipIf(settings.TREKKING_TOPOLOGY_ENABLED, 'Test without dynamic segmentation only')
+    def test_city_departure_falls_back_to_first_published_city(self):
+        trek = TrekFactory.create(geom=LineString((0, 0), (5, 5)))
+        CityFactory.create(published=False, geom=MultiPolygon(Polygon(((-1, -1), (3, -1), (3, 3),
+                                                                       (-1, 3), (-1, -1)))))
+        city2 = CityFactory.create(geom=MultiPolygon(Polygon(((3, 3), (9, 3), (9, 9),
+                                                              (3, 9), (3, 3)))))
+        trek.refresh_from_db()
+        self.assertEqual(trek.city_departure, str(city2))
+
+    @skipIf(settings.TREKKING_TOPOLOGY_ENABLED, 'Test without dynamic segmentation only')
+    def test_departure_arrival_cities_follow_cities_layer(self):
+        trek = TrekFactory.create(geom=LineString((0, 0), (5, 5)))
+        city1 = CityFactory.create(geom=MultiPolygon(Polygon(((-1, -1), (3, -1), (3, 3),
+                                                              (-1, 3), (-1, -1)))))
+        city2 = CityFactory.create(geom=MultiPolygon(Polygon(((3, 3), (9, 3), (9, 9),
+                                                              (3, 9), (3, 3)))))
+        trek.refresh_from_db()
+        self.assertEqual(trek.departure_city, city1)
+        self.assertEqual(trek.arrival_city, city2)
+
+        city2.geom = MultiPolygon(Polygon(((20, 20), (29, 20), (29, 29), (20, 29), (20, 20))))
+        city2.save()
+        city1.delete()
+        trek.refresh_from_db()
+        self.assertIsNone(trek.departure_city)
+        self.assertIsNone(trek.arrival_city)
+
+        trek.geom = LineString((21, 21), (25, 25))
+        trek.save()
+        self.assertEqual(trek.departure_city, city2)
+        self.assertEqual(trek.arrival_city, city2)
+
 
 class TrekUpdateGeomTest(TestCase):
     @classmethod
@@ -456,6 +491,38 @@ class TrekItinerancyTest(TestCase):
         self.assertEqual(trekA.parents_id, [trekC.id])
         self.assertEqual(list(trekC.children_id), [trekA.id])
 
+    def test_prefetch(self):
+        trekA = TrekFactory(name="A")
+        trekB = TrekFactory(name="B")
+        trekC = TrekFactory(name="C")
+        trekD = TrekFactory(name="D", published=False)
+        OrderedTrekChild(parent=trekC, child=trekA, order=42).save()
+        OrderedTrekChild(parent=trekC, child=trekB, order=15).save()
+        OrderedTrekChild(parent=trekD, child=trekA, order=1).save()
+        expected = {trek.pk: (trek.children_id, trek.parents_id, trek.previous_id, trek.next_id)
+                    for trek in Trek.objects.all()}
+        self.assertEqual(expected[trekA.pk], ([], [trekC.pk, trekD.pk], {trekC.pk: trekB.pk}, {trekC.pk: None}))
+        with self.assertNumQueries(2):
+            treks = TrekItinerancy.prefetch(Trek.objects.all())
+            itinerancy = {trek.pk: (trek.children_id, trek.parents_id, trek.previous_id, trek.next_id)
+                          for trek in treks}
+        self.assertEqual(itinerancy, expected)
+
+    def test_soft_deleted_parent_is_not_published(self):
+        trekA = TrekFactory(name="A")
+        trekB = TrekFactory(name="B")
+        trekC = TrekFactory(name="C")
+        trekD = TrekFactory(name="D")
+        OrderedTrekChild(parent=trekC, child=trekA, order=1).save()
+        OrderedTrekChild(parent=trekC, child=trekB, order=2).save()
+        OrderedTrekChild(parent=trekD, child=trekA, order=1).save()
+        Trek.objects.filter(pk=trekD.pk).update(deleted=True)
+        self.assertEqual(trekA.previous_id, {trekC.pk: None})
+        self.assertEqual(trekA.next_id, {trekC.pk: trekB.pk})
+        treks = TrekItinerancy.prefetch(Trek.objects.filter(pk=trekA.pk))
+        self.assertEqual(treks[0].previous_id, {trekC.pk: None})
+        self.assertEqual(treks[0].next_id, {trekC.pk: trekB.pk})
+
 
 class MapImageExtentTest(TestCase):
     @classmethod
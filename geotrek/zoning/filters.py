@@ -1,10 +1,10 @@
 from django_filters import FilterSet
-from django.db.models import Q, Exists, OuterRef
+from django.db.models import Exists, OuterRef
 from django.utils.translation import gettext_lazy as _
 
 
 from geotrek.common.filters import RightFilter
-from geotrek.zoning.models import City, District, RestrictedArea, RestrictedAreaType
+from geotrek.zoning.models import City, District, RestrictedArea, RestrictedAreaSubdivision, RestrictedAreaType
 
 
 class IntersectionFilter(RightFilter):
@@ -13,10 +13,10 @@ class IntersectionFilter(RightFilter):
     """
 
     def filter(self, qs, value):
-        q = Q()
-        for subvalue in value:
-            q |= Q(geom__intersects=subvalue.geom)
-        return qs.filter(q)
+        if not value:
+            return qs
+        subdivisions = self.get_queryset().filter(pk__in=[subvalue.pk for subvalue in value]).subdivisions()
+        return qs.filter(Exists(subdivisions.filter(geom__intersects=OuterRef('geom'))))
 
 
 class IntersectionFilterCity(IntersectionFilter):
@@ -33,7 +33,8 @@ class IntersectionFilterRestrictedAreaType(RightFilter):
     def filter(self, qs, value):
         if not value:
             return qs
-        return qs.filter(Exists(RestrictedArea.objects.filter(area_type__in=value, geom__intersects=OuterRef('geom'))))
+        subdivisions = RestrictedAreaSubdivision.objects.filter(area__area_type__in=value)
+        return qs.filter(Exists(subdivisions.filter(geom__intersects=OuterRef('geom'))))
 
     def get_queryset(self, request=None):
         return super().get_queryset().order_by("name")
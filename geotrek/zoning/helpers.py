@@ -0,0 +1,174 @@
+import csv
+import io
+import itertools
+
+from django.conf import settings
+from django.contrib.gis.geos.collections import MultiPolygon
+from django.contrib.gis.geos.polygon import Polygon
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection, transaction
+
+from geotrek.common.utils.cache import bump_model_versions
+
+
+class InvalidSRID(Exception):
+    """ Features can not be transformed from the given SRID """
+    pass
+
+
+class ZoningBulkLoader:
+    """
+    Load a zoning layer (cities, districts, restricted areas) in bulk.
+
+    Features are streamed with COPY into a temporary staging table, transformed and repaired
+    (ST_MakeValid) in a few set-based statements, filtered on spatial extent, then upserted
+    on their lookup fields. ``date_update`` of loaded zones is set once for the whole layer,
+    so that zoning dependent caches are refreshed in one go.
+    """
+    staging_table = 'zoning_bulk_staging'
+    copy_chunk_size = 1000
+
+    def __init__(self, model, fields, lookup_fields, extra_values=None):
+        """
+        :param model: zoning model to load
+        :param fields: model text fields read from features attributes, ``name`` included
+        :param lookup_fields: fields identifying an existing zone (in fields or extra_values)
+        :param extra_values: constant values for all zones, e.g. ``{'area_type_id': 1}``
+        """
+        self.model = model
+        self.fields = list(fields)
+        self.lookup_fields = list(lookup_fields)
+        self.extra_values = extra_values or {}
+        self.repaired = []
+        self.skipped = []
+        self.created = []
+        self.updated = []
+
+    def read_features(self, layer, attributes, srid):
+        """
+        Yield rows (attribute values + hex EWKB) of polygon features of a GDAL layer
+        :param attributes: dict {model field: attribute name in layer}
+        """
+        for feat in layer:
+            values = [feat.get(attributes[field]) for field in self.fields]
+            geom = feat.geom.geos
+            if isinstance(geom, Polygon):
+                geom = MultiPolygon(geom)
+            if not isinstance(geom, MultiPolygon):
+                self.skipped.append(feat.get(attributes['name']))
+                continue
+            if not geom.srid:
+                geom.srid = srid
+            yield values + [geom.hexewkb.decode()]
+
+    def load_datasource(self, ds, attributes, srid, do_intersect=False):
+        """ Load polygon features of all layers of a GDAL datasource """
+        rows = itertools.chain.from_iterable(self.read_features(layer, attributes, srid) for layer in ds)
+        self.load(rows, do_intersect)
+
+    def report(self, stdout, verbosity):
+        if verbosity > 1:
+            for name in self.skipped:
+                stdout.write("%s's geometry is not a polygon or is out of spatial extent" % name)
+            for name in self.repaired:
+                stdout.write("%s's geometry has been repaired" % name)
+            for name in self.created:
+                stdout.write("Created %s" % name)
+            for name in self.updated:
+                stdout.write("Updated %s" % name)
+        if verbosity > 0:
+            stdout.write("%d created, %d updated, %d repaired, %d skipped" % (
+                len(self.created), len(self.updated), len(self.repaired), len(self.skipped)))
+
+    def copy_rows(self, cursor, rows):
+        columns = ', '.join(self.fields + ['geom'])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if count % self.copy_chunk_size == 0:
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {self.staging_table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {self.staging_table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    def load(self, rows, do_intersect=False):
+        """ Load rows produced by read_features() """
+        table = self.model._meta.db_table
+        text_columns = ', '.join(f'{field} varchar' for field in self.fields)
+        srid = self.model._meta.get_field('geom').srid
+        extent = 'ST_Transform(ST_MakeEnvelope({}, {}, {}, {}, {}), {})'.format(*settings.SPATIAL_EXTENT, settings.SRID, srid)
+        extent_predicate = 'ST_Intersects' if do_intersect else 'ST_Within'
+        extra_columns = list(self.extra_values.keys())
+        params = list(self.extra_values.values())
+        lookup = ' AND '.join(
+            f'z.{field} = s.{field}' if field in self.fields else f'z.{field} = %s' for field in self.lookup_fields
+        )
+        lookup_params = [self.extra_values[field] for field in self.lookup_fields if field not in self.fields]
+        update = ', '.join(f'{field} = s.{field}' for field in self.fields if field not in self.lookup_fields)
+        insert_columns = ', '.join(self.fields + extra_columns + ['geom', 'published', 'date_insert', 'date_update'])
+        select_columns = ', '.join([f's.{field}' for field in self.fields] + ['%s'] * len(extra_columns)
+                                   + ['s.geom', 'TRUE', 'now()', 'now()'])
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Dropped at the end of the load, or by the rollback of this atomic block on errors
+            cursor.execute(f"DROP TABLE IF EXISTS {self.staging_table}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {self.staging_table} (id serial, {text_columns}, geom geometry)")
+            self.copy_rows(cursor, rows)
+            # Last feature wins when several features share the same lookup
+            staging_lookup = ' AND '.join(f'a.{field} = b.{field}' for field in self.lookup_fields if field in self.fields)
+            cursor.execute(f"DELETE FROM {self.staging_table} a USING {self.staging_table} b WHERE {staging_lookup} AND a.id < b.id")
+            try:
+                cursor.execute(f"UPDATE {self.staging_table} SET geom = ST_Multi(ST_Force2D(ST_Transform(geom, %s)))",
+                               [srid])
+            except DatabaseError as exc:
+                raise InvalidSRID(str(exc).strip()) from exc
+            cursor.execute(f"""
+                UPDATE {self.staging_table}
+                SET geom = ST_Multi(ST_CollectionExtract(ST_MakeValid(geom), 3))
+                WHERE NOT ST_IsValid(geom)
+                RETURNING name
+            """)
+            self.repaired = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"""
+                DELETE FROM {self.staging_table}
+                WHERE ST_IsEmpty(geom) OR NOT {extent_predicate}(geom, {extent})
+                RETURNING name
+            """)
+            self.skipped += [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"""
+                UPDATE {table} z SET {update + ', ' if update else ''}geom = s.geom, date_update = now()
+                FROM {self.staging_table} s
+                WHERE {lookup}
+                RETURNING s.name
+            """, lookup_params)
+            self.updated = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"""
+                INSERT INTO {table} ({insert_columns})
+                SELECT {select_columns} FROM {self.staging_table} s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} z WHERE {lookup})
+                RETURNING name
+            """, params + lookup_params)
+            self.created = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"DROP TABLE {self.staging_table}")
+            bump_model_versions(self.model)
+
+
+class ZoningBulkLoadCommandMixin:
+    """ Load features with a ZoningBulkLoader (--bulk option of zoning layer commands) """
+    attributes_error = "Name's attribute do not correspond with options\nPlease, use --name to fix it.\n"
+
+    def load_bulk(self, loader, ds, attributes, srid, do_intersect, verbosity):
+        for layer in ds:
+            if not set(attributes.values()) <= set(layer.fields):
+                self.stdout.write(self.attributes_error + "Fields in your file are : %s" % ', '.join(layer.fields))
+                return
+        try:
+            loader.load_datasource(ds, attributes, srid, do_intersect)
+        except InvalidSRID as exc:
+            raise CommandError("SRID is not well configurate, change/add option srid (%s)" % exc) from exc
+        loader.report(self.stdout, verbosity)
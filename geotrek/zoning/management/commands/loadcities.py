@@ -5,9 +5,13 @@ from django.contrib.gis.geos.polygon import Polygon
 from django.contrib.gis.geos.collections import MultiPolygon
 from django.conf import settings
 
+from geotrek.zoning.helpers import ZoningBulkLoadCommandMixin, ZoningBulkLoader
 
-class Command(BaseCommand):
+
+class Command(ZoningBulkLoadCommandMixin, BaseCommand):
     help = 'Load Cities from a file within the spatial extent\n'
+    attributes_error = "Code's attribute or Name's attribute do not correspond with options\n" \
+                       "Please, use --code and --name to fix it.\n"
 
     def add_arguments(self, parser):
         parser.add_argument('file_path', help="File's path of the cities")
@@ -21,6 +25,8 @@ class Command(BaseCommand):
                             help="File's SRID")
         parser.add_argument('--intersect', '-i', action='store_true', dest='intersect', default=False,
                             help="Check features intersect spatial extent and not only within")
+        parser.add_argument('--bulk', '-b', action='store_true', dest='bulk', default=False,
+                            help="Load all features at once through a staging table, repairing invalid geometries")
 
     def handle(self, *args, **options):
         verbosity = options.get('verbosity')
@@ -35,6 +41,11 @@ class Command(BaseCommand):
         ds = DataSource(file_path, encoding=encoding)
         count_error = 0
 
+        if options.get('bulk'):
+            loader = ZoningBulkLoader(City, fields=('code', 'name'), lookup_fields=('code', ))
+            self.load_bulk(loader, ds, {'code': code_column, 'name': name_column}, srid, do_intersect, verbosity)
+            return
+
         for layer in ds:
             for feat in layer:
                 try:
@@ -5,8 +5,10 @@ from django.contrib.gis.geos.polygon import Polygon
 from django.contrib.gis.geos.collections import MultiPolygon
 from django.conf import settings
 
+from geotrek.zoning.helpers import ZoningBulkLoadCommandMixin, ZoningBulkLoader
 
-class Command(BaseCommand):
+
+class Command(ZoningBulkLoadCommandMixin, BaseCommand):
     help = 'Load Restricted Area from a file within the spatial extent\n'
 
     def add_arguments(self, parser):
@@ -21,6 +23,8 @@ class Command(BaseCommand):
                             help="File's SRID")
         parser.add_argument('--intersect', '-i', action='store_true', dest='intersect', default=False,
                             help="Check features intersect spatial extent and not only within")
+        parser.add_argument('--bulk', '-b', action='store_true', dest='bulk', default=False,
+                            help="Load all features at once through a staging table, repairing invalid geometries")
 
     def handle(self, *args, **options):
         verbosity = options.get('verbosity')
@@ -38,6 +42,12 @@ class Command(BaseCommand):
         if verbosity > 0:
             self.stdout.write("RestrictedArea Type's %s created" % area_type_name if created else "Get %s" % area_type_name)
 
+        if options.get('bulk'):
+            loader = ZoningBulkLoader(RestrictedArea, fields=('name', ), lookup_fields=('name', 'area_type_id'),
+                                      extra_values={'area_type_id': area_type.pk})
+            self.load_bulk(loader, ds, {'name': name_column}, srid, do_intersect, verbosity)
+            return
+
         for layer in ds:
             for feat in layer:
                 try:
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.21 on 2026-10-18 09:12
+
+from django.conf import settings
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zoning', '0103_alter_restrictedarea_area_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestrictedAreaSubdivision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geom', django.contrib.gis.db.models.fields.PolygonField(spatial_index=False, srid=settings.SRID)),
+                ('area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subdivisions', to='zoning.restrictedarea')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DistrictSubdivision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geom', django.contrib.gis.db.models.fields.PolygonField(spatial_index=False, srid=settings.SRID)),
+                ('district', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subdivisions', to='zoning.district')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CitySubdivision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geom', django.contrib.gis.db.models.fields.PolygonField(spatial_index=False, srid=settings.SRID)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subdivisions', to='zoning.city')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='restrictedareasubdivision',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['geom'], name='areasubdiv_geom_gist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='districtsubdivision',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['geom'], name='districtsubdiv_geom_gist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='citysubdivision',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['geom'], name='citysubdiv_geom_gist_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import hashlib
 
 from django.core.cache import cache
+from django.db import connection
 from django.utils.translation import gettext_lazy as _
 
 from geotrek.common.utils import intersecting, uniquify
@@ -86,3 +87,46 @@ class ZoningPropertiesMixin:
         if not hasattr(self, 'published'):
             return self.cities
         return [city for city in self.cities if city.published]
+
+    @classmethod
+    def published_zones_pks(cls, pks, zoning_model):
+        """
+        Return published zones pks (ordered as in ``published_cities``...) of many objects, in one query
+        :param pks: objects pks
+        :param zoning_model: City, District or RestrictedArea
+        :return: dict {object pk: [zone pk, ...]}
+        """
+        geom_field = cls._meta.get_field('geom')
+        geom_model = geom_field.model
+        subdivisions_field = zoning_model.subdivisions.field
+        zone_ordering = ', '.join('z.{}'.format(zoning_model._meta.get_field(name).column)
+                                  for name in zoning_model._meta.ordering)
+        sql = """
+            SELECT o.{pk}, z.{zone_pk}
+            FROM {table} o
+            JOIN {subdivisions_table} s ON ST_Intersects(s.geom, o.{geom})
+            JOIN {zones_table} z ON z.{zone_pk} = s.{subdivisions_fk}
+            LEFT JOIN LATERAL (
+                SELECT ST_LineLocatePoint(o.{geom}, ST_StartPoint(d.geom)) AS position
+                FROM ST_Dump(ST_Intersection(o.{geom}, s.geom)) d
+                WHERE GeometryType(o.{geom}) = 'LINESTRING'
+            ) p ON TRUE
+            WHERE o.{pk} = ANY(%s) AND z.published
+            GROUP BY o.{pk}, z.{zone_pk}
+            ORDER BY o.{pk}, MIN(p.position), {zone_ordering}
+        """.format(
+            pk=geom_model._meta.pk.column,
+            table=geom_model._meta.db_table,
+            geom=geom_field.column,
+            subdivisions_table=subdivisions_field.model._meta.db_table,
+            subdivisions_fk=subdivisions_field.column,
+            zones_table=zoning_model._meta.db_table,
+            zone_pk=zoning_model._meta.pk.column,
+            zone_ordering=zone_ordering,
+        )
+        zones = {pk: [] for pk in pks}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [list(zones.keys())])
+            for pk, zone_pk in cursor.fetchall():
+                zones[pk].append(zone_pk)
+        return zones
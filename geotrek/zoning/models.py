@@ -7,11 +7,41 @@
 from django.conf import settings
 from django.contrib.gis.db import models
 from django.contrib.postgres.indexes import GistIndex
+from django.db.models import Exists, OuterRef
+from django.db.models import Manager as DefaultManager
 from django.utils.translation import gettext_lazy as _
 
 from geotrek.common.mixins.models import TimeStampedModelMixin
 
 
+class ZoningQuerySet(models.QuerySet):
+    def intersecting_geom(self, geom):
+        """ Filter zones intersecting geom, using their subdivided geometries (small polygons, indexed) """
+        return self.filter(Exists(self.subdivisions_model().objects.filter(
+            **{self.subdivisions_field().name: OuterRef('pk'), 'geom__intersects': geom})))
+
+    def subdivisions(self):
+        """ Return subdivided geometries of zones of this queryset """
+        return self.subdivisions_model().objects.filter(**{'{}__in'.format(self.subdivisions_field().name): self.values('pk')})
+
+    def subdivisions_field(self):
+        return self.model.subdivisions.field
+
+    def subdivisions_model(self):
+        return self.subdivisions_field().model
+
+
+class ZoningManager(DefaultManager):
+    def get_queryset(self):
+        return ZoningQuerySet(self.model, using=self._db)
+
+    def intersecting_geom(self, geom):
+        return self.get_queryset().intersecting_geom(geom)
+
+    def subdivisions(self):
+        return self.get_queryset().subdivisions()
+
+
 class RestrictedAreaType(models.Model):
     name = models.CharField(max_length=200, verbose_name=_("Name"))
 
@@ -28,6 +58,8 @@ class RestrictedArea(TimeStampedModelMixin, models.Model):
     area_type = models.ForeignKey(RestrictedAreaType, verbose_name=_("Restricted area"), on_delete=models.PROTECT)
     published = models.BooleanField(verbose_name=_("Published"), default=True, help_text=_("Visible on Geotrek-rando"))
 
+    objects = ZoningManager()
+
     class Meta:
         ordering = ['area_type', 'name']
         verbose_name = _("Restricted area")
@@ -46,6 +78,8 @@ class City(TimeStampedModelMixin, models.Model):
     geom = models.MultiPolygonField(srid=settings.SRID, spatial_index=False)
     published = models.BooleanField(verbose_name=_("Published"), default=True, help_text=_("Visible on Geotrek-rando"))
 
+    objects = ZoningManager()
+
     class Meta:
         verbose_name = _("City")
         verbose_name_plural = _("Cities")
@@ -63,6 +97,8 @@ class District(TimeStampedModelMixin, models.Model):
     geom = models.MultiPolygonField(srid=settings.SRID, spatial_index=False)
     published = models.BooleanField(verbose_name=_("Published"), default=True, help_text=_("Visible on Geotrek-rando"))
 
+    objects = ZoningManager()
+
     class Meta:
         verbose_name = _("District")
         verbose_name_plural = _("Districts")
@@ -73,3 +109,42 @@ class District(TimeStampedModelMixin, models.Model):
 
     def __str__(self):
         return self.name
+
+
+class ZoningSubdivision(models.Model):
+    """
+    Zoning geometries are split with ST_Subdivide into small polygons, so that
+    intersections are computed against a few vertices instead of the whole layer.
+    Rows are maintained by triggers (see sql/post_30_subdivisions.sql).
+    """
+    geom = models.PolygonField(srid=settings.SRID, spatial_index=False)
+
+    class Meta:
+        abstract = True
+
+
+class RestrictedAreaSubdivision(ZoningSubdivision):
+    area = models.ForeignKey(RestrictedArea, related_name='subdivisions', on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            GistIndex(name='areasubdiv_geom_gist_idx', fields=['geom']),
+        ]
+
+
+class CitySubdivision(ZoningSubdivision):
+    city = models.ForeignKey(City, related_name='subdivisions', on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            GistIndex(name='citysubdiv_geom_gist_idx', fields=['geom']),
+        ]
+
+
+class DistrictSubdivision(ZoningSubdivision):
+    district = models.ForeignKey(District, related_name='subdivisions', on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            GistIndex(name='districtsubdiv_geom_gist_idx', fields=['geom']),
+        ]
@@ -0,0 +1,91 @@
+-------------------------------------------------------------------------------
+-- Keep subdivided zoning geometries up to date
+-- Intersections with big multipolygons are slow, small subdivided pieces
+-- with a spatial index are used instead.
+-------------------------------------------------------------------------------
+
+CREATE FUNCTION {{ schema_geotrek }}.zoning_city_subdivide_iud() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    IF TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
+        DELETE FROM zoning_citysubdivision WHERE city_id = OLD.code;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    INSERT INTO zoning_citysubdivision (city_id, geom)
+    SELECT NEW.code, ST_Subdivide(NEW.geom, 256);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER zoning_city_subdivide_iu_tgr
+AFTER INSERT OR UPDATE OF code, geom ON zoning_city
+FOR EACH ROW EXECUTE PROCEDURE zoning_city_subdivide_iud();
+
+CREATE TRIGGER zoning_city_subdivide_d_tgr
+AFTER DELETE ON zoning_city
+FOR EACH ROW EXECUTE PROCEDURE zoning_city_subdivide_iud();
+
+
+CREATE FUNCTION {{ schema_geotrek }}.zoning_district_subdivide_iud() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    IF TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
+        DELETE FROM zoning_districtsubdivision WHERE district_id = OLD.id;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    INSERT INTO zoning_districtsubdivision (district_id, geom)
+    SELECT NEW.id, ST_Subdivide(NEW.geom, 256);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER zoning_district_subdivide_iu_tgr
+AFTER INSERT OR UPDATE OF id, geom ON zoning_district
+FOR EACH ROW EXECUTE PROCEDURE zoning_district_subdivide_iud();
+
+CREATE TRIGGER zoning_district_subdivide_d_tgr
+AFTER DELETE ON zoning_district
+FOR EACH ROW EXECUTE PROCEDURE zoning_district_subdivide_iud();
+
+
+CREATE FUNCTION {{ schema_geotrek }}.zoning_restrictedarea_subdivide_iud() RETURNS trigger SECURITY DEFINER AS $$
+DECLARE
+BEGIN
+    IF TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
+        DELETE FROM zoning_restrictedareasubdivision WHERE area_id = OLD.id;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    INSERT INTO zoning_restrictedareasubdivision (area_id, geom)
+    SELECT NEW.id, ST_Subdivide(NEW.geom, 256);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER zoning_restrictedarea_subdivide_iu_tgr
+AFTER INSERT OR UPDATE OF id, geom ON zoning_restrictedarea
+FOR EACH ROW EXECUTE PROCEDURE zoning_restrictedarea_subdivide_iud();
+
+CREATE TRIGGER zoning_restrictedarea_subdivide_d_tgr
+AFTER DELETE ON zoning_restrictedarea
+FOR EACH ROW EXECUTE PROCEDURE zoning_restrictedarea_subdivide_iud();
+
+
+-- Subdivide zones existing before triggers creation
+
+INSERT INTO zoning_citysubdivision (city_id, geom)
+SELECT c.code, ST_Subdivide(c.geom, 256) FROM zoning_city c
+WHERE NOT EXISTS (SELECT 1 FROM zoning_citysubdivision s WHERE s.city_id = c.code);
+
+INSERT INTO zoning_districtsubdivision (district_id, geom)
+SELECT d.id, ST_Subdivide(d.geom, 256) FROM zoning_district d
+WHERE NOT EXISTS (SELECT 1 FROM zoning_districtsubdivision s WHERE s.district_id = d.id);
+
+INSERT INTO zoning_restrictedareasubdivision (area_id, geom)
+SELECT a.id, ST_Subdivide(a.geom, 256) FROM zoning_restrictedarea a
+WHERE NOT EXISTS (SELECT 1 FROM zoning_restrictedareasubdivision s WHERE s.area_id = a.id);
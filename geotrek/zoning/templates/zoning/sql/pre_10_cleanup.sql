@@ -19,3 +19,9 @@ DROP VIEW IF EXISTS f_v_secteur CASCADE;
 DROP VIEW IF EXISTS v_districts CASCADE;
 DROP VIEW IF EXISTS f_v_zonage CASCADE;
 DROP VIEW IF EXISTS v_restrictedareas CASCADE;
+
+-- 30
+
+DROP FUNCTION IF EXISTS zoning_city_subdivide_iud() CASCADE;
+DROP FUNCTION IF EXISTS zoning_district_subdivide_iud() CASCADE;
+DROP FUNCTION IF EXISTS zoning_restrictedarea_subdivide_iud() CASCADE;
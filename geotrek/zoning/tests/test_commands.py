@@ -282,3 +282,63 @@ class DistrictsCommandTest(TestCase):
         self.assertIn('NOM, Insee', output.getvalue())
         call_command('loaddistricts', self.filename, '-i', name='toto', stdout=output)
         self.assertIn('NOM, Insee', output.getvalue())
+
+
+class BulkCommandsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.filename = os.path.join(os.path.dirname(__file__), 'data', 'city.shp')
+        cls.filename_out_in = os.path.join(os.path.dirname(__file__), 'data', 'polygons_in_out.geojson')
+        cls.filename_not_valid = os.path.join(os.path.dirname(__file__), 'data', 'polygon_not_valid.geojson')
+
+    @override_settings(SPATIAL_EXTENT=(0, 6000000.0, 400000.0, 7000000))
+    def test_load_cities_bulk(self):
+        output = StringIO()
+        call_command('loadcities', self.filename, '--bulk', name='NOM', code='Insee', srid=2154, verbosity=2, stdout=output)
+        self.assertEqual(City.objects.count(), 1)
+        city = City.objects.get()
+        self.assertEqual('99999', city.code)
+        self.assertEqual('Trifouilli-les-Oies', city.name)
+        self.assertTrue(city.subdivisions.exists())
+        self.assertIn('Created Trifouilli-les-Oies', output.getvalue())
+        call_command('loadcities', self.filename, '--bulk', name='NOM', code='Insee', srid=2154, verbosity=2, stdout=output)
+        self.assertEqual(City.objects.count(), 1)
+        self.assertIn('Updated Trifouilli-les-Oies', output.getvalue())
+
+    @override_settings(SPATIAL_EXTENT=(-1, -1, 4, 4))
+    def test_load_cities_bulk_repairs_geometries(self):
+        output = StringIO()
+        call_command('loadcities', self.filename_not_valid, '--bulk', name='NOM', code='Insee', srid=2154,
+                     verbosity=2, stdout=output)
+        self.assertEqual(City.objects.count(), 1)
+        self.assertTrue(City.objects.get().geom.valid)
+        self.assertIn("wrong_polygon's geometry has been repaired", output.getvalue())
+        self.assertIn("1 created, 0 updated, 1 repaired, 0 skipped", output.getvalue())
+
+    @override_settings(SRID=4326, SPATIAL_EXTENT=(-1, -3, 2, 2))
+    def test_load_districts_bulk_within(self):
+        output = StringIO()
+        call_command('loaddistricts', self.filename_out_in, '--bulk', name='NOM', verbosity=1, stdout=output)
+        self.assertEqual(District.objects.count(), 1)
+        self.assertEqual(District.objects.get().name, 'coucou')
+        self.assertIn("1 created, 0 updated, 0 repaired, 1 skipped", output.getvalue())
+
+    @override_settings(SRID=4326, SPATIAL_EXTENT=(-1, -3, 2, 2))
+    def test_load_restrictedareas_bulk_intersect(self):
+        call_command('loadrestrictedareas', self.filename_out_in, 'type_area', '--bulk', '-i', name='NOM', verbosity=0)
+        self.assertEqual(RestrictedArea.objects.filter(area_type__name='type_area').count(), 2)
+        call_command('loadrestrictedareas', self.filename_out_in, 'other_type', '--bulk', '-i', name='NOM', verbosity=0)
+        self.assertEqual(RestrictedArea.objects.count(), 4)
+
+    def test_load_cities_bulk_wrong_srid(self):
+        with self.assertRaisesRegex(CommandError, 'SRID is not well configurate, change/add option srid'):
+            call_command('loadcities', self.filename, '--bulk', name='NOM', code='Insee', srid=999999, verbosity=0)
+        self.assertEqual(City.objects.count(), 0)
+        # Staging table has been dropped with the rollback
+        call_command('loadcities', self.filename, '--bulk', name='NOM', code='Insee', srid=2154, verbosity=0)
+
+    def test_load_cities_bulk_no_match_properties(self):
+        output = StringIO()
+        call_command('loadcities', self.filename_out_in, '--bulk', name='toto', code='tata', stdout=output)
+        self.assertIn('NOM, Insee', output.getvalue())
+        self.assertEqual(City.objects.count(), 0)
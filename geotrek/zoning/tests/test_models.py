@@ -5,7 +5,7 @@ from django.contrib.gis.geos import LineString, Polygon, Point, MultiPolygon
 
 from geotrek.core.tests.factories import PathFactory
 from geotrek.signage.tests.factories import SignageFactory
-from geotrek.zoning.models import City
+from geotrek.zoning.models import City, CitySubdivision
 from geotrek.zoning.tests.factories import CityFactory, DistrictFactory, RestrictedAreaFactory, RestrictedAreaTypeFactory
 
 
@@ -301,3 +301,32 @@ class ZoningModelsTest(TestCase):
                                                        geom=MultiPolygon(Polygon(((201, 0), (300, 0), (300, 100), (200, 100), (201, 0)),
                                                                                  srid=settings.SRID)))
         self.assertEqual(str(restricted_area), "Test - Tel")
+
+
+class ZoningSubdivisionTest(TestCase):
+    def setUp(self):
+        # A circle with ~1000 vertices, subdivided in several pieces
+        self.geom = MultiPolygon(Point(1000, 1000, srid=settings.SRID).buffer(500, quadsegs=250), srid=settings.SRID)
+
+    def test_city_subdivisions_follow_geometry(self):
+        city = CityFactory.create(geom=self.geom)
+        self.assertGreater(city.subdivisions.count(), 1)
+        self.assertAlmostEqual(sum(s.geom.area for s in city.subdivisions.all()), self.geom.area, places=2)
+        city.geom = MultiPolygon(Polygon.from_bbox((0, 0, 10, 10)), srid=settings.SRID)
+        city.save()
+        self.assertEqual(city.subdivisions.count(), 1)
+        code = city.code
+        city.delete()
+        self.assertFalse(CitySubdivision.objects.filter(city_id=code).exists())
+
+    def test_district_and_area_subdivisions(self):
+        district = DistrictFactory.create(geom=self.geom)
+        area = RestrictedAreaFactory.create(geom=self.geom)
+        self.assertGreater(district.subdivisions.count(), 1)
+        self.assertGreater(area.subdivisions.count(), 1)
+
+    def test_intersecting_geom(self):
+        city = CityFactory.create(geom=self.geom)
+        CityFactory.create(geom=MultiPolygon(Polygon.from_bbox((0, 0, 10, 10)), srid=settings.SRID))
+        self.assertEqual(list(City.objects.intersecting_geom(LineString((900, 900), (1100, 1100), srid=settings.SRID))), [city])
+        self.assertFalse(City.objects.intersecting_geom(LineString((1900, 1900), (2000, 2000), srid=settings.SRID)).exists())